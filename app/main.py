@@ -12,8 +12,11 @@ from app.database import init_db
 
 # Import middleware
 from app.middleware.auth_middleware import auth_middleware
+from app.middleware.query_stats_middleware import query_stats_middleware
 from app.routes.api.auth_api import router as auth_api_router
 from app.routes.api.admin_api import router as admin_api_router
+from app.routes.api.analytics_api import router as analytics_api_router
+from app.routes.api.events_api import router as events_api_router
 from app.routes.api.planner_api import router as planner_api_router
 from app.routes.api.team_leader_api import router as team_leader_api_router
 
@@ -48,6 +51,9 @@ app.add_middleware(
 # Add auth middleware
 app.middleware("http")(auth_middleware)
 
+# Add SQL query stats middleware last so it also counts the auth lookup
+app.middleware("http")(query_stats_middleware)
+
 # Configure static files
 app.mount("/static", StaticFiles(directory=Path(__file__).parent /
           "public"), name="static")
@@ -56,6 +62,8 @@ app.mount("/static", StaticFiles(directory=Path(__file__).parent /
 app.include_router(web_router)
 app.include_router(auth_api_router)
 app.include_router(admin_api_router)
+app.include_router(analytics_api_router)
+app.include_router(events_api_router)
 app.include_router(planner_api_router)
 app.include_router(team_leader_api_router)
 
@@ -1,7 +1,20 @@
 from fastapi import Request
-from app.database import get_db
+from fastapi.concurrency import run_in_threadpool
+from app.database import SessionLocal
 from app.services.auth_service import decode_token
-from app.models import User
+from app.services.principal_cache import ClaimsPrincipal
+from app.services.token_revocation import revocations
+
+# Only API routes read request.state.user; static assets and template pages don't
+AUTHENTICATED_PATH_PREFIX = "/api"
+
+
+def _sync_revocations() -> None:
+    db = SessionLocal()
+    try:
+        revocations.sync(db)
+    finally:
+        db.close()
 
 
 async def auth_middleware(request: Request, call_next):
@@ -9,35 +22,32 @@ async def auth_middleware(request: Request, call_next):
     Middleware to authenticate users and attach them to the request state.
     This middleware doesn't block any requests - it just adds user info if available.
     """
+    request.state.user = None
+    request.state.token_claims = None
+
+    # Skip authentication entirely for static files and page templates
+    if not request.url.path.startswith(AUTHENTICATED_PATH_PREFIX):
+        return await call_next(request)
+
     # Get the authorization header
     authorization = request.headers.get("Authorization")
-    token = None
 
     # Extract the token if it exists
     if authorization and authorization.startswith("Bearer "):
         token = authorization.replace("Bearer ", "")
+        payload = decode_token(token)
+
+        if payload:
+            # Pick up revocations made by other processes now and then
+            if revocations.needs_sync():
+                await run_in_threadpool(_sync_revocations)
 
-    # Use dependency for DB session
-    for db in get_db():
-        # If we have a token, try to get the user
-        if token:
-            payload = decode_token(token)
-            if payload and "sub" in payload:
-                # Get user from database
-                sap_id = payload["sub"]
-                user = db.query(User).filter(User.sap_id == sap_id).first()
-                if user:
-                    # Attach the user to the request state
-                    request.state.user = user
-                else:
-                    # Invalid user, but we don't block the request
-                    request.state.user = None
-            else:
-                # Invalid token, but we don't block the request
-                request.state.user = None
-        else:
-            # No token provided
-            request.state.user = None
+            # Authorize from the token claims; deleted users and logged out
+            # tokens are in the revocation set, so the user isn't loaded.
+            # Invalid, expired or revoked tokens don't block the request.
+            if not revocations.is_revoked(payload):
+                request.state.user = ClaimsPrincipal.from_claims(payload)
+                request.state.token_claims = payload
 
     # Call the next middleware/endpoint
     response = await call_next(request)
@@ -0,0 +1,37 @@
+import logging
+from fastapi import Request
+from app.services.query_stats import (
+    N_PLUS_ONE_THRESHOLD,
+    notify_observers,
+    track_queries,
+    tracking_requests
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def query_stats_middleware(request: Request, call_next):
+    """
+    Debug middleware counting the SQL statements each request runs.
+    Adds X-Query-Count and X-Query-Repeated headers, logs the count and
+    warns about statements repeated often enough to look like an N+1.
+    Enabled with QUERY_STATS=1, or while a query_budget() block is open.
+    """
+    if not tracking_requests():
+        return await call_next(request)
+
+    with track_queries() as stats:
+        response = await call_next(request)
+
+    repeated = stats.repeated(N_PLUS_ONE_THRESHOLD)
+    response.headers["X-Query-Count"] = str(stats.count)
+    response.headers["X-Query-Repeated"] = str(len(repeated))
+
+    logger.info("%s %s: %d queries", request.method,
+                request.url.path, stats.count)
+    for statement, count in repeated:
+        logger.warning("Possible N+1 in %s %s: %dx %s", request.method,
+                       request.url.path, count, " ".join(statement.split()))
+
+    notify_observers(request.method, request.url.path, stats)
+    return response
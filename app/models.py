@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum, Boolean, func
+from sqlalchemy import Column, Integer, String, ForeignKey, Date, DateTime, Enum, Boolean, Index, event, func, inspect, select, update
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 import enum
@@ -84,14 +84,15 @@ class Loop(Base, TimestampMixin):
     name = Column(String, index=True)
     zone_id = Column(Integer, ForeignKey("zone.id"))
 
+    # Denormalized ancestor, kept in sync by the hierarchy listeners below
+    plant_id = Column(Integer, ForeignKey("plant.id"), index=True)
+
     # Relationships
     zone = relationship("Zone", back_populates="loops")
     lines = relationship("Line", back_populates="loop")
 
-    # Unnested relationships - using foreign key references is simpler
-    @property
-    def plant(self):
-        return self.zone.plant if self.zone else None
+    # Unnested relationships - using the denormalized ancestor id
+    plant = relationship("Plant", foreign_keys=[plant_id], viewonly=True)
 
 
 class Line(Base, TimestampMixin):
@@ -101,20 +102,19 @@ class Line(Base, TimestampMixin):
     name = Column(String, index=True)
     loop_id = Column(Integer, ForeignKey("loop.id"))
 
+    # Denormalized ancestors, kept in sync by the hierarchy listeners below
+    zone_id = Column(Integer, ForeignKey("zone.id"), index=True)
+    plant_id = Column(Integer, ForeignKey("plant.id"), index=True)
+
     # Relationships
     loop = relationship("Loop", back_populates="lines")
     cells = relationship("Cell", back_populates="line")
     team_leaders = relationship("TeamLeader", back_populates="line")
     productions = relationship("Production", back_populates="line")
 
-    # Unnested relationships as properties
-    @property
-    def zone(self):
-        return self.loop.zone if self.loop else None
-
-    @property
-    def plant(self):
-        return self.loop.zone.plant if self.loop and self.loop.zone else None
+    # Unnested relationships - using the denormalized ancestor ids
+    zone = relationship("Zone", foreign_keys=[zone_id], viewonly=True)
+    plant = relationship("Plant", foreign_keys=[plant_id], viewonly=True)
 
 
 class Cell(Base, TimestampMixin):
@@ -124,24 +124,21 @@ class Cell(Base, TimestampMixin):
     name = Column(String, index=True)
     line_id = Column(Integer, ForeignKey("line.id"))
 
+    # Denormalized ancestors, kept in sync by the hierarchy listeners below
+    loop_id = Column(Integer, ForeignKey("loop.id"), index=True)
+    zone_id = Column(Integer, ForeignKey("zone.id"), index=True)
+    plant_id = Column(Integer, ForeignKey("plant.id"), index=True)
+
     # Relationships
     line = relationship("Line", back_populates="cells")
     members = relationship("Member", back_populates="cell")
     working_members = relationship(
         "Attendance", foreign_keys="Attendance.working_cell_id", back_populates="working_cell")
 
-    # Unnested relationships as properties
-    @property
-    def loop(self):
-        return self.line.loop if self.line else None
-
-    @property
-    def zone(self):
-        return self.line.loop.zone if self.line and self.line.loop else None
-
-    @property
-    def plant(self):
-        return self.line.loop.zone.plant if self.line and self.line.loop and self.line.loop.zone else None
+    # Unnested relationships - using the denormalized ancestor ids
+    loop = relationship("Loop", foreign_keys=[loop_id], viewonly=True)
+    zone = relationship("Zone", foreign_keys=[zone_id], viewonly=True)
+    plant = relationship("Plant", foreign_keys=[plant_id], viewonly=True)
 
 
 class User(Base, TimestampMixin):
@@ -191,11 +188,11 @@ class TeamLeader(Base, TimestampMixin):
 
     @property
     def zone(self):
-        return self.line.loop.zone if self.line and self.line.loop else None
+        return self.line.zone if self.line else None
 
     @property
     def plant(self):
-        return self.line.loop.zone.plant if self.line and self.line.loop and self.line.loop.zone else None
+        return self.line.plant if self.line else None
 
 
 class Member(Base, TimestampMixin):
@@ -216,15 +213,15 @@ class Member(Base, TimestampMixin):
 
     @property
     def loop(self):
-        return self.cell.line.loop if self.cell and self.cell.line else None
+        return self.cell.loop if self.cell else None
 
     @property
     def zone(self):
-        return self.cell.line.loop.zone if self.cell and self.cell.line and self.cell.line.loop else None
+        return self.cell.zone if self.cell else None
 
     @property
     def plant(self):
-        return self.cell.line.loop.zone.plant if self.cell and self.cell.line and self.cell.line.loop and self.cell.line.loop.zone else None
+        return self.cell.plant if self.cell else None
 
 
 class Shift(Base, TimestampMixin):
@@ -283,11 +280,11 @@ class Production(Base, TimestampMixin):
 
     @property
     def zone(self):
-        return self.line.loop.zone if self.line and self.line.loop else None
+        return self.line.zone if self.line else None
 
     @property
     def plant(self):
-        return self.line.loop.zone.plant if self.line and self.line.loop and self.line.loop.zone else None
+        return self.line.plant if self.line else None
 
 
 class LossReason(Base, TimestampMixin):
@@ -344,11 +341,11 @@ class Loss(Base, TimestampMixin):
 
     @property
     def zone(self):
-        return self.production.line.loop.zone if self.production and self.production.line and self.production.line.loop else None
+        return self.production.line.zone if self.production and self.production.line else None
 
     @property
     def plant(self):
-        return self.production.line.loop.zone.plant if self.production and self.production.line and self.production.line.loop and self.production.line.loop.zone else None
+        return self.production.line.plant if self.production and self.production.line else None
 
 
 class AttendanceType(Base, TimestampMixin):
@@ -397,15 +394,15 @@ class Attendance(Base, TimestampMixin):
 
     @property
     def working_loop(self):
-        return self.working_cell.line.loop if self.working_cell and self.working_cell.line else None
+        return self.working_cell.loop if self.working_cell else None
 
     @property
     def working_zone(self):
-        return self.working_cell.line.loop.zone if self.working_cell and self.working_cell.line and self.working_cell.line.loop else None
+        return self.working_cell.zone if self.working_cell else None
 
     @property
     def working_plant(self):
-        return self.working_cell.line.loop.zone.plant if self.working_cell and self.working_cell.line and self.working_cell.line.loop and self.working_cell.line.loop.zone else None
+        return self.working_cell.plant if self.working_cell else None
 
     # Member's normal location hierarchy
     @property
@@ -418,12 +415,190 @@ class Attendance(Base, TimestampMixin):
 
     @property
     def member_loop(self):
-        return self.member.cell.line.loop if self.member and self.member.cell and self.member.cell.line else None
+        return self.member.cell.loop if self.member and self.member.cell else None
 
     @property
     def member_zone(self):
-        return self.member.cell.line.loop.zone if self.member and self.member.cell and self.member.cell.line and self.member.cell.line.loop else None
+        return self.member.cell.zone if self.member and self.member.cell else None
 
     @property
     def member_plant(self):
-        return self.member.cell.line.loop.zone.plant if self.member and self.member.cell and self.member.cell.line and self.member.cell.line.loop and self.member.cell.line.loop.zone else None
+        return self.member.cell.plant if self.member and self.member.cell else None
+
+
+class TokenRevocation(Base):
+    """
+    Revoked tokens, mirrored in memory by app/services/token_revocation.py.
+    A row revokes either one token id (jti: an access token or a refresh
+    token family) or every token of a user issued up to revoked_at
+    (sap_id). Rows are append-only and purged once expires_at passes,
+    since no token they could match is still valid by then.
+    """
+    __tablename__ = "token_revocation"
+
+    id = Column(Integer, primary_key=True)
+    # Unique, so a refresh token can only be rotated once even when two
+    # requests race with it
+    jti = Column(String, nullable=True, unique=True)
+    # Family of a retired refresh token, to tell its latest rotation
+    family = Column(String, nullable=True, index=True)
+    sap_id = Column(String, nullable=True)
+    # Indexed for the trailing-window sync
+    revoked_at = Column(DateTime, nullable=False, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+# Rollups: production and loss totals pre-aggregated per hierarchy entity
+# and period, maintained by app/services/rollup_service.py. They are
+# derived data, so they have no timestamps or soft delete.
+
+
+class RollupMixin:
+    # "plant", "zone", "loop" or "line", and that entity's id
+    level = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+
+    # The entity's ancestry including itself; levels below it are null
+    plant_id = Column(Integer)
+    zone_id = Column(Integer)
+    loop_id = Column(Integer)
+    line_id = Column(Integer)
+
+    day = Column(Date, nullable=False)
+
+    plan = Column(Integer, default=0, nullable=False)
+    achievement = Column(Integer, default=0, nullable=False)
+    scraps = Column(Integer, default=0, nullable=False)
+    defects = Column(Integer, default=0, nullable=False)
+    flash = Column(Integer, default=0, nullable=False)
+    loss = Column(Integer, default=0, nullable=False)
+
+
+class ShiftRollup(Base, RollupMixin):
+    __tablename__ = "shift_rollup"
+
+    id = Column(Integer, primary_key=True)
+    shift_id = Column(Integer, ForeignKey("shift.id"), nullable=False)
+
+
+class DayRollup(Base, RollupMixin):
+    __tablename__ = "day_rollup"
+
+    id = Column(Integer, primary_key=True)
+
+
+# Composite indexes for the hot lookups. Most queries only look at live rows,
+# so these are partial indexes (WHERE is_deleted = false) on SQLite and
+# PostgreSQL; other dialects get a regular index over the same columns.
+
+
+def _live_rows(model):
+    condition = model.is_deleted == False
+    return {"sqlite_where": condition, "postgresql_where": condition}
+
+
+# Team leader hourly entry and planner schedule: shift + line (+ hour).
+# Unique, so there is at most one live production per line and hour; the
+# upserts in app/services/production_service.py conflict on it.
+Index("uq_production_shift_line_hour_live", Production.shift_id,
+      Production.line_id, Production.hour, unique=True,
+      **_live_rows(Production))
+
+# Losses for a production
+Index("ix_loss_production_live", Loss.production_id, **_live_rows(Loss))
+
+# Planner shift list, newest first
+Index("ix_shift_plant_created_live", Shift.plant_id,
+      Shift.created_at, **_live_rows(Shift))
+
+# Team leader shift lookup by date
+Index("ix_shift_plant_date_live", Shift.plant_id,
+      Shift.date, **_live_rows(Shift))
+
+# Attendance roll call for a shift. Unique, so there is at most one live
+# attendance per member and shift; app/services/attendance_service.py
+# conflicts on it.
+Index("uq_attendance_shift_member_live", Attendance.shift_id,
+      Attendance.member_id, unique=True, **_live_rows(Attendance))
+
+# Rollup upsert keys and the analytics range scans
+Index("uq_shift_rollup_key", ShiftRollup.level, ShiftRollup.entity_id,
+      ShiftRollup.shift_id, unique=True)
+Index("ix_shift_rollup_level_day", ShiftRollup.level, ShiftRollup.day)
+Index("uq_day_rollup_key", DayRollup.level, DayRollup.entity_id,
+      DayRollup.day, unique=True)
+Index("ix_day_rollup_level_day", DayRollup.level, DayRollup.day)
+
+# Team leader roster: the cells of a line and the members of those cells
+Index("ix_cell_line_live", Cell.line_id, **_live_rows(Cell))
+Index("ix_member_cell_live", Member.cell_id, **_live_rows(Member))
+
+
+# Materialized hierarchy. Loop, Line and Cell carry the ids of all their
+# ancestors so any entity's plant/zone/loop is one indexed hop away. A row
+# copies its ancestors from its parent when inserted or re-parented, and a
+# move cascades to every descendant with one UPDATE per table.
+# Core/bulk writes bypass these listeners; run
+# app.database.rebuild_hierarchy() after them.
+
+# Model: (parent foreign key, parent model, ancestor columns). Each
+# ancestor column has the same name on the parent.
+_HIERARCHY_PARENTS = {
+    Loop: ("zone_id", Zone, ("plant_id",)),
+    Line: ("loop_id", Loop, ("zone_id", "plant_id")),
+    Cell: ("line_id", Line, ("loop_id", "zone_id", "plant_id")),
+}
+
+# Model: (parent foreign key, key on descendants, descendants, columns to copy)
+_HIERARCHY_DESCENDANTS = {
+    Zone: ("plant_id", "zone_id", (Loop, Line, Cell), ("plant_id",)),
+    Loop: ("zone_id", "loop_id", (Line, Cell), ("zone_id", "plant_id")),
+    Line: ("loop_id", "line_id", (Cell,), ("loop_id", "zone_id", "plant_id")),
+}
+
+
+def _parent_changed(target, parent_key):
+    return inspect(target).attrs[parent_key].history.has_changes()
+
+
+def _copy_ancestors(mapper, connection, target):
+    parent_key, parent, columns = _HIERARCHY_PARENTS[mapper.class_]
+    parent_id = getattr(target, parent_key)
+
+    row = None
+    if parent_id is not None:
+        row = connection.execute(
+            select(*[getattr(parent, column) for column in columns])
+            .where(parent.id == parent_id)
+        ).first()
+
+    for index, column in enumerate(columns):
+        setattr(target, column, row[index] if row else None)
+
+
+def _copy_ancestors_on_move(mapper, connection, target):
+    parent_key = _HIERARCHY_PARENTS[mapper.class_][0]
+    if _parent_changed(target, parent_key):
+        _copy_ancestors(mapper, connection, target)
+
+
+def _cascade_move(mapper, connection, target):
+    parent_key, key, descendants, columns = _HIERARCHY_DESCENDANTS[mapper.class_]
+    if not _parent_changed(target, parent_key):
+        return
+
+    values = {column: getattr(target, column) for column in columns}
+    for model in descendants:
+        connection.execute(
+            update(model.__table__)
+            .where(model.__table__.c[key] == target.id)
+            .values(**values)
+        )
+
+
+for _model in _HIERARCHY_PARENTS:
+    event.listen(_model, "before_insert", _copy_ancestors)
+    event.listen(_model, "before_update", _copy_ancestors_on_move)
+
+for _model in _HIERARCHY_DESCENDANTS:
+    event.listen(_model, "after_update", _cascade_move)
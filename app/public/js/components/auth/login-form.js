@@ -1,6 +1,6 @@
 import { LitElement, html } from 'https://esm.run/lit';
 import { postJson } from '../../utils/api_utils.js';
-import { saveToken, saveUser } from '../../utils/auth_utils.js';
+import { saveRefreshToken, saveToken, saveUser } from '../../utils/auth_utils.js';
 
 class LoginForm extends LitElement {
   static get properties() {
@@ -44,6 +44,7 @@ class LoginForm extends LitElement {
 
       // Save authentication data
       saveToken(response.access_token);
+      saveRefreshToken(response.refresh_token);
       saveUser(response.user);
 
       // Redirect to home page
@@ -7,6 +7,8 @@ class PlannerLineCard extends LitElement {
     return {
       line: { type: Object },
       shiftId: { type: Number },
+      // Hourly plan and achievement arrays for this shift, if loaded
+      schedule: { type: Object },
     };
   }
 
@@ -14,6 +16,25 @@ class PlannerLineCard extends LitElement {
     super();
     this.line = null;
     this.shiftId = null;
+    this.schedule = null;
+  }
+
+  renderSchedule() {
+    if (!this.schedule) return html``;
+
+    const { plan, achievement } = this.schedule;
+    const sum = (values) => values.reduce((total, value) => total + (value ?? 0), 0);
+    const plannedHours = plan.filter((value) => value !== null).length;
+
+    return html`
+      <div class="planner-line-card-detail">
+        <i class="fas fa-clock"></i>
+        <span>
+          ${plannedHours}/${plan.length} hours planned ·
+          ${sum(achievement)} / ${sum(plan)} achieved
+        </span>
+      </div>
+    `;
   }
 
   // Disable Shadow DOM to access global styles
@@ -56,6 +77,8 @@ class PlannerLineCard extends LitElement {
             <i class="fas fa-code-branch"></i>
             <span>${loopName}</span>
           </div>
+
+          ${this.renderSchedule()}
         </div>
 
         <div class="planner-line-card-action">
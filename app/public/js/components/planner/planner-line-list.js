@@ -9,6 +9,7 @@ class PlannerLineList extends LitElement {
     return {
       shiftId: { type: Number },
       lines: { type: Array },
+      schedules: { type: Object },
       isLoading: { type: Boolean },
       error: { type: String },
     };
@@ -18,6 +19,7 @@ class PlannerLineList extends LitElement {
     super();
     this.shiftId = null;
     this.lines = [];
+    this.schedules = {};
     this.isLoading = false;
     this.error = "";
   }
@@ -42,10 +44,18 @@ class PlannerLineList extends LitElement {
       this.isLoading = true;
       this.error = "";
 
-      const response = await fetchJson(
-        `/api/planner/shifts/${this.shiftId}/lines`
-      );
+      // The whole plant's plan and achievement come in one matrix request
+      const [response, matrix] = await Promise.all([
+        fetchJson(`/api/planner/shifts/${this.shiftId}/lines`),
+        fetchJson(`/api/planner/shifts/${this.shiftId}/matrix`),
+      ]);
       this.lines = response.items || [];
+      this.schedules = Object.fromEntries(
+        matrix.line_ids.map((lineId, index) => [
+          lineId,
+          { plan: matrix.plan[index], achievement: matrix.achievement[index] },
+        ])
+      );
     } catch (error) {
       console.error("Error fetching lines:", error);
       this.error = error.message || "Failed to load lines. Please try again.";
@@ -91,6 +101,7 @@ class PlannerLineList extends LitElement {
             <planner-line-card
               .line=${line}
               .shiftId=${this.shiftId}
+              .schedule=${this.schedules[line.id]}
             ></planner-line-card>
           `
         )}
@@ -2,6 +2,7 @@
 
 import { LitElement, html } from "https://esm.run/lit";
 import { fetchJson } from "../../utils/api_utils.js";
+import { signOut } from "../../utils/auth_utils.js";
 
 class TeamLeaderHeader extends LitElement {
   static get properties() {
@@ -43,10 +44,8 @@ class TeamLeaderHeader extends LitElement {
   }
 
   handleSignout() {
-    // Clear any auth tokens
-    localStorage.removeItem("auth_token");
-    // Redirect to login page
-    window.location.href = "/login";
+    // Revoke and clear the auth tokens, then go back to the login page
+    signOut();
   }
 
   render() {
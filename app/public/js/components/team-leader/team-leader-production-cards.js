@@ -1,7 +1,7 @@
 // app/public/js/components/team-leader/team-leader-production-cards.js
 
 import { LitElement, html } from "https://esm.run/lit";
-import { fetchJson } from "../../utils/api_utils.js";
+import { fetchJson, streamEvents } from "../../utils/api_utils.js";
 
 class TeamLeaderProductionCards extends LitElement {
   static get properties() {
@@ -36,7 +36,32 @@ class TeamLeaderProductionCards extends LitElement {
     return this;
   }
 
+  disconnectedCallback() {
+    super.disconnectedCallback();
+    this.events?.abort();
+  }
+
+  // Reload when the shown shift and hour change on the server, e.g. the
+  // planner updates the plan while this page is open
+  subscribeToLineEvents() {
+    this.events = new AbortController();
+    streamEvents(
+      "/api/events",
+      (type, event) => {
+        const shown =
+          String(event.shift_id) === String(this.shiftId) &&
+          (event.hours || [event.hour]).includes(this.hour);
+        if (type === "dropped" || (type === "production" && shown)) {
+          this.loadProductionData();
+        }
+      },
+      { signal: this.events.signal }
+    );
+  }
+
   async firstUpdated() {
+    this.subscribeToLineEvents();
+
     // Listen for hour selection events
     window.addEventListener("hour-selected", async (e) => {
       console.log("Hour selected event received:", e.detail);
@@ -97,49 +122,28 @@ class TeamLeaderProductionCards extends LitElement {
         flash: 0,
       };
 
-      // First, try to get existing production data
-      try {
-        const data = await fetchJson(
-          `/api/team-leader/production?shift_id=${this.shiftId}&hour=${this.hour}`
-        );
-
-        // If production data exists, use it and we know plan is available
-        if (data && data.id) {
-          console.log("Found existing production data:", data);
-          this.planFound = true;
-
-          this.productionData = {
-            plan: data.plan || 0,
-            achievement: data.achievement || 0,
-            scraps: data.scraps || 0,
-            defects: data.defects || 0,
-            flash: data.flash || 0,
-          };
-        } else {
-          throw new Error("No production data found");
-        }
-      } catch (error) {
-        // No existing data, check if plan exists
-        console.log("No existing production data, checking for plan");
-
-        try {
-          const planData = await fetchJson(
-            `/api/team-leader/production/plan?shift_id=${this.shiftId}&hour=${this.hour}`
-          );
-
-          if (planData && planData.plan) {
-            console.log("Found production plan:", planData);
-            this.planFound = true;
-            this.productionData.plan = planData.plan;
-          } else {
-            console.log("No production plan found - empty response");
-            this.planFound = false;
-          }
-        } catch (planError) {
-          // 404 status indicates no plan found
-          console.log("No production plan found - API returned 404");
-          this.planFound = false;
-        }
+      // Load the whole shift in one request; the browser revalidates it with
+      // If-None-Match, so an unchanged shift comes back as an empty 304
+      const snapshot = await fetchJson(
+        `/api/team-leader/production/snapshot?shift_id=${this.shiftId}`
+      );
+      const hourData = snapshot.hours.find((item) => item.hour === this.hour);
+
+      // Existing production data or a plan means this hour can be recorded
+      if (hourData && (hourData.production_id || hourData.plan)) {
+        console.log("Found production data for hour:", hourData);
+        this.planFound = true;
+
+        this.productionData = {
+          plan: hourData.plan || 0,
+          achievement: hourData.achievement || 0,
+          scraps: hourData.scraps || 0,
+          defects: hourData.defects || 0,
+          flash: hourData.flash || 0,
+        };
+      } else {
+        console.log("No production plan found for this hour");
+        this.planFound = false;
       }
     } catch (error) {
       console.error("Error loading production data:", error);
@@ -2,22 +2,32 @@
 
 // api_utils.js - Handles API requests with authentication
 
-import { getAuthHeaders } from "./auth_utils.js";
+import { getAuthHeaders, refreshTokens, signOut } from "./auth_utils.js";
 
-// Fetch JSON data from API with authentication
+// Fetch JSON data from API with authentication. An expired access token
+// is renewed once with the refresh token; if that fails the user is
+// signed out.
 export async function fetchJson(url, options = {}) {
-  const headers = {
-    "Content-Type": "application/json",
-    ...getAuthHeaders(),
-    ...options.headers,
-  };
-
-  try {
-    const response = await fetch(url, {
+  const send = () =>
+    fetch(url, {
       ...options,
-      headers,
+      headers: {
+        "Content-Type": "application/json",
+        ...getAuthHeaders(),
+        ...options.headers,
+      },
     });
 
+  try {
+    let response = await send();
+    if (response.status === 401 && !url.startsWith("/api/auth/")) {
+      if (!(await refreshTokens())) {
+        signOut();
+        throw new Error("Session expired, please sign in again");
+      }
+      response = await send();
+    }
+
     if (!response.ok) {
       // Try to get error details from response
       const error = await response.json().catch(() => ({
@@ -58,3 +68,60 @@ export async function deleteJson(url, options = {}) {
     ...options,
   });
 }
+
+// Stream Server-Sent Events from the API with authentication, calling
+// onEvent(type, data) per event and reconnecting until the signal aborts
+export async function streamEvents(url, onEvent, { signal } = {}) {
+  let retryMs = 3000;
+
+  while (!signal?.aborted) {
+    try {
+      const response = await fetch(url, {
+        headers: { Accept: "text/event-stream", ...getAuthHeaders() },
+        signal,
+      });
+      if (response.status === 401) {
+        // Expired or revoked; renew before reconnecting
+        if (!(await refreshTokens())) {
+          signOut();
+          return;
+        }
+        continue;
+      }
+      if (!response.ok) {
+        throw new Error(`HTTP error ${response.status}`);
+      }
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Events are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf("\n\n")) !== -1) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+
+          let type = "message";
+          let data = "";
+          for (const line of block.split("\n")) {
+            if (line.startsWith("event: ")) type = line.slice(7);
+            else if (line.startsWith("data: ")) data += line.slice(6);
+            else if (line.startsWith("retry: ")) retryMs = Number(line.slice(7));
+          }
+          if (data) onEvent(type, JSON.parse(data));
+        }
+      }
+    } catch (error) {
+      if (signal?.aborted) return;
+      console.error("Event stream error:", error);
+    }
+
+    await new Promise((resolve) => setTimeout(resolve, retryMs));
+  }
+}
@@ -17,6 +17,62 @@ export function removeToken() {
   localStorage.removeItem("auth_token");
 }
 
+// Store refresh token in localStorage
+export function saveRefreshToken(token) {
+  localStorage.setItem("refresh_token", token);
+}
+
+// Retrieve refresh token from localStorage
+export function getRefreshToken() {
+  return localStorage.getItem("refresh_token");
+}
+
+// Remove refresh token from localStorage
+export function removeRefreshToken() {
+  localStorage.removeItem("refresh_token");
+}
+
+// Exchange the refresh token for new tokens; resolves to false when the
+// session can't be renewed. Each refresh token works only once and every
+// tab shares it through localStorage, so concurrent callers in a tab share
+// one request and tabs take turns under a Web Lock. A tab that gets the
+// lock after another one rotated the token just uses the new tokens.
+let refreshing = null;
+export function refreshTokens() {
+  if (!refreshing) {
+    const staleRefreshToken = getRefreshToken();
+    const rotate = async () => {
+      const refreshToken = getRefreshToken();
+      if (!refreshToken) return false;
+      if (refreshToken !== staleRefreshToken) return true;
+
+      try {
+        const response = await fetch("/api/auth/refresh", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ refresh_token: refreshToken }),
+        });
+        if (!response.ok) return false;
+
+        const tokens = await response.json();
+        saveToken(tokens.access_token);
+        saveRefreshToken(tokens.refresh_token);
+        return true;
+      } catch (error) {
+        console.error("Token refresh error:", error);
+        return false;
+      }
+    };
+
+    refreshing = (
+      navigator.locks ? navigator.locks.request("auth-refresh", rotate) : rotate()
+    ).finally(() => {
+      refreshing = null;
+    });
+  }
+  return refreshing;
+}
+
 // Store user data in localStorage
 export function saveUser(user) {
   localStorage.setItem("user", JSON.stringify(user));
@@ -46,9 +102,20 @@ export function isSignedIn() {
   return !!getToken() && !!getUser();
 }
 
-// Sign out user by removing token and user data
+// Sign out user by revoking the tokens and removing them and user data
 export function signOut() {
+  const refreshToken = getRefreshToken();
+  if (getToken()) {
+    // Best effort; the tokens are forgotten locally either way
+    fetch("/api/auth/logout", {
+      method: "POST",
+      headers: { "Content-Type": "application/json", ...getAuthHeaders() },
+      body: JSON.stringify({ refresh_token: refreshToken }),
+      keepalive: true,
+    }).catch(() => {});
+  }
   removeToken();
+  removeRefreshToken();
   removeUser();
   // Redirect to index page which will handle redirection
   window.location.href = "/";
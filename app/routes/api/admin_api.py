@@ -1,15 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
-from sqlalchemy import and_, distinct
+from fastapi import APIRouter, Depends, File, HTTPException, Query, status, Request, UploadFile
+from sqlalchemy import and_, distinct, insert
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.sql import func
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from app.database import get_db
+from app.services.auth_service import get_password_hash, hash_passwords
+from app.services.dashboard_service import cached_dashboard_stats, invalidate_dashboard_stats
+from app.services.hash_pool import HashPoolBusy, hash_pool
+from app.services.import_service import ImportFileError, import_master_data, read_import_rows
+from app.services.pagination import COUNT_MODE_PATTERN, count_rows, keyset_page
+from app.services.principal_cache import principal_cache
+from app.services.role_context import invalidate_role_context
+from app.services.token_revocation import revocations
 from app.models import Attendance, AttendanceType, Loss, LossReason, Plant, Zone, Loop, Line, Cell, User, Planner, TeamLeader, Member, UserRole
 
 router = APIRouter(prefix="/api/admin")
 
+# Configuration
+BULK_MEMBERS_MAX = 5000
+# Rows per multi-row INSERT, keeping under SQLite's bound parameter limit
+BULK_INSERT_ROWS = 1000
+
 # Pydantic models for request/response validation
 
 
@@ -160,6 +173,14 @@ class MemberCreate(BaseModel):
     cell_id: int
 
 
+class BulkMembersCreate(BaseModel):
+    members: List[MemberCreate] = Field(..., min_length=1, max_length=BULK_MEMBERS_MAX)
+
+
+class BulkMembersResponse(BaseModel):
+    created: int
+
+
 class LossReasonBase(BaseModel):
     id: int
     title: str
@@ -179,7 +200,8 @@ class LossReasonResponse(LossReasonBase):
 
 class LossReasonsResponse(BaseModel):
     items: List[LossReasonResponse]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class AttendanceTypeBase(BaseModel):
@@ -208,6 +230,17 @@ class AttendanceTypesResponse(BaseModel):
     total: int
 
 
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    created: Dict[str, int]
+    errors: List[ImportRowError]
+    dry_run: bool
+
+
 class DashboardStats(BaseModel):
     plants: int
     zones: int
@@ -237,52 +270,52 @@ def admin_required(request: Request):
 
     return user
 
+
+def _hash_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Password hashing is busy, please retry",
+        headers={"Retry-After": "1"}
+    )
+
+
+def _hash_password(password: str) -> str:
+    """bcrypt in the hash pool, turning a full queue into a 503."""
+    try:
+        return hash_pool.call(get_password_hash, password)
+    except HashPoolBusy:
+        raise _hash_pool_busy()
+
+
+def _hash_passwords(passwords: List[str]) -> List[str]:
+    """Bulk-cost bcrypt in the hash pool, turning a full queue into a 503."""
+    try:
+        return hash_passwords(passwords)
+    except HashPoolBusy:
+        raise _hash_pool_busy()
+
 # Dashboard stats endpoint
 
 
 @router.get("/dashboard/stats", response_model=DashboardStats)
-async def get_dashboard_stats(
+def get_dashboard_stats(
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
 ):
     """Get statistical counts for admin dashboard"""
+    return cached_dashboard_stats(db)
 
-    # Get counts for different entities
-    plants_count = db.query(func.count(Plant.id)).filter(
-        Plant.is_deleted == False).scalar() or 0
-    zones_count = db.query(func.count(Zone.id)).filter(
-        Zone.is_deleted == False).scalar() or 0
-    loops_count = db.query(func.count(Loop.id)).filter(
-        Loop.is_deleted == False).scalar() or 0
-    lines_count = db.query(func.count(Line.id)).filter(
-        Line.is_deleted == False).scalar() or 0
-    cells_count = db.query(func.count(Cell.id)).filter(
-        Cell.is_deleted == False).scalar() or 0
-
-    # Get counts for different users
-    planners_count = db.query(func.count(Planner.user_id)).join(
-        User).filter(User.is_deleted == False).scalar() or 0
-    team_leaders_count = db.query(func.count(TeamLeader.user_id)).join(
-        User).filter(User.is_deleted == False).scalar() or 0
-    members_count = db.query(func.count(Member.user_id)).join(
-        User).filter(User.is_deleted == False).scalar() or 0
 
-    return {
-        "plants": plants_count,
-        "zones": zones_count,
-        "loops": loops_count,
-        "lines": lines_count,
-        "cells": cells_count,
-        "planners": planners_count,
-        "teamLeaders": team_leaders_count,
-        "members": members_count
-    }
+@router.get("/metrics/hash-pool")
+def get_hash_pool_metrics(user: User = Depends(admin_required)):
+    """Queue depth, rejections and latency of the password hashing pool"""
+    return hash_pool.metrics()
 
 # Plant endpoints
 
 
 @router.get("/plants", response_model=List[PlantResponse])
-async def get_plants(
+def get_plants(
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
 ):
@@ -294,7 +327,7 @@ async def get_plants(
 
 
 @router.post("/plants", response_model=PlantResponse, status_code=status.HTTP_201_CREATED)
-async def create_plant(
+def create_plant(
     plant_data: PlantCreate,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -317,13 +350,14 @@ async def create_plant(
     new_plant = Plant(name=plant_data.name)
     db.add(new_plant)
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(new_plant)
 
     return new_plant
 
 
 @router.get("/plants/{plant_id}", response_model=PlantResponse)
-async def get_plant(
+def get_plant(
     plant_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -345,7 +379,7 @@ async def get_plant(
 
 
 @router.get("/plants/{plant_id}/zones", response_model=List[ZoneResponse])
-async def get_plant_zones(
+def get_plant_zones(
     plant_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -374,7 +408,7 @@ async def get_plant_zones(
 
 
 @router.get("/plants/{plant_id}/planners", response_model=List[PlannerResponse])
-async def get_plant_planners(
+def get_plant_planners(
     plant_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -406,7 +440,7 @@ async def get_plant_planners(
 
 
 @router.get("/zones/{zone_id}", response_model=ZoneResponse)
-async def get_zone(
+def get_zone(
     zone_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -428,7 +462,7 @@ async def get_zone(
 
 
 @router.get("/zones/{zone_id}/loops", response_model=List[LoopResponse])
-async def get_zone_loops(
+def get_zone_loops(
     zone_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -457,7 +491,7 @@ async def get_zone_loops(
 
 
 @router.post("/zones", response_model=ZoneResponse, status_code=status.HTTP_201_CREATED)
-async def create_zone(
+def create_zone(
     zone_data: ZoneCreate,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -496,13 +530,14 @@ async def create_zone(
     )
     db.add(new_zone)
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(new_zone)
 
     return new_zone
 
 
 @router.post("/loops", response_model=LoopResponse, status_code=status.HTTP_201_CREATED)
-async def create_loop(
+def create_loop(
     loop_data: LoopCreate,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -541,13 +576,14 @@ async def create_loop(
     )
     db.add(new_loop)
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(new_loop)
 
     return new_loop
 
 
 @router.get("/loops/{loop_id}", response_model=LoopResponse)
-async def get_loop(
+def get_loop(
     loop_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -569,7 +605,7 @@ async def get_loop(
 
 
 @router.get("/loops/{loop_id}/lines", response_model=List[LineResponse])
-async def get_loop_lines(
+def get_loop_lines(
     loop_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -623,7 +659,7 @@ async def get_loop_lines(
 
 
 @router.post("/lines", response_model=LineResponse, status_code=status.HTTP_201_CREATED)
-async def create_line(
+def create_line(
     line_data: LineCreate,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -662,13 +698,14 @@ async def create_line(
     )
     db.add(new_line)
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(new_line)
 
     return new_line
 
 
 @router.get("/lines/{line_id}", response_model=LineResponse)
-async def get_line(
+def get_line(
     line_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -690,7 +727,7 @@ async def get_line(
 
 
 @router.get("/lines/{line_id}/cells", response_model=List[CellResponse])
-async def get_line_cells(
+def get_line_cells(
     line_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -739,7 +776,7 @@ async def get_line_cells(
 
 
 @router.get("/lines/{line_id}/team-leaders", response_model=List[TeamLeaderResponse])
-async def get_line_team_leaders(
+def get_line_team_leaders(
     line_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -770,7 +807,7 @@ async def get_line_team_leaders(
 
 
 @router.post("/cells", response_model=CellResponse, status_code=status.HTTP_201_CREATED)
-async def create_cell(
+def create_cell(
     cell_data: CellCreate,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -809,13 +846,14 @@ async def create_cell(
     )
     db.add(new_cell)
     db.commit()
+    invalidate_dashboard_stats()
     db.refresh(new_cell)
 
     return new_cell
 
 
 @router.post("/members", response_model=MemberResponse, status_code=status.HTTP_201_CREATED)
-async def create_member(
+def create_member(
     member_data: MemberCreate,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -847,9 +885,7 @@ async def create_member(
         )
 
     # Create new user with role MEMBER and password same as SAP ID
-    from app.services.auth_service import get_password_hash
-
-    hashed_password = get_password_hash(member_data.sap_id)
+    hashed_password = _hash_password(member_data.sap_id)
 
     # Create transaction to ensure both user and member are created
     try:
@@ -870,6 +906,10 @@ async def create_member(
         )
         db.add(new_member)
         db.commit()
+
+        # Drop any cached lookup for this SAP ID
+        principal_cache.invalidate(new_user.sap_id)
+        invalidate_dashboard_stats()
         db.refresh(new_member)
 
         # Load the user relationship for response
@@ -884,8 +924,84 @@ async def create_member(
         )
 
 
+@router.post("/members/bulk", response_model=BulkMembersResponse, status_code=status.HTTP_201_CREATED)
+def create_members_bulk(
+    data: BulkMembersCreate,
+    user: User = Depends(admin_required),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many members in one transaction, or none if any is invalid.
+    Passwords are the SAP ID, hashed in the shared hash pool at the bulk
+    cost and upgraded to the full cost at each member's first login.
+    """
+    members = data.members
+    sap_ids = [member.sap_id for member in members]
+
+    # Validate everything up front with one query per lookup
+    live_cells = {cell_id for cell_id, in db.query(Cell.id).filter(
+        Cell.id.in_({member.cell_id for member in members}),
+        Cell.is_deleted == False
+    )}
+    taken = {sap_id for sap_id, in db.query(User.sap_id).filter(
+        User.sap_id.in_(set(sap_ids))
+    )}
+
+    errors = []
+    seen = set()
+    for index, member in enumerate(members):
+        if member.cell_id not in live_cells:
+            error = "Cell not found"
+        elif member.sap_id in taken:
+            error = "A user with this SAP ID already exists"
+        elif member.sap_id in seen:
+            error = "SAP ID appears more than once in this request"
+        else:
+            error = None
+        seen.add(member.sap_id)
+        if error:
+            errors.append({"index": index, "sap_id": member.sap_id, "error": error})
+
+    if errors:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=errors
+        )
+
+    hashed_passwords = _hash_passwords(sap_ids)
+
+    rows = list(zip(members, hashed_passwords))
+    try:
+        for start in range(0, len(rows), BULK_INSERT_ROWS):
+            batch = rows[start:start + BULK_INSERT_ROWS]
+            db.execute(insert(User).values([{
+                "sap_id": member.sap_id,
+                "name": member.name,
+                "role": UserRole.MEMBER,
+                "password": hashed_password
+            } for member, hashed_password in batch]))
+            db.execute(insert(Member).values([{
+                "user_id": member.sap_id,
+                "cell_id": member.cell_id
+            } for member, _ in batch]))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create members: {str(e)}"
+        )
+
+    # Drop any cached lookups for these SAP IDs
+    for sap_id in sap_ids:
+        principal_cache.invalidate(sap_id)
+    invalidate_dashboard_stats()
+
+    return {"created": len(members)}
+
+
 @router.get("/cells/{cell_id}", response_model=CellResponse)
-async def get_cell(
+def get_cell(
     cell_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -907,7 +1023,7 @@ async def get_cell(
 
 
 @router.get("/cells/{cell_id}/members", response_model=List[MemberResponse])
-async def get_cell_members(
+def get_cell_members(
     cell_id: int,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -938,7 +1054,7 @@ async def get_cell_members(
 
 
 @router.post("/planners", response_model=PlannerResponse, status_code=status.HTTP_201_CREATED)
-async def create_planner(
+def create_planner(
     planner_data: PlannerCreate,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -970,9 +1086,7 @@ async def create_planner(
         )
 
     # Create new user with role PLANNER and password same as SAP ID
-    from app.services.auth_service import get_password_hash
-
-    hashed_password = get_password_hash(planner_data.sap_id)
+    hashed_password = _hash_password(planner_data.sap_id)
 
     # Create transaction to ensure both user and planner are created
     try:
@@ -993,6 +1107,11 @@ async def create_planner(
         )
         db.add(new_planner)
         db.commit()
+
+        # Drop any cached lookup for this SAP ID
+        principal_cache.invalidate(new_user.sap_id)
+        invalidate_dashboard_stats()
+        invalidate_role_context(new_user.sap_id)
         db.refresh(new_planner)
 
         # Load the user relationship for response
@@ -1008,7 +1127,7 @@ async def create_planner(
 
 
 @router.post("/team-leaders", response_model=TeamLeaderResponse, status_code=status.HTTP_201_CREATED)
-async def create_team_leader(
+def create_team_leader(
     team_leader_data: TeamLeaderCreate,
     user: User = Depends(admin_required),
     db: Session = Depends(get_db)
@@ -1040,9 +1159,7 @@ async def create_team_leader(
         )
 
     # Create new user with role TEAM_LEADER and password same as SAP ID
-    from app.services.auth_service import get_password_hash
-
-    hashed_password = get_password_hash(team_leader_data.sap_id)
+    hashed_password = _hash_password(team_leader_data.sap_id)
 
     # Create transaction to ensure both user and team leader are created
     try:
@@ -1063,6 +1180,11 @@ async def create_team_leader(
         )
         db.add(new_team_leader)
         db.commit()
+
+        # Drop any cached lookup for this SAP ID
+        principal_cache.invalidate(new_user.sap_id)
+        invalidate_dashboard_stats()
+        invalidate_role_context(new_user.sap_id)
         db.refresh(new_team_leader)
 
         # Load the user relationship for response
@@ -1077,14 +1199,107 @@ async def create_team_leader(
         )
 
 
+@router.delete("/users/{sap_id}", status_code=status.HTTP_200_OK)
+def delete_user(
+    sap_id: str,
+    user: User = Depends(admin_required),
+    db: Session = Depends(get_db)
+):
+    """Soft-delete a user with their planner/team leader/member record and revoke their tokens"""
+    if sap_id == user.sap_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="You can't delete your own account"
+        )
+
+    target = db.query(User).filter(
+        User.sap_id == sap_id,
+        User.is_deleted == False
+    ).first()
+
+    if not target:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="User not found"
+        )
+
+    try:
+        deleted_at = datetime.now()
+        target.is_deleted = True
+        target.deleted_at = deleted_at
+        for model in (Planner, TeamLeader, Member):
+            db.query(model).filter(
+                model.user_id == sap_id,
+                model.is_deleted == False
+            ).update({
+                model.is_deleted: True,
+                model.deleted_at: deleted_at
+            }, synchronize_session=False)
+
+        # Tokens are authorized from their claims, so they stay usable
+        # until revoked
+        revocations.revoke_user(db, sap_id)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to delete user: {str(e)}"
+        )
+
+    principal_cache.invalidate(sap_id)
+    invalidate_role_context(sap_id)
+    invalidate_dashboard_stats()
+
+    return {"success": True, "message": "User deleted successfully"}
+
+
+# Bulk import endpoint
+
+
+@router.post("/import", response_model=ImportResult)
+def import_master_data_file(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    user: User = Depends(admin_required),
+    db: Session = Depends(get_db)
+):
+    """
+    Import plants, zones, loops, lines, cells and users from a CSV or XLSX
+    file with the columns plant, zone, loop, line, cell, sap_id, name and
+    role. Invalid rows are skipped and reported; dry_run only validates.
+    """
+    try:
+        rows = read_import_rows(file.filename or "", file.file)
+        return import_master_data(db, rows, dry_run=dry_run)
+    except ImportFileError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except HashPoolBusy:
+        raise _hash_pool_busy()
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to import master data: {str(e)}"
+        )
+
+
 @router.get("/loss-reasons", response_model=LossReasonsResponse)
-async def list_loss_reasons(
+def list_loss_reasons(
     request: Request,
     page: int = Query(1, gt=0),
     limit: int = Query(20, gt=0, le=100),
+    cursor: Optional[str] = None,
+    count: Optional[str] = Query(None, pattern=COUNT_MODE_PATTERN),
     db: Session = Depends(get_db)
 ):
-    """List all loss reasons with pagination"""
+    """
+    List all loss reasons by ID. Pass the returned next_cursor to get the
+    following page; page numbers still work. The total is exact by default
+    and omitted when paging by cursor unless a count mode is given.
+    """
     user = request.state.user
 
     # Check if user is admin
@@ -1097,22 +1312,27 @@ async def list_loss_reasons(
     # Query loss reasons
     query = db.query(LossReason).filter(
         LossReason.is_deleted == False
-    ).order_by(LossReason.id)
+    )
 
-    # Count total items
-    total = query.count()
+    total = count_rows(query, count or ("none" if cursor else "exact"), ("loss_reasons",))
 
-    # Apply pagination
-    items = query.offset((page - 1) * limit).limit(limit).all()
+    items, next_cursor = keyset_page(
+        query,
+        [LossReason.id],
+        limit,
+        cursor=cursor,
+        offset=0 if cursor else (page - 1) * limit
+    )
 
     return {
         "items": items,
-        "total": total
+        "total": total,
+        "next_cursor": next_cursor
     }
 
 
 @router.get("/loss-reasons/{loss_reason_id}", response_model=LossReasonResponse)
-async def get_loss_reason(
+def get_loss_reason(
     loss_reason_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -1143,7 +1363,7 @@ async def get_loss_reason(
 
 
 @router.post("/loss-reasons", response_model=LossReasonResponse, status_code=status.HTTP_201_CREATED)
-async def create_loss_reason(
+def create_loss_reason(
     loss_reason_data: LossReasonCreate,
     request: Request,
     db: Session = Depends(get_db)
@@ -1187,7 +1407,7 @@ async def create_loss_reason(
 
 
 @router.put("/loss-reasons/{loss_reason_id}", response_model=LossReasonResponse)
-async def update_loss_reason(
+def update_loss_reason(
     loss_reason_id: int,
     loss_reason_data: LossReasonBase,
     request: Request,
@@ -1254,7 +1474,7 @@ async def update_loss_reason(
 
 # Changed from 204 to 200
 @router.delete("/loss-reasons/{loss_reason_id}", status_code=status.HTTP_200_OK)
-async def delete_loss_reason(
+def delete_loss_reason(
     loss_reason_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -1307,7 +1527,7 @@ async def delete_loss_reason(
 
 
 @router.get("/attendance-types", response_model=AttendanceTypesResponse)
-async def list_attendance_types(
+def list_attendance_types(
     request: Request,
     page: int = Query(1, gt=0),
     limit: int = Query(20, gt=0, le=100),
@@ -1341,7 +1561,7 @@ async def list_attendance_types(
 
 
 @router.get("/attendance-types/{attendance_type_id}", response_model=AttendanceTypeResponse)
-async def get_attendance_type(
+def get_attendance_type(
     attendance_type_id: int,
     request: Request,
     db: Session = Depends(get_db)
@@ -1372,7 +1592,7 @@ async def get_attendance_type(
 
 
 @router.post("/attendance-types", response_model=AttendanceTypeResponse, status_code=status.HTTP_201_CREATED)
-async def create_attendance_type(
+def create_attendance_type(
     attendance_type_data: AttendanceTypeCreate,
     request: Request,
     db: Session = Depends(get_db)
@@ -1404,7 +1624,7 @@ async def create_attendance_type(
 
 
 @router.put("/attendance-types/{attendance_type_id}", response_model=AttendanceTypeResponse)
-async def update_attendance_type(
+def update_attendance_type(
     attendance_type_id: int,
     attendance_type_data: AttendanceTypeUpdate,
     request: Request,
@@ -1452,7 +1672,7 @@ async def update_attendance_type(
 
 
 @router.delete("/attendance-types/{attendance_type_id}", status_code=status.HTTP_200_OK)
-async def delete_attendance_type(
+def delete_attendance_type(
     attendance_type_id: int,
     request: Request,
     db: Session = Depends(get_db)
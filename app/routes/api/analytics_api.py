@@ -0,0 +1,145 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from typing import Any, List, Optional
+from datetime import date
+from app.database import get_db
+from app.models import User
+from app.routes.api.admin_api import admin_required
+from app.services.analytics_service import (
+    BUCKETS,
+    LEVELS,
+    LOSS_GROUPS,
+    loss_pareto,
+    production_summary
+)
+
+router = APIRouter(prefix="/api/admin/analytics", tags=["analytics"])
+
+# Longest range a single request may aggregate
+MAX_RANGE_DAYS = 366
+
+# Pydantic models
+
+
+class ProductionSummaryRow(BaseModel):
+    level_id: Optional[int] = None
+    level_name: Optional[str] = None
+    bucket: Any
+    plan: int
+    achievement: int
+    scraps: int
+    defects: int
+    flash: int
+    loss: int
+    achievement_pct: Optional[float] = None
+    scrap_rate: Optional[float] = None
+    defect_rate: Optional[float] = None
+    flash_rate: Optional[float] = None
+
+
+class ProductionSummaryResponse(BaseModel):
+    level: str
+    bucket: str
+    start: date
+    end: date
+    items: List[ProductionSummaryRow]
+
+
+class LossParetoRow(BaseModel):
+    loss_reason_id: Optional[int] = None
+    title: Optional[str] = None
+    department: Optional[str] = None
+    amount: int
+    share: Optional[float] = None
+    cumulative_share: Optional[float] = None
+
+
+class LossParetoResponse(BaseModel):
+    group: str
+    start: date
+    end: date
+    items: List[LossParetoRow]
+
+
+def _check_range(start: date, end: date):
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start"
+        )
+
+    if (end - start).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days"
+        )
+
+
+def _check_choice(name: str, value: str, choices):
+    if value not in choices:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid {name}. Use one of: {', '.join(choices)}"
+        )
+
+
+@router.get("/production", response_model=ProductionSummaryResponse)
+def get_production_summary(
+    start: date,
+    end: date,
+    level: str = Query("line", description="plant, zone, loop or line"),
+    bucket: str = Query("day", description="hour, shift, day or week"),
+    plant_id: Optional[int] = None,
+    zone_id: Optional[int] = None,
+    loop_id: Optional[int] = None,
+    line_id: Optional[int] = None,
+    user: User = Depends(admin_required),
+    db: Session = Depends(get_db)
+):
+    """Achievement and scrap/defect/flash rates per hierarchy level and time bucket"""
+    _check_choice("level", level, LEVELS)
+    _check_choice("bucket", bucket, BUCKETS)
+    _check_range(start, end)
+
+    items = production_summary(
+        db, level, bucket, start, end,
+        plant_id=plant_id, zone_id=zone_id, loop_id=loop_id, line_id=line_id
+    )
+
+    return {
+        "level": level,
+        "bucket": bucket,
+        "start": start,
+        "end": end,
+        "items": items
+    }
+
+
+@router.get("/losses", response_model=LossParetoResponse)
+def get_loss_pareto(
+    start: date,
+    end: date,
+    group: str = Query("reason", description="reason or department"),
+    plant_id: Optional[int] = None,
+    zone_id: Optional[int] = None,
+    loop_id: Optional[int] = None,
+    line_id: Optional[int] = None,
+    user: User = Depends(admin_required),
+    db: Session = Depends(get_db)
+):
+    """Loss Pareto by loss reason or department"""
+    _check_choice("group", group, LOSS_GROUPS)
+    _check_range(start, end)
+
+    items = loss_pareto(
+        db, group, start, end,
+        plant_id=plant_id, zone_id=zone_id, loop_id=loop_id, line_id=line_id
+    )
+
+    return {
+        "group": group,
+        "start": start,
+        "end": end,
+        "items": items
+    }
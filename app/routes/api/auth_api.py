@@ -1,10 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+import time
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
 from app.database import get_db
 from app.models import User
-from app.services.auth_service import verify_password, create_access_token
+from app.services.auth_service import (
+    ACCESS_TOKEN_EXPIRE_SECONDS, REFRESH_TOKEN_EXPIRE_SECONDS, REFRESH_TOKEN_REUSE_GRACE_SECONDS,
+    REFRESH_TOKEN_TYPE,
+    create_access_token, create_refresh_token, decode_token, verify_and_update_password
+)
+from app.services.hash_pool import HashPoolBusy, hash_pool
+from app.services.token_revocation import revocations
 
 router = APIRouter(prefix="/api/auth")
 
@@ -18,7 +27,17 @@ class LoginData(BaseModel):
 
 class TokenData(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str
+    expires_in: int
+
+
+class RefreshData(BaseModel):
+    refresh_token: str
+
+
+class LogoutData(BaseModel):
+    refresh_token: Optional[str] = None
 
 
 class UserResponse(BaseModel):
@@ -32,34 +51,71 @@ class UserResponse(BaseModel):
 
 class LoginResponse(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str
+    expires_in: int
     user: UserResponse
 
 
+def _issue_tokens(sap_id: str, role: str, family: Optional[str] = None) -> dict:
+    """A new access token and refresh token for a user."""
+    return {
+        "access_token": create_access_token({"sub": sap_id, "role": role}),
+        "refresh_token": create_refresh_token(sap_id, family),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_EXPIRE_SECONDS
+    }
+
+
 @router.post("/login", response_model=LoginResponse)
-def login(login_data: LoginData, db: Session = Depends(get_db)):
-    """Authenticate user and return access token"""
+async def login(login_data: LoginData, db: Session = Depends(get_db)):
+    """
+    Authenticate user and return access token. bcrypt runs in the hash
+    pool, so queued logins hold neither the event loop nor a request thread.
+    """
+
+    def find_user():
+        try:
+            return db.query(
+                User.sap_id, User.name, User.role, User.password
+            ).filter(
+                User.sap_id == login_data.sap_id,
+                User.is_deleted == False
+            ).first()
+        finally:
+            # Give the connection back before waiting for bcrypt, so a login
+            # storm doesn't drain the connection pool
+            db.close()
 
     # Find user by SAP ID
-    user = db.query(User).filter(
-        User.sap_id == login_data.sap_id,
-        User.is_deleted == False
-    ).first()
+    user = await run_in_threadpool(find_user)
 
     # Validate user and password
-    if not user or not verify_password(login_data.password, user.password):
+    try:
+        valid, new_hash = (False, None) if user is None else await hash_pool.run(
+            verify_and_update_password, login_data.password, user.password)
+    except HashPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many logins at once, please retry",
+            headers={"Retry-After": "1"}
+        )
+
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid credentials"
         )
 
-    # Create access token
-    token_data = {
-        "sub": user.sap_id,
-        "role": user.role.value
-    }
+    # Passwords hashed at a lower cost, e.g. by a bulk import, are brought
+    # up to the current cost now that the plain password is known
+    if new_hash:
+        def store_hash():
+            db.query(User).filter(User.sap_id == user.sap_id).update(
+                {User.password: new_hash}, synchronize_session=False)
+            db.commit()
 
-    access_token = create_access_token(token_data)
+        await run_in_threadpool(store_hash)
 
     # Prepare user response object
     user_response = UserResponse(
@@ -68,14 +124,92 @@ def login(login_data: LoginData, db: Session = Depends(get_db)):
         role=user.role.value
     )
 
-    # Return token and user data
+    # Return tokens and user data
     return {
-        "access_token": access_token,
-        "token_type": "bearer",
+        **_issue_tokens(user.sap_id, user.role.value),
         "user": user_response
     }
 
 
+@router.post("/refresh", response_model=TokenData)
+def refresh_tokens(refresh_data: RefreshData, db: Session = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    Each refresh token works once; presenting a used one again revokes
+    every token of that login, since it has probably been stolen. The
+    exception is the family's latest rotated token, which may be used once
+    more within a short grace period: a second tab renewing the same
+    session at once, or a retry after a lost response, still succeeds.
+    """
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token"
+    )
+
+    claims = decode_token(refresh_data.refresh_token, REFRESH_TOKEN_TYPE)
+    if claims is None or revocations.is_login_revoked(claims):
+        raise invalid
+
+    # The user is looked up here, once per access token lifetime, rather
+    # than on every request
+    user = db.query(User.sap_id, User.role).filter(
+        User.sap_id == claims["sub"],
+        User.is_deleted == False
+    ).first()
+    if not user:
+        raise invalid
+
+    # Retire the presented token; the unique jti turns a concurrent second
+    # use into a conflict
+    if not revocations.has_token_id(claims["jti"]):
+        try:
+            revocations.revoke_token(db, claims["jti"], claims["exp"], family=claims["fam"])
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+        else:
+            return _issue_tokens(user.sap_id, user.role.value, claims["fam"])
+
+    # Already used: another tab renewing at the same moment, or a replay.
+    # The reuse is recorded under its own jti, so only the first one passes
+    if revocations.is_latest_rotation(db, claims, REFRESH_TOKEN_REUSE_GRACE_SECONDS):
+        try:
+            revocations.revoke_token(db, f"{claims['jti']}:reused", claims["exp"])
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+        else:
+            return _issue_tokens(user.sap_id, user.role.value, claims["fam"])
+
+    try:
+        revocations.revoke_token(db, claims["fam"], time.time() + REFRESH_TOKEN_EXPIRE_SECONDS)
+        db.commit()
+    except IntegrityError:
+        # Already revoked by another process
+        db.rollback()
+    raise invalid
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(request: Request, logout_data: Optional[LogoutData] = None, db: Session = Depends(get_db)):
+    """Revoke the calling access token and, if given, its refresh token's login"""
+    access_claims = request.state.token_claims
+    refresh_claims = decode_token(logout_data.refresh_token, REFRESH_TOKEN_TYPE) \
+        if logout_data and logout_data.refresh_token else None
+
+    try:
+        if access_claims:
+            revocations.revoke_token(db, access_claims["jti"], access_claims["exp"])
+        if refresh_claims and not revocations.has_token_id(refresh_claims["fam"]):
+            revocations.revoke_token(db, refresh_claims["fam"], time.time() + REFRESH_TOKEN_EXPIRE_SECONDS)
+        db.commit()
+    except IntegrityError:
+        # Already revoked
+        db.rollback()
+
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.get("/me", response_model=UserResponse)
 def get_current_user(request: Request):
     """Get current authenticated user profile"""
@@ -0,0 +1,130 @@
+import json
+import time
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, List, Optional
+from app.database import SessionLocal
+from app.models import Line, UserRole
+from app.services.event_bus import event_bus, line_topic, plant_topic
+from app.services.role_context import get_planner_context, get_team_leader_context
+from app.services.token_revocation import revocations
+
+router = APIRouter(prefix="/api/events", tags=["events"])
+
+# Seconds between keep-alive comments on an idle stream
+KEEPALIVE_SECONDS = 15
+
+# Milliseconds the browser waits before reconnecting
+RETRY_MILLISECONDS = 3000
+
+
+def _resolve_topics(request: Request, plant_id: Optional[int], line_id: Optional[int]) -> List[str]:
+    """
+    Topics the caller may subscribe to. Admins pick any plant or line,
+    planners default to their plant and team leaders to their line.
+    """
+    user = request.state.user
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+
+    # Short-lived session; the stream itself never touches the database
+    db = SessionLocal()
+    try:
+        if user.role == UserRole.ADMIN:
+            if plant_id is None and line_id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="plant_id or line_id is required"
+                )
+
+        elif user.role == UserRole.PLANNER:
+            planner = get_planner_context(request, db)
+            if plant_id is None and line_id is None:
+                plant_id = planner.plant_id
+
+            line_plant_id = db.query(Line.plant_id).filter(
+                Line.id == line_id).scalar() if line_id is not None else planner.plant_id
+            if plant_id not in (None, planner.plant_id) or line_plant_id != planner.plant_id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You don't have access to this plant or line"
+                )
+
+        elif user.role == UserRole.TEAM_LEADER:
+            team_leader = get_team_leader_context(request, db)
+            if plant_id is None and line_id is None:
+                line_id = team_leader.line_id
+
+            if plant_id not in (None, team_leader.plant_id) or line_id not in (None, team_leader.line_id):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="You don't have access to this plant or line"
+                )
+
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not allowed to subscribe to events"
+            )
+    finally:
+        db.close()
+
+    topics = []
+    if plant_id is not None:
+        topics.append(plant_topic(plant_id))
+    if line_id is not None:
+        topics.append(line_topic(line_id))
+    return topics
+
+
+async def _event_stream(request: Request, topics: List[str], claims: Dict[str, Any]):
+    """
+    Server-Sent Events for the topics until the client disconnects or the
+    access token expires or is revoked; the client then reconnects with a
+    fresh token.
+    """
+    subscription = event_bus.subscribe(topics)
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+
+        while not await request.is_disconnected():
+            remaining = claims["exp"] - time.time()
+            if remaining <= 0 or revocations.is_revoked(claims):
+                break
+
+            events = await subscription.next_batch(min(KEEPALIVE_SECONDS, remaining))
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+
+            # Tell the client it fell behind so it can reload a snapshot
+            dropped = subscription.take_dropped()
+            if dropped:
+                yield f"event: dropped\ndata: {json.dumps({'count': dropped})}\n\n"
+
+            for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+@router.get("")
+def stream_events(
+    request: Request,
+    plant_id: Optional[int] = None,
+    line_id: Optional[int] = None
+):
+    """
+    Stream production and loss change events for a plant or line as
+    Server-Sent Events
+    """
+    topics = _resolve_topics(request, plant_id, line_id)
+
+    return StreamingResponse(
+        _event_stream(request, topics, request.state.token_claims),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
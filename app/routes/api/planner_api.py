@@ -6,11 +6,18 @@ from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
 from app.database import get_db
-from app.models import Hour, Production, User, Planner, Shift, Plant, DayNight, ShiftType, Line, Loop, Zone
-from sqlalchemy import desc, func
+from app.models import Hour, Production, UserRole, Planner, Shift, Plant, DayNight, ShiftType, Line, Loop, Zone
+from app.services.event_bus import publish_line_event
+from app.services.pagination import COUNT_MODE_PATTERN, count_rows, keyset_page
+from app.services.production_service import production_matrix, upsert_productions
+from app.services.role_context import PlannerContext, get_planner_context, require_role
 
 
-router = APIRouter(prefix="/api/planner", tags=["planner"])
+router = APIRouter(
+    prefix="/api/planner",
+    tags=["planner"],
+    dependencies=[Depends(require_role(UserRole.PLANNER))]
+)
 
 # Pydantic models
 
@@ -98,22 +105,35 @@ class ShiftResponse(BaseModel):
         from_attributes = True
 
 
+# Eager-loading plans matching the nested response models, so serializing
+# a list doesn't lazy load per item
+PLANNER_RESPONSE_LOAD = (joinedload(Planner.user),)
+SHIFT_RESPONSE_LOAD = (
+    joinedload(Shift.plant),
+    joinedload(Shift.planner).joinedload(Planner.user),
+)
+LINE_RESPONSE_LOAD = (
+    joinedload(Line.loop).joinedload(Loop.zone).joinedload(Zone.plant),
+)
+
+
 class PaginatedShiftResponse(BaseModel):
     items: List[ShiftResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     limit: int
+    next_cursor: Optional[str] = None
 
 
 @router.get("/profile", response_model=PlannerResponse)
-async def get_planner_profile(
+def get_planner_profile(
     request: Request,
     db: Session = Depends(get_db)
 ):
     """Get the current planner's profile"""
     user = request.state.user
 
-    planner = db.query(Planner).filter(
+    planner = db.query(Planner).options(*PLANNER_RESPONSE_LOAD).filter(
         Planner.user_id == user.sap_id,
         Planner.is_deleted == False
     ).first()
@@ -128,26 +148,13 @@ async def get_planner_profile(
 
 
 @router.post("/shifts", response_model=ShiftResponse, status_code=status.HTTP_201_CREATED)
-async def create_shift(
+def create_shift(
     shift_data: ShiftCreate,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    planner: PlannerContext = Depends(get_planner_context)
 ):
     """Create a new shift"""
-    user = request.state.user
-
-    # Get planner info
-    planner = db.query(Planner).filter(
-        Planner.user_id == user.sap_id,
-        Planner.is_deleted == False
-    ).first()
-
-    if not planner:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Planner profile not found"
-        )
-
     # Convert date string to datetime
     try:
         shift_date = datetime.strptime(shift_data.date, "%Y-%m-%d")
@@ -189,70 +196,61 @@ async def create_shift(
 
 
 @router.get("/shifts", response_model=PaginatedShiftResponse)
-async def list_shifts(
+def list_shifts(
     request: Request,
     page: int = Query(1, gt=0),
     limit: int = Query(10, gt=0, le=50),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    count: Optional[str] = Query(None, pattern=COUNT_MODE_PATTERN),
+    db: Session = Depends(get_db),
+    planner: PlannerContext = Depends(get_planner_context)
 ):
-    """List shifts for the planner's plant"""
-    user = request.state.user
-
-    # Get planner info
-    planner = db.query(Planner).filter(
-        Planner.user_id == user.sap_id,
-        Planner.is_deleted == False
-    ).first()
-
-    if not planner:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Planner profile not found"
-        )
-
+    """
+    List shifts for the planner's plant, newest first. Pass the returned
+    next_cursor to get the following page; page numbers still work but
+    cost more the deeper they go. The total is exact by default and
+    omitted when paging by cursor unless a count mode is given.
+    """
     # Query shifts for the planner's plant
-    shifts_query = db.query(Shift).filter(
+    shifts_query = db.query(Shift).options(*SHIFT_RESPONSE_LOAD).filter(
         Shift.plant_id == planner.plant_id,
         Shift.is_deleted == False
-    ).order_by(desc(Shift.created_at))
+    )
 
-    # Get total count
-    total = shifts_query.count()
+    total = count_rows(
+        shifts_query,
+        count or ("none" if cursor else "exact"),
+        ("shifts", planner.plant_id)
+    )
 
-    # Apply pagination
-    shifts = shifts_query.offset((page - 1) * limit).limit(limit).all()
+    shifts, next_cursor = keyset_page(
+        shifts_query,
+        [Shift.created_at, Shift.id],
+        limit,
+        cursor=cursor,
+        descending=True,
+        offset=0 if cursor else (page - 1) * limit
+    )
 
     return {
         "items": shifts,
         "total": total,
         "page": page,
-        "limit": limit
+        "limit": limit,
+        "next_cursor": next_cursor
     }
 
 
 @router.get("/shifts/{shift_id}", response_model=ShiftResponse)
-async def get_shift(
+def get_shift(
     shift_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    planner: PlannerContext = Depends(get_planner_context)
 ):
     """Get shift details by ID"""
-    user = request.state.user
-
-    # Get planner info
-    planner = db.query(Planner).filter(
-        Planner.user_id == user.sap_id,
-        Planner.is_deleted == False
-    ).first()
-
-    if not planner:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Planner profile not found"
-        )
-
-    # Get shift with plant data
-    shift = db.query(Shift).filter(
+    # Get shift with plant and planner data
+    shift = db.query(Shift).options(*SHIFT_RESPONSE_LOAD).filter(
         Shift.id == shift_id,
         Shift.is_deleted == False
     ).first()
@@ -274,14 +272,13 @@ async def get_shift(
 
 
 @router.get("/shifts/{shift_id}/lines", response_model=LinesResponse)
-async def list_lines_for_shift(
+def list_lines_for_shift(
     shift_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    planner: PlannerContext = Depends(get_planner_context)
 ):
     """List all lines for the planner's plant based on shift"""
-    user = request.state.user
-
     # Get shift details
     shift = db.query(Shift).filter(
         Shift.id == shift_id,
@@ -294,18 +291,6 @@ async def list_lines_for_shift(
             detail="Shift not found"
         )
 
-    # Get planner info
-    planner = db.query(Planner).filter(
-        Planner.user_id == user.sap_id,
-        Planner.is_deleted == False
-    ).first()
-
-    if not planner:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Planner profile not found"
-        )
-
     # Verify the shift belongs to the planner's plant
     if shift.plant_id != planner.plant_id:
         raise HTTPException(
@@ -319,14 +304,12 @@ async def list_lines_for_shift(
         .join(Loop, Line.loop_id == Loop.id)
         .join(Zone, Loop.zone_id == Zone.id)
         .filter(
-            Zone.plant_id == planner.plant_id,
+            Line.plant_id == planner.plant_id,
             Line.is_deleted == False,
             Loop.is_deleted == False,
             Zone.is_deleted == False
         )
-        .options(
-            joinedload(Line.loop).joinedload(Loop.zone).joinedload(Zone.plant)
-        )
+        .options(*LINE_RESPONSE_LOAD)
         .order_by(Line.name)
     )
 
@@ -341,40 +324,61 @@ async def list_lines_for_shift(
         "total": total
     }
 
-# Add to app/routes/api/planner_api.py
+class ProductionMatrixResponse(BaseModel):
+    shift_id: int
+    hours: List[Hour]
+    line_ids: List[int]
+    line_names: List[str]
+    # One row per line, one column per hour; null where nothing is recorded
+    plan: List[List[Optional[int]]]
+    achievement: List[List[Optional[int]]]
 
 
-@router.get("/lines/{line_id}", response_model=LineResponse)
-async def get_line(
-    line_id: int,
+@router.get("/shifts/{shift_id}/matrix", response_model=ProductionMatrixResponse)
+def get_production_matrix(
+    shift_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    planner: PlannerContext = Depends(get_planner_context)
 ):
-    """Get line details by ID"""
-    user = request.state.user
-
-    # Get planner info
-    planner = db.query(Planner).filter(
-        Planner.user_id == user.sap_id,
-        Planner.is_deleted == False
+    """
+    Plan and achievement for every line of the planner's plant and every
+    hour of a shift, as parallel arrays: row i of plan and achievement
+    belongs to line_ids[i], column j to hours[j]
+    """
+    # Verify shift belongs to planner's plant
+    shift = db.query(Shift.id).filter(
+        Shift.id == shift_id,
+        Shift.plant_id == planner.plant_id,
+        Shift.is_deleted == False
     ).first()
 
-    if not planner:
+    if not shift:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Planner profile not found"
+            detail="Shift not found or you don't have access to it"
         )
 
+    return production_matrix(db, shift_id, planner.plant_id)
+
+
+@router.get("/lines/{line_id}", response_model=LineResponse)
+def get_line(
+    line_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    planner: PlannerContext = Depends(get_planner_context)
+):
+    """Get line details by ID"""
     # Get line with related data
     line = (
         db.query(Line)
-        .filter(Line.id == line_id, Line.is_deleted == False)
-        .join(Loop, Line.loop_id == Loop.id)
-        .join(Zone, Loop.zone_id == Zone.id)
-        .filter(Zone.plant_id == planner.plant_id)
-        .options(
-            joinedload(Line.loop).joinedload(Loop.zone).joinedload(Zone.plant)
+        .filter(
+            Line.id == line_id,
+            Line.plant_id == planner.plant_id,
+            Line.is_deleted == False
         )
+        .options(*LINE_RESPONSE_LOAD)
         .first()
     )
 
@@ -417,27 +421,14 @@ class ProductionsResponse(BaseModel):
 
 
 @router.get("/productions", response_model=ProductionsResponse)
-async def list_productions(
+def list_productions(
     shift: int,
     line: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    planner: PlannerContext = Depends(get_planner_context)
 ):
     """List productions for a specific shift and line"""
-    user = request.state.user
-
-    # Get planner info
-    planner = db.query(Planner).filter(
-        Planner.user_id == user.sap_id,
-        Planner.is_deleted == False
-    ).first()
-
-    if not planner:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Planner profile not found"
-        )
-
     # Verify shift belongs to planner's plant
     shift_obj = db.query(Shift).filter(
         Shift.id == shift,
@@ -454,11 +445,9 @@ async def list_productions(
     # Verify line belongs to planner's plant
     line_check = (
         db.query(Line)
-        .join(Loop, Line.loop_id == Loop.id)
-        .join(Zone, Loop.zone_id == Zone.id)
         .filter(
             Line.id == line,
-            Zone.plant_id == planner.plant_id,
+            Line.plant_id == planner.plant_id,
             Line.is_deleted == False
         )
         .first()
@@ -484,26 +473,13 @@ async def list_productions(
 
 
 @router.post("/productions", response_model=List[ProductionResponse], status_code=status.HTTP_201_CREATED)
-async def create_productions(
+def create_productions(
     data: ProductionPlanRequest,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    planner: PlannerContext = Depends(get_planner_context)
 ):
     """Create or update production plans for a shift and line"""
-    user = request.state.user
-
-    # Get planner info
-    planner = db.query(Planner).filter(
-        Planner.user_id == user.sap_id,
-        Planner.is_deleted == False
-    ).first()
-
-    if not planner:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Planner profile not found"
-        )
-
     if not data.productions or len(data.productions) == 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -529,11 +505,9 @@ async def create_productions(
     # Verify line belongs to planner's plant
     line_check = (
         db.query(Line)
-        .join(Loop, Line.loop_id == Loop.id)
-        .join(Zone, Loop.zone_id == Zone.id)
         .filter(
             Line.id == first_prod.line_id,
-            Zone.plant_id == planner.plant_id,
+            Line.plant_id == planner.plant_id,
             Line.is_deleted == False
         )
         .first()
@@ -545,45 +519,117 @@ async def create_productions(
             detail="Line not found or you don't have access to it"
         )
 
-    # Process all production plans
-    created_productions = []
-
+    # Check if all plans have the same shift and line
     for prod_plan in data.productions:
-        # Check if all plans have the same shift and line
         if prod_plan.shift_id != first_prod.shift_id or prod_plan.line_id != first_prod.line_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="All production plans must be for the same shift and line"
             )
 
-        # Check if production already exists for this hour
-        existing_prod = db.query(Production).filter(
-            Production.shift_id == prod_plan.shift_id,
-            Production.line_id == prod_plan.line_id,
-            Production.hour == prod_plan.hour,
-            Production.is_deleted == False
-        ).first()
-
-        if existing_prod:
-            # Update existing production
-            existing_prod.plan = prod_plan.plan
-            existing_prod.updated_at = func.now()
-            db.add(existing_prod)
-            created_productions.append(existing_prod)
-        else:
-            # Create new production
-            new_prod = Production(
-                plan=prod_plan.plan,
-                hour=prod_plan.hour,
-                line_id=prod_plan.line_id,
-                shift_id=prod_plan.shift_id,
-                planner_id=planner.user_id
-            )
-            db.add(new_prod)
-            db.flush()
-            created_productions.append(new_prod)
+    # One row per hour; if an hour is repeated the last plan wins
+    rows = {
+        prod_plan.hour: {
+            "plan": prod_plan.plan,
+            "hour": prod_plan.hour,
+            "line_id": prod_plan.line_id,
+            "shift_id": prod_plan.shift_id,
+            "planner_id": planner.user_id
+        }
+        for prod_plan in data.productions
+    }
+
+    return _save_production_plans(db, list(rows.values()), planner.plant_id)
+
+
+class HourPlan(BaseModel):
+    hour: Hour
+    plan: int
 
+
+class LinePlan(BaseModel):
+    line_id: int
+    plans: List[HourPlan]
+
+
+class ShiftPlanRequest(BaseModel):
+    lines: List[LinePlan]
+
+
+@router.post("/shifts/{shift_id}/productions", response_model=List[ProductionResponse], status_code=status.HTTP_201_CREATED)
+def create_shift_productions(
+    shift_id: int,
+    data: ShiftPlanRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    planner: PlannerContext = Depends(get_planner_context)
+):
+    """Create or update production plans for several lines of a shift at once"""
+    if not any(line_plan.plans for line_plan in data.lines):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No production plans provided"
+        )
+
+    # Verify shift belongs to planner's plant
+    shift = db.query(Shift).filter(
+        Shift.id == shift_id,
+        Shift.plant_id == planner.plant_id,
+        Shift.is_deleted == False
+    ).first()
+
+    if not shift:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Shift not found or you don't have access to it"
+        )
+
+    # Verify every line belongs to planner's plant in a single query
+    line_ids = {line_plan.line_id for line_plan in data.lines}
+    accessible_lines = (
+        db.query(Line.id)
+        .filter(
+            Line.id.in_(line_ids),
+            Line.plant_id == planner.plant_id,
+            Line.is_deleted == False
+        )
+        .all()
+    )
+    accessible_line_ids = {line.id for line in accessible_lines}
+
+    missing_line_ids = line_ids - accessible_line_ids
+    if missing_line_ids:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Lines not found or you don't have access to them: {sorted(missing_line_ids)}"
+        )
+
+    # One row per line and hour; if an hour is repeated the last plan wins
+    rows = {
+        (line_plan.line_id, hour_plan.hour): {
+            "plan": hour_plan.plan,
+            "hour": hour_plan.hour,
+            "line_id": line_plan.line_id,
+            "shift_id": shift_id,
+            "planner_id": planner.user_id
+        }
+        for line_plan in data.lines
+        for hour_plan in line_plan.plans
+    }
+
+    return _save_production_plans(db, list(rows.values()), planner.plant_id)
+
+
+def _save_production_plans(db: Session, rows: List[dict], plant_id: int) -> List[ProductionResponse]:
+    """Insert new hours and update the plan of existing ones in one statement"""
     try:
+        productions = upsert_productions(db, rows, update_columns=["plan"])
+
+        # Serialize before committing; committing expires the objects and
+        # reading them afterwards would reload each row separately
+        response = [ProductionResponse.model_validate(production)
+                    for production in productions]
+
         db.commit()
     except Exception as e:
         db.rollback()
@@ -592,4 +638,16 @@ async def create_productions(
             detail=f"Failed to save production plans: {str(e)}"
         )
 
-    return created_productions
+    # One event per shift and line with every hour whose plan was saved
+    changed_hours = {}
+    for production in response:
+        changed_hours.setdefault(
+            (production.shift_id, production.line_id), []).append(production.hour)
+    for (shift_id, line_id), hours in changed_hours.items():
+        publish_line_event(plant_id, line_id, {
+            "type": "production",
+            "shift_id": shift_id,
+            "hours": hours
+        })
+
+    return response
@@ -1,14 +1,26 @@
 # app/routes/api/team_leader_api.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, func, select
+from sqlalchemy.orm import Session, joinedload
 from pydantic import BaseModel
 from typing import Optional, List
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+import hashlib
+import json
 from app.database import get_db
-from app.models import Loss, LossReason, User, TeamLeader, Shift, Production, Plant, Line, Hour
-
-router = APIRouter(prefix="/api/team-leader")
+from app.models import Attendance, AttendanceType, Cell, Loss, LossReason, Member, User, UserRole, Shift, Production, Plant, Line, Hour
+from app.services.attendance_service import upsert_attendances
+from app.services.event_bus import publish_line_event
+from app.services.production_service import upsert_productions
+from app.services.rollup_service import record_rollup_deltas
+from app.services.role_context import TeamLeaderContext, get_team_leader_context, require_role
+
+router = APIRouter(
+    prefix="/api/team-leader",
+    dependencies=[Depends(require_role(UserRole.TEAM_LEADER))]
+)
 
 # Pydantic models
 
@@ -67,26 +79,75 @@ class LossResponse(BaseModel):
         from_attributes = True
 
 
+class HourSnapshot(BaseModel):
+    hour: Hour
+    production_id: Optional[int] = None
+    plan: Optional[int] = None
+    achievement: Optional[int] = None
+    scraps: Optional[int] = None
+    defects: Optional[int] = None
+    flash: Optional[int] = None
+    loss_total: int = 0
+
+
+class ProductionSnapshotResponse(BaseModel):
+    shift_id: int
+    line_id: int
+    hours: List[HourSnapshot]
+
+
+class AttendanceTypeResponse(BaseModel):
+    id: int
+    title: str
+    color: str
+
+    class Config:
+        from_attributes = True
+
+
+class RosterMember(BaseModel):
+    sap_id: str
+    name: str
+    cell_id: int
+    cell_name: str
+    attendance_id: Optional[int] = None
+    attendance_type_id: Optional[int] = None
+    working_cell_id: Optional[int] = None
+
+
+class AttendanceRosterResponse(BaseModel):
+    shift_id: int
+    line_id: int
+    members: List[RosterMember]
+
+
+class RollCallEntry(BaseModel):
+    member_id: str
+    attendance_type_id: int
+    # Defaults to the member's home cell
+    working_cell_id: Optional[int] = None
+
+
+class RollCallRequest(BaseModel):
+    shift_id: int
+    entries: List[RollCallEntry]
+
+
 @router.get("/me", response_model=TeamLeaderResponse)
-async def get_team_leader_info(request: Request, db: Session = Depends(get_db)):
+def get_team_leader_info(
+    request: Request,
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context)
+):
     """Get current team leader's information"""
     user = request.state.user
 
-    team_leader = db.query(TeamLeader).filter(
-        TeamLeader.user_id == user.sap_id,
-        TeamLeader.is_deleted == False
-    ).first()
-
-    if not team_leader:
-        raise HTTPException(status_code=404, detail="Team leader not found")
-
     # Format the response
     response = {
         "sap_id": user.sap_id,
         "name": user.name,
         "line": {
-            "id": team_leader.line.id,
-            "name": team_leader.line.name,
+            "id": team_leader.line_id,
+            "name": team_leader.line_name,
         }
     }
 
@@ -94,14 +155,13 @@ async def get_team_leader_info(request: Request, db: Session = Depends(get_db)):
 
 
 @router.get("/shifts", response_model=List[ShiftResponse])
-async def get_shifts_for_date(
+def get_shifts_for_date(
     request: Request,
     db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context),
     date: str = Query(..., description="Date in YYYY-MM-DD format")
 ):
     """Get available shifts for a specific date for the team leader's plant"""
-    user = request.state.user
-
     print(f"Date received: {date}")
 
     # Parse the date parameter
@@ -113,24 +173,20 @@ async def get_shifts_for_date(
         raise HTTPException(
             status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
 
-    # Get the team leader's plant
-    team_leader = db.query(TeamLeader).filter(
-        TeamLeader.user_id == user.sap_id,
-        TeamLeader.is_deleted == False
-    ).first()
-
-    if not team_leader or not team_leader.plant:
+    # Make sure the team leader's line is part of a plant
+    if not team_leader.plant_id:
         raise HTTPException(
             status_code=404, detail="Team leader's plant not found")
 
-    # Get shifts for the date and plant using date comparison with SQL functions
-    # This handles the case where Shift.date is a datetime in the database
-    from sqlalchemy import func
+    # Shift.date is a datetime, so match the half-open range [date, date + 1)
+    # rather than wrapping the column in DATE(), which can't use the index
+    day_start = datetime.combine(parsed_date, datetime.min.time())
+    day_end = day_start + timedelta(days=1)
 
-    shifts = db.query(Shift).filter(
-        # Extract only the date part for comparison
-        func.date(Shift.date) == parsed_date,
-        Shift.plant_id == team_leader.plant.id,
+    shifts = db.query(Shift).options(joinedload(Shift.plant)).filter(
+        Shift.date >= day_start,
+        Shift.date < day_end,
+        Shift.plant_id == team_leader.plant_id,
         Shift.is_deleted == False
     ).all()
 
@@ -154,28 +210,22 @@ async def get_shifts_for_date(
 
 
 @router.get("/shifts/{shift_id}", response_model=ShiftResponse)
-async def get_shift_details(
+def get_shift_details(
     shift_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context)
 ):
     """Get detailed information about a specific shift"""
-    user = request.state.user
-
-    # Get the team leader's plant
-    team_leader = db.query(TeamLeader).filter(
-        TeamLeader.user_id == user.sap_id,
-        TeamLeader.is_deleted == False
-    ).first()
-
-    if not team_leader or not team_leader.plant:
+    # Make sure the team leader's line is part of a plant
+    if not team_leader.plant_id:
         raise HTTPException(
             status_code=404, detail="Team leader's plant not found")
 
-    # Get the shift
-    shift = db.query(Shift).filter(
+    # Get the shift with its plant
+    shift = db.query(Shift).options(joinedload(Shift.plant)).filter(
         Shift.id == shift_id,
-        Shift.plant_id == team_leader.plant.id,
+        Shift.plant_id == team_leader.plant_id,
         Shift.is_deleted == False
     ).first()
 
@@ -196,24 +246,14 @@ async def get_shift_details(
 
 
 @router.get("/production")
-async def get_production_data(
+def get_production_data(
     request: Request,
     db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context),
     shift_id: int = Query(...),
     hour: str = Query(...)
 ):
     """Get production data for a specific shift and hour"""
-    user = request.state.user
-
-    # Get the team leader
-    team_leader = db.query(TeamLeader).filter(
-        TeamLeader.user_id == user.sap_id,
-        TeamLeader.is_deleted == False
-    ).first()
-
-    if not team_leader:
-        raise HTTPException(status_code=404, detail="Team leader not found")
-
     # Get production data
     production = db.query(Production).filter(
         Production.shift_id == shift_id,
@@ -239,24 +279,14 @@ async def get_production_data(
 
 
 @router.get("/production/plan")
-async def get_production_plan(
+def get_production_plan(
     request: Request,
     db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context),
     shift_id: int = Query(...),
     hour: str = Query(...)
 ):
     """Get production plan for a specific shift and hour"""
-    user = request.state.user
-
-    # Get the team leader
-    team_leader = db.query(TeamLeader).filter(
-        TeamLeader.user_id == user.sap_id,
-        TeamLeader.is_deleted == False
-    ).first()
-
-    if not team_leader:
-        raise HTTPException(status_code=404, detail="Team leader not found")
-
     # Check if shift exists
     shift = db.query(Shift).filter(
         Shift.id == shift_id,
@@ -282,24 +312,74 @@ async def get_production_plan(
         status_code=404, detail="No production plan found for this shift and hour")
 
 
-@router.post("/production", status_code=status.HTTP_201_CREATED)
-async def save_production_data(
-    data: ProductionData,
+@router.get("/production/snapshot", response_model=ProductionSnapshotResponse)
+def get_production_snapshot(
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context),
+    shift_id: int = Query(...)
 ):
-    """Save production data for a specific shift and hour"""
-    user = request.state.user
+    """
+    Get all 12 hours of production and loss totals for the team leader's line
+    in a shift. Supports If-None-Match so polling clients get a cheap 304.
+    """
+    _get_plant_shift(db, shift_id, team_leader)
+
+    # Total of live losses per production, resolved through the loss index
+    loss_total = select(
+        func.coalesce(func.sum(Loss.amount), 0)
+    ).where(
+        Loss.production_id == Production.id,
+        Loss.is_deleted == False
+    ).scalar_subquery()
 
-    # Get the team leader
-    team_leader = db.query(TeamLeader).filter(
-        TeamLeader.user_id == user.sap_id,
-        TeamLeader.is_deleted == False
-    ).first()
+    # The line's productions and their loss totals in one query
+    rows = db.query(
+        Production,
+        loss_total
+    ).filter(
+        Production.line_id == team_leader.line_id,
+        Production.shift_id == shift_id,
+        Production.is_deleted == False
+    ).all()
+
+    hours = {hour: HourSnapshot(hour=hour) for hour in Hour}
+    for production, production_loss_total in rows:
+        hours[production.hour] = HourSnapshot(
+            hour=production.hour,
+            production_id=production.id,
+            plan=production.plan,
+            achievement=production.achievement,
+            scraps=production.scraps,
+            defects=production.defects,
+            flash=production.flash,
+            loss_total=production_loss_total or 0
+        )
+
+    snapshot = ProductionSnapshotResponse(
+        shift_id=shift_id,
+        line_id=team_leader.line_id,
+        hours=list(hours.values())
+    ).model_dump(mode="json")
+
+    # The ETag is a digest of the snapshot itself, so it changes with any edit
+    etag = '"' + hashlib.sha1(json.dumps(snapshot, sort_keys=True).encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if request.headers.get("If-None-Match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
 
-    if not team_leader:
-        raise HTTPException(status_code=404, detail="Team leader not found")
+    return JSONResponse(content=snapshot, headers=headers)
 
+
+@router.post("/production", status_code=status.HTTP_201_CREATED)
+def save_production_data(
+    data: ProductionData,
+    request: Request,
+    db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context)
+):
+    """Save production data for a specific shift and hour"""
     # Check if shift exists
     shift = db.query(Shift).filter(
         Shift.id == data.shift_id,
@@ -309,57 +389,35 @@ async def save_production_data(
     if not shift:
         raise HTTPException(status_code=404, detail="Shift not found")
 
-    # Check if production record already exists
-    existing_production = db.query(Production).filter(
-        Production.shift_id == data.shift_id,
-        Production.hour == data.hour,
-        Production.line_id == team_leader.line_id,
-        Production.is_deleted == False
-    ).first()
-
     try:
-        if existing_production:
-            # Update existing record
-            existing_production.achievement = data.achievement
-            existing_production.scraps = data.scraps
-            existing_production.defects = data.defects
-            existing_production.flash = data.flash
-            existing_production.updated_at = datetime.now()
-
-            # Ensure team leader ID is set (even if it was already set before)
-            existing_production.team_leader_id = team_leader.user_id
-
-            db.commit()
-            db.refresh(existing_production)
-
-            return {
-                "id": existing_production.id,
-                "message": "Production data updated successfully"
-            }
-        else:
-            # Create new record
-            new_production = Production(
-                plan=data.plan,
-                achievement=data.achievement,
-                scraps=data.scraps,
-                defects=data.defects,
-                flash=data.flash,
-                hour=data.hour,
-                shift_id=data.shift_id,
-                line_id=team_leader.line_id,
-                team_leader_id=team_leader.user_id,  # Make sure team leader ID is set
-                # Assuming planner_id is available from the shift
-                planner_id=shift.planner_id if shift.planner_id else None
-            )
-
-            db.add(new_production)
-            db.commit()
-            db.refresh(new_production)
+        # Insert the hour, or update the existing live record in the same statement
+        production = upsert_productions(db, [{
+            "plan": data.plan,
+            "achievement": data.achievement,
+            "scraps": data.scraps,
+            "defects": data.defects,
+            "flash": data.flash,
+            "hour": data.hour,
+            "shift_id": data.shift_id,
+            "line_id": team_leader.line_id,
+            "team_leader_id": team_leader.user_id,
+            # Assuming planner_id is available from the shift
+            "planner_id": shift.planner_id if shift.planner_id else None
+        }], update_columns=["achievement", "scraps", "defects", "flash", "team_leader_id"])[0]
+        production_id = production.id
+
+        db.commit()
+
+        publish_line_event(team_leader.plant_id, team_leader.line_id, {
+            "type": "production",
+            "shift_id": data.shift_id,
+            "hours": [data.hour]
+        })
 
-            return {
-                "id": new_production.id,
-                "message": "Production data saved successfully"
-            }
+        return {
+            "id": production_id,
+            "message": "Production data saved successfully"
+        }
     except Exception as e:
         db.rollback()
         raise HTTPException(
@@ -369,7 +427,7 @@ async def save_production_data(
 
 
 @router.get("/loss-reasons", response_model=List[LossReasonResponse])
-async def get_loss_reasons(
+def get_loss_reasons(
     request: Request,
     db: Session = Depends(get_db)
 ):
@@ -382,23 +440,13 @@ async def get_loss_reasons(
 
 
 @router.get("/production/{production_id}/losses", response_model=List[LossResponse])
-async def get_production_losses(
+def get_production_losses(
     production_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context)
 ):
     """Get losses for a specific production"""
-    user = request.state.user
-
-    # Verify the production belongs to this team leader
-    team_leader = db.query(TeamLeader).filter(
-        TeamLeader.user_id == user.sap_id,
-        TeamLeader.is_deleted == False
-    ).first()
-
-    if not team_leader:
-        raise HTTPException(status_code=404, detail="Team leader not found")
-
     production = db.query(Production).filter(
         Production.id == production_id,
         Production.team_leader_id == team_leader.user_id,
@@ -408,8 +456,8 @@ async def get_production_losses(
     if not production:
         raise HTTPException(status_code=404, detail="Production not found")
 
-    # Get losses for this production
-    losses = db.query(Loss).filter(
+    # Get losses for this production with their reasons
+    losses = db.query(Loss).options(joinedload(Loss.loss_reason)).filter(
         Loss.production_id == production_id,
         Loss.is_deleted == False
     ).all()
@@ -418,23 +466,13 @@ async def get_production_losses(
 
 
 @router.post("/losses", status_code=status.HTTP_201_CREATED, response_model=LossResponse)
-async def create_loss(
+def create_loss(
     loss_data: LossCreate,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context)
 ):
     """Create a new loss entry"""
-    user = request.state.user
-
-    # Verify the production belongs to this team leader
-    team_leader = db.query(TeamLeader).filter(
-        TeamLeader.user_id == user.sap_id,
-        TeamLeader.is_deleted == False
-    ).first()
-
-    if not team_leader:
-        raise HTTPException(status_code=404, detail="Team leader not found")
-
     production = db.query(Production).filter(
         Production.id == loss_data.production_id,
         Production.team_leader_id == team_leader.user_id,
@@ -479,30 +517,35 @@ async def create_loss(
     )
 
     db.add(new_loss)
+    record_rollup_deltas(db, [{
+        "shift_id": production.shift_id,
+        "line_id": production.line_id,
+        "loss": loss_data.amount
+    }])
     db.commit()
     db.refresh(new_loss)
 
+    publish_line_event(team_leader.plant_id, production.line_id, {
+        "type": "loss",
+        "action": "created",
+        "loss_id": new_loss.id,
+        "production_id": production.id,
+        "shift_id": production.shift_id,
+        "hour": production.hour,
+        "amount": new_loss.amount
+    })
+
     return new_loss
 
 
 @router.delete("/losses/{loss_id}", status_code=status.HTTP_204_NO_CONTENT)
-async def delete_loss(
+def delete_loss(
     loss_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context)
 ):
     """Delete a loss entry"""
-    user = request.state.user
-
-    # Get the team leader
-    team_leader = db.query(TeamLeader).filter(
-        TeamLeader.user_id == user.sap_id,
-        TeamLeader.is_deleted == False
-    ).first()
-
-    if not team_leader:
-        raise HTTPException(status_code=404, detail="Team leader not found")
-
     # Get the loss
     loss = db.query(Loss).filter(
         Loss.id == loss_id,
@@ -523,10 +566,208 @@ async def delete_loss(
         raise HTTPException(
             status_code=403, detail="Not authorized to delete this loss")
 
-    # Mark as deleted
-    loss.is_deleted = True
-    loss.deleted_at = datetime.now()
+    # Mark as deleted only if it is still live, so of two concurrent deletes
+    # only the one that flipped it takes the amount back out of the rollups
+    deleted = db.query(Loss).filter(
+        Loss.id == loss.id,
+        Loss.is_deleted == False
+    ).update({
+        Loss.is_deleted: True,
+        Loss.deleted_at: datetime.now()
+    }, synchronize_session=False)
+
+    if deleted != 1:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Loss not found")
+
+    record_rollup_deltas(db, [{
+        "shift_id": production.shift_id,
+        "line_id": production.line_id,
+        "loss": -loss.amount
+    }])
 
     db.commit()
 
+    publish_line_event(team_leader.plant_id, production.line_id, {
+        "type": "loss",
+        "action": "deleted",
+        "loss_id": loss_id,
+        "production_id": production.id,
+        "shift_id": production.shift_id,
+        "hour": production.hour,
+        "amount": loss.amount
+    })
+
     return None
+
+
+@router.get("/attendance-types", response_model=List[AttendanceTypeResponse])
+def get_attendance_types(
+    request: Request,
+    db: Session = Depends(get_db)
+):
+    """Get all attendance types"""
+    attendance_types = db.query(AttendanceType).filter(
+        AttendanceType.is_deleted == False
+    ).all()
+
+    return attendance_types
+
+
+def _get_plant_shift(db: Session, shift_id: int, team_leader: TeamLeaderContext) -> Shift:
+    shift = db.query(Shift).filter(
+        Shift.id == shift_id,
+        Shift.plant_id == team_leader.plant_id,
+        Shift.is_deleted == False
+    ).first()
+
+    if not shift:
+        raise HTTPException(status_code=404, detail="Shift not found")
+
+    return shift
+
+
+@router.get("/attendance", response_model=AttendanceRosterResponse)
+def get_attendance_roster(
+    request: Request,
+    db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context),
+    shift_id: int = Query(...)
+):
+    """
+    Get every member of the team leader's line with their home cell and
+    their attendance for the shift, if already recorded
+    """
+    _get_plant_shift(db, shift_id, team_leader)
+
+    # Members of the line's cells, with the shift's live attendance if any
+    rows = db.query(
+        Member.user_id,
+        User.name,
+        Cell.id,
+        Cell.name,
+        Attendance.id,
+        Attendance.attendance_type_id,
+        Attendance.working_cell_id
+    ).join(
+        Cell, Member.cell_id == Cell.id
+    ).join(
+        User, Member.user_id == User.sap_id
+    ).outerjoin(
+        Attendance, and_(
+            Attendance.member_id == Member.user_id,
+            Attendance.shift_id == shift_id,
+            Attendance.is_deleted == False
+        )
+    ).filter(
+        Cell.line_id == team_leader.line_id,
+        Cell.is_deleted == False,
+        Member.is_deleted == False
+    ).order_by(Cell.name, User.name).all()
+
+    return {
+        "shift_id": shift_id,
+        "line_id": team_leader.line_id,
+        "members": [
+            RosterMember(
+                sap_id=sap_id,
+                name=name,
+                cell_id=cell_id,
+                cell_name=cell_name,
+                attendance_id=attendance_id,
+                attendance_type_id=attendance_type_id,
+                working_cell_id=working_cell_id
+            )
+            for sap_id, name, cell_id, cell_name, attendance_id, attendance_type_id, working_cell_id in rows
+        ]
+    }
+
+
+@router.post("/attendance", status_code=status.HTTP_201_CREATED)
+def save_attendance(
+    data: RollCallRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+    team_leader: TeamLeaderContext = Depends(get_team_leader_context)
+):
+    """Save a shift's roll call for the team leader's line in one transaction"""
+    if not data.entries:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No attendance entries provided"
+        )
+
+    _get_plant_shift(db, data.shift_id, team_leader)
+
+    # Last entry wins if a member is listed twice
+    entries = {entry.member_id: entry for entry in data.entries}
+
+    # Home cells of the requested members, limited to the team leader's line
+    home_cells = dict(db.query(Member.user_id, Member.cell_id).join(
+        Cell, Member.cell_id == Cell.id
+    ).filter(
+        Member.user_id.in_(entries),
+        Member.is_deleted == False,
+        Cell.line_id == team_leader.line_id
+    ).all())
+
+    missing_members = sorted(set(entries) - set(home_cells))
+    if missing_members:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Members not found on your line: {missing_members}"
+        )
+
+    # Attendance types and reassigned working cells, one query each
+    type_ids = {entry.attendance_type_id for entry in entries.values()}
+    found_type_ids = {row.id for row in db.query(AttendanceType.id).filter(
+        AttendanceType.id.in_(type_ids),
+        AttendanceType.is_deleted == False
+    ).all()}
+
+    missing_types = sorted(type_ids - found_type_ids)
+    if missing_types:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Attendance types not found: {missing_types}"
+        )
+
+    cell_ids = {entry.working_cell_id for entry in entries.values()
+                if entry.working_cell_id is not None}
+    found_cell_ids = {row.id for row in db.query(Cell.id).filter(
+        Cell.id.in_(cell_ids),
+        Cell.plant_id == team_leader.plant_id,
+        Cell.is_deleted == False
+    ).all()} if cell_ids else set()
+
+    missing_cells = sorted(cell_ids - found_cell_ids)
+    if missing_cells:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Working cells not found in your plant: {missing_cells}"
+        )
+
+    rows = [{
+        "shift_id": data.shift_id,
+        "member_id": member_id,
+        "attendance_type_id": entry.attendance_type_id,
+        "working_cell_id": entry.working_cell_id or home_cells[member_id],
+        "team_leader_id": team_leader.user_id
+    } for member_id, entry in entries.items()]
+
+    try:
+        # Insert new attendance, or update the live record in the same statement
+        saved = upsert_attendances(db, rows)
+        db.commit()
+
+        return {
+            "shift_id": data.shift_id,
+            "saved": saved,
+            "message": "Attendance saved successfully"
+        }
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to save attendance: {str(e)}"
+        )
@@ -0,0 +1,246 @@
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import Date, cast, desc, func, select
+from sqlalchemy.orm import Session
+from app.models import DayRollup, Line, Loop, Loss, LossReason, Plant, Production, Shift, ShiftRollup, Zone
+from app.services.rollup_service import MEASURES, ROLLUP_LEVELS, live_loss_totals
+
+# Hierarchy level -> (group key on the denormalized line columns, named model)
+LEVELS = {
+    "plant": (Line.plant_id, Plant),
+    "zone": (Line.zone_id, Zone),
+    "loop": (Line.loop_id, Loop),
+    "line": (Line.id, Line),
+}
+
+BUCKETS = ("hour", "shift", "day", "week")
+
+LOSS_GROUPS = ("reason", "department")
+
+# Filters accepted by every query, matched against the line's ancestry
+SCOPE_COLUMNS = {
+    "plant_id": Line.plant_id,
+    "zone_id": Line.zone_id,
+    "loop_id": Line.loop_id,
+    "line_id": Line.id,
+}
+
+
+def _bucket_columns(dialect: str, bucket: str, day=None) -> list:
+    """
+    Columns identifying a time bucket; the first one is its label. day is
+    the column holding the date, Shift.date unless reading rollups.
+    """
+    day = Shift.date if day is None else day
+    if bucket == "hour":
+        return [Production.hour]
+    if bucket == "shift":
+        return [Shift.id, Shift.date, Shift.day_night, Shift.shift]
+    if bucket == "day":
+        return [func.date(day)]
+
+    # Weeks start on Monday
+    if dialect == "sqlite":
+        return [func.date(day, "weekday 0", "-6 days")]
+    return [cast(func.date_trunc("week", day), Date)]
+
+
+def _bucket_label(bucket: str, values) -> Any:
+    if bucket == "hour":
+        return values[0].value
+    if bucket == "shift":
+        shift_id, shift_date, day_night, shift = values
+        return {
+            "id": shift_id,
+            "date": shift_date.date().isoformat(),
+            "day_night": day_night.value,
+            "shift": shift.value
+        }
+    return str(values[0])
+
+
+def _scoped(statement, start: date, end: date, scope: Dict[str, Optional[int]]):
+    """Restrict to live shifts in [start, end] and the requested hierarchy scope."""
+    statement = statement.where(
+        Shift.date >= datetime.combine(start, time.min),
+        Shift.date < datetime.combine(end + timedelta(days=1), time.min),
+        Shift.is_deleted == False,
+        Production.is_deleted == False
+    )
+    for name, value in scope.items():
+        if value is not None:
+            statement = statement.where(SCOPE_COLUMNS[name] == value)
+    return statement
+
+
+def _percent(part, whole) -> Optional[float]:
+    return round(100.0 * part / whole, 2) if whole else None
+
+
+def _uses_rollups(level: str, bucket: str, scope: Dict[str, Optional[int]]) -> bool:
+    """
+    Rollups cover shift/day/week buckets, filtered by the level itself or
+    its ancestors; finer filters need the raw rows.
+    """
+    if bucket == "hour":
+        return False
+
+    allowed = {f"{name}_id" for name in ROLLUP_LEVELS[:ROLLUP_LEVELS.index(level) + 1]}
+    return all(name in allowed for name, value in scope.items() if value is not None)
+
+
+def _raw_summary_select(dialect: str, level: str, bucket: str, start: date, end: date, scope):
+    """Totals per level and bucket aggregated from the hourly productions."""
+    level_key, level_model = LEVELS[level]
+    bucket_columns = _bucket_columns(dialect, bucket)
+
+    # Loss totals per production, so joining them doesn't repeat production rows
+    loss_totals = live_loss_totals()
+
+    statement = select(
+        level_key,
+        level_model.name,
+        *bucket_columns,
+        *[func.coalesce(func.sum(getattr(Production, measure)), 0)
+          for measure in MEASURES[:-1]],
+        func.coalesce(func.sum(loss_totals.c.amount), 0)
+    ).select_from(Shift).join(
+        Production, Production.shift_id == Shift.id
+    ).join(
+        Line, Production.line_id == Line.id
+    ).outerjoin(
+        loss_totals, loss_totals.c.production_id == Production.id
+    )
+
+    if level_model is not Line:
+        statement = statement.outerjoin(level_model, level_model.id == level_key)
+
+    return _scoped(statement, start, end, scope).group_by(
+        level_key, level_model.name, *bucket_columns
+    ).order_by(*bucket_columns[:1], level_model.name), len(bucket_columns)
+
+
+def _rollup_summary_select(dialect: str, level: str, bucket: str, start: date, end: date, scope):
+    """Totals per level and bucket read from the shift or day rollups."""
+    rollup = ShiftRollup if bucket == "shift" else DayRollup
+    level_model = LEVELS[level][1]
+    bucket_columns = _bucket_columns(dialect, bucket, day=rollup.day)
+
+    statement = select(
+        rollup.entity_id,
+        level_model.name,
+        *bucket_columns,
+        *[func.sum(getattr(rollup, measure)) for measure in MEASURES]
+    ).select_from(rollup).outerjoin(
+        level_model, level_model.id == rollup.entity_id
+    ).where(
+        rollup.level == level,
+        rollup.day >= start,
+        rollup.day <= end
+    )
+
+    if rollup is ShiftRollup:
+        statement = statement.join(
+            Shift, rollup.shift_id == Shift.id
+        ).where(Shift.is_deleted == False)
+
+    for name, value in scope.items():
+        if value is not None:
+            statement = statement.where(getattr(rollup, name) == value)
+
+    return statement.group_by(
+        rollup.entity_id, level_model.name, *bucket_columns
+    ).order_by(*bucket_columns[:1], level_model.name), len(bucket_columns)
+
+
+def production_summary(
+    db: Session,
+    level: str,
+    bucket: str,
+    start: date,
+    end: date,
+    **scope: Optional[int]
+) -> List[Dict[str, Any]]:
+    """
+    Totals of plan, achievement, scraps, defects, flash and losses per
+    hierarchy level and time bucket, aggregated in one GROUP BY query over
+    the rollups where they cover the request, else over the hourly rows.
+    Rates are percentages of the achievement; achievement_pct is of the plan.
+    """
+    build = _rollup_summary_select if _uses_rollups(level, bucket, scope) else _raw_summary_select
+    statement, width = build(db.get_bind().dialect.name, level, bucket, start, end, scope)
+
+    results = []
+    for row in db.execute(statement):
+        plan, achievement, scraps, defects, flash, loss = row[2 + width:]
+        results.append({
+            "level_id": row[0],
+            "level_name": row[1],
+            "bucket": _bucket_label(bucket, row[2:2 + width]),
+            "plan": plan,
+            "achievement": achievement,
+            "scraps": scraps,
+            "defects": defects,
+            "flash": flash,
+            "loss": loss,
+            "achievement_pct": _percent(achievement, plan),
+            "scrap_rate": _percent(scraps, achievement),
+            "defect_rate": _percent(defects, achievement),
+            "flash_rate": _percent(flash, achievement)
+        })
+
+    return results
+
+
+def loss_pareto(
+    db: Session,
+    group: str,
+    start: date,
+    end: date,
+    **scope: Optional[int]
+) -> List[Dict[str, Any]]:
+    """
+    Live losses summed per loss reason or department, largest first, with
+    each group's share and the cumulative share for a Pareto chart.
+    """
+    if group == "reason":
+        group_columns = [LossReason.id, LossReason.title, LossReason.department]
+    else:
+        group_columns = [LossReason.department]
+
+    total = func.sum(Loss.amount)
+    statement = select(
+        *group_columns,
+        total
+    ).select_from(Shift).join(
+        Production, Production.shift_id == Shift.id
+    ).join(
+        Line, Production.line_id == Line.id
+    ).join(
+        Loss, Loss.production_id == Production.id
+    ).join(
+        LossReason, Loss.loss_reason_id == LossReason.id
+    ).where(
+        Loss.is_deleted == False
+    )
+
+    statement = _scoped(statement, start, end, scope).group_by(
+        *group_columns
+    ).order_by(desc(total))
+
+    rows = db.execute(statement).all()
+    grand_total = sum(row[-1] for row in rows)
+
+    results = []
+    cumulative = 0
+    for row in rows:
+        amount = row[-1]
+        cumulative += amount
+        entry = {"department": row[-2], "amount": amount}
+        if group == "reason":
+            entry.update({"loss_reason_id": row[0], "title": row[1]})
+        entry["share"] = _percent(amount, grand_total)
+        entry["cumulative_share"] = _percent(cumulative, grand_total)
+        results.append(entry)
+
+    return results
@@ -0,0 +1,46 @@
+from typing import Any, Dict, List
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.models import Attendance
+from app.services.upsert import UPSERT_INSERTS
+
+# Rows per INSERT, keeping each statement well under SQLite's bound
+# parameter limit
+UPSERT_BATCH_SIZE = 500
+
+# Columns a roll call overwrites on an existing live attendance
+ROLL_CALL_UPDATE_COLUMNS = ("attendance_type_id",
+                            "working_cell_id", "team_leader_id")
+
+
+def upsert_attendances(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """
+    Insert attendance rows, or update the live row that already exists for
+    the same shift and member, with one INSERT ... ON CONFLICT DO UPDATE per
+    UPSERT_BATCH_SIZE rows. Returns the number of rows written.
+    """
+    if not rows:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise NotImplementedError(
+            f"Attendance upsert is not supported on {dialect}")
+
+    written = 0
+    for start in range(0, len(rows), UPSERT_BATCH_SIZE):
+        statement = UPSERT_INSERTS[dialect](Attendance).values(
+            rows[start:start + UPSERT_BATCH_SIZE])
+
+        updates = {column: statement.excluded[column]
+                   for column in ROLL_CALL_UPDATE_COLUMNS}
+        updates["updated_at"] = func.now()
+
+        statement = statement.on_conflict_do_update(
+            index_elements=[Attendance.shift_id, Attendance.member_id],
+            index_where=Attendance.is_deleted == False,
+            set_=updates
+        )
+        written += db.execute(statement).rowcount
+
+    return written
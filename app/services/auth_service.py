@@ -1,13 +1,46 @@
 from passlib.context import CryptContext
 import jwt
-from typing import Dict, Any, Optional
+import os
+import time
+import uuid
+from typing import Callable, Dict, Any, List, Optional, Tuple
+from app.services.cache import TTLCache
+from app.services.hash_pool import hash_pool
 
 # Configuration
 JWT_SECRET = "your_secret_key_change_this_in_production"
 ALGORITHM = "HS256"
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Cost for passwords set in bulk (imports, bulk member creation); such
+# hashes are brought up to BCRYPT_ROUNDS at the user's first login
+BULK_BCRYPT_ROUNDS = int(os.getenv("BULK_BCRYPT_ROUNDS", "6"))
+# Access tokens are short-lived and renewed with a refresh token, which
+# is rotated on every use
+ACCESS_TOKEN_EXPIRE_SECONDS = int(os.getenv("ACCESS_TOKEN_EXPIRE_SECONDS", str(15 * 60)))
+REFRESH_TOKEN_EXPIRE_SECONDS = int(os.getenv("REFRESH_TOKEN_EXPIRE_SECONDS", str(7 * 24 * 3600)))
+# A refresh token presented a second time this soon after its rotation is
+# taken as another tab renewing the same session; any further use, or a
+# later one, as a replay
+REFRESH_TOKEN_REUSE_GRACE_SECONDS = int(os.getenv("REFRESH_TOKEN_REUSE_GRACE_SECONDS", "30"))
+ACCESS_TOKEN_TYPE = "access"
+REFRESH_TOKEN_TYPE = "refresh"
+# Verified tokens remembered so repeat requests skip the HMAC check and
+# JSON parsing; expiry is still checked on every hit
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "4096"))
+TOKEN_CACHE_TTL_SECONDS = ACCESS_TOKEN_EXPIRE_SECONDS
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing context. Hashes below BCRYPT_ROUNDS need an update,
+# which verify_and_update_password() hands back after a successful login.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS
+)
+bulk_pwd_context = pwd_context.copy(
+    bcrypt__default_rounds=BULK_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BULK_BCRYPT_ROUNDS
+)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -15,32 +48,97 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a password and, if its hash is below the current cost, return a
+    replacement hash to store; the replacement is None otherwise.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
 def get_password_hash(password: str) -> str:
     """Generate a password hash using bcrypt."""
     return pwd_context.hash(password)
 
 
-def create_access_token(data: Dict[str, Any]) -> str:
+def get_bulk_password_hash(password: str) -> str:
+    """Generate a password hash at the bulk cost."""
+    return bulk_pwd_context.hash(password)
+
+
+def hash_passwords(passwords: List[str], hasher: Callable[[str], str] = get_bulk_password_hash) -> List[str]:
     """
-    Create a JWT access token without expiration.
+    Hash many passwords, at the bulk cost by default, in the shared hash
+    pool, so bulk jobs and logins are held to the same bound on bcrypt
+    work. Raises HashPoolBusy when the pool is full. Results are in the
+    order of the passwords.
     """
+    return hash_pool.map(hasher, passwords)
+
+
+def _create_token(data: Dict[str, Any], token_type: str, expires_in: int) -> str:
+    now = time.time()
     to_encode = data.copy()
-    # No expiration time is set, making the token valid indefinitely
-    encoded_jwt = jwt.encode(to_encode, JWT_SECRET, algorithm=ALGORITHM)
-    return encoded_jwt
+    to_encode.update({
+        "type": token_type,
+        "jti": uuid.uuid4().hex,
+        # Fractional, so a revocation can cut off tokens issued earlier in
+        # the same second without affecting the next login
+        "iat": now,
+        "exp": int(now) + expires_in
+    })
+    return jwt.encode(to_encode, JWT_SECRET, algorithm=ALGORITHM)
 
 
-def decode_token(token: str) -> Optional[Dict[str, Any]]:
+def create_access_token(data: Dict[str, Any]) -> str:
     """
-    Decode a JWT token without verifying expiration.
+    Create a JWT access token valid for ACCESS_TOKEN_EXPIRE_SECONDS.
+    data should hold the subject ("sub") and the role claim.
     """
+    return _create_token(data, ACCESS_TOKEN_TYPE, ACCESS_TOKEN_EXPIRE_SECONDS)
+
+
+def create_refresh_token(sap_id: str, family: Optional[str] = None) -> str:
+    """
+    Create a refresh token valid for REFRESH_TOKEN_EXPIRE_SECONDS. Tokens
+    rotated from the same login share a family id, so a replayed token can
+    revoke the whole chain.
+    """
+    return _create_token(
+        {"sub": sap_id, "fam": family or uuid.uuid4().hex},
+        REFRESH_TOKEN_TYPE, REFRESH_TOKEN_EXPIRE_SECONDS)
+
+
+def _verify_token(token: str) -> Optional[Dict[str, Any]]:
     try:
-        payload = jwt.decode(
+        return jwt.decode(
             token,
             JWT_SECRET,
             algorithms=[ALGORITHM],
-            options={"verify_exp": False}  # Don't verify expiration
+            options={"require": ["exp", "iat", "jti", "sub", "type"]}
         )
-        return payload
     except jwt.PyJWTError:
         return None
+
+
+# Claims keyed by the exact token string, so a hit is only possible for a
+# token whose signature was verified. Invalid tokens aren't cached: any
+# client can make up as many as it likes and would push valid ones out
+token_claims_cache = TTLCache(
+    max_size=TOKEN_CACHE_MAX_SIZE,
+    ttl=TOKEN_CACHE_TTL_SECONDS,
+    cache_none=False
+)
+
+
+def decode_token(token: str, token_type: str = ACCESS_TOKEN_TYPE) -> Optional[Dict[str, Any]]:
+    """
+    Decode and verify a JWT token of the given type; None if it is invalid,
+    expired or of another type. Revocation is checked separately. Verified
+    claims are cached and shared between requests, so callers must not
+    modify them.
+    """
+    payload = token_claims_cache.get_or_load(token, _verify_token)
+    if payload is None or payload["type"] != token_type or payload["exp"] <= time.time():
+        return None
+    return payload
@@ -0,0 +1,54 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Tuple
+
+
+class TTLCache:
+    """
+    Small thread-safe LRU cache whose entries expire after a fixed TTL.
+    A loader result of None is cached too, so repeated misses for unknown
+    keys don't hit the database on every request, unless cache_none is off.
+    """
+
+    def __init__(self, max_size: int, ttl: float, cache_none: bool = True):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.cache_none = cache_none
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_load(self, key: Hashable, loader: Callable[[Hashable], Any]) -> Any:
+        """Return the cached value for key, loading it on a miss."""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        # Load outside the lock so a slow query doesn't block other lookups
+        value = loader(key)
+        if value is None and not self.cache_none:
+            return value
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Drop a single entry."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
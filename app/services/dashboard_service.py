@@ -0,0 +1,59 @@
+import os
+from typing import Dict
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.models import Cell, Line, Loop, Member, Plant, Planner, TeamLeader, User, Zone
+from app.services.cache import TTLCache
+
+# Configuration
+# Longest a dashboard may show counts that missed a change made elsewhere,
+# e.g. by another worker process; this process's admin writes invalidate
+DASHBOARD_STATS_MAX_STALENESS_SECONDS = float(
+    os.getenv("DASHBOARD_STATS_MAX_STALENESS_SECONDS", "60"))
+
+_STATS_KEY = "stats"
+
+dashboard_stats_cache = TTLCache(
+    max_size=1,
+    ttl=DASHBOARD_STATS_MAX_STALENESS_SECONDS
+)
+
+
+def _live_count(model):
+    return select(func.count()).select_from(model).where(
+        model.is_deleted == False).scalar_subquery()
+
+
+def _live_user_count(model):
+    return select(func.count()).select_from(model).join(User).where(
+        User.is_deleted == False).scalar_subquery()
+
+
+def count_dashboard_stats(db: Session) -> Dict[str, int]:
+    """Live entity and user counts in a single statement of scalar subqueries."""
+    counts = {
+        "plants": _live_count(Plant),
+        "zones": _live_count(Zone),
+        "loops": _live_count(Loop),
+        "lines": _live_count(Line),
+        "cells": _live_count(Cell),
+        "planners": _live_user_count(Planner),
+        "teamLeaders": _live_user_count(TeamLeader),
+        "members": _live_user_count(Member),
+    }
+
+    row = db.execute(select(*[
+        subquery.label(name) for name, subquery in counts.items()
+    ])).one()
+    return {name: value or 0 for name, value in row._mapping.items()}
+
+
+def cached_dashboard_stats(db: Session) -> Dict[str, int]:
+    """Dashboard counts, from the cache while they are fresh enough."""
+    return dashboard_stats_cache.get_or_load(
+        _STATS_KEY, lambda _: count_dashboard_stats(db))
+
+
+def invalidate_dashboard_stats() -> None:
+    """Drop the cached counts, e.g. after an admin creates or deletes an entity."""
+    dashboard_stats_cache.invalidate(_STATS_KEY)
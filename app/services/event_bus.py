@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional
+
+# Configuration
+EVENT_QUEUE_MAX_SIZE = 256
+
+
+def plant_topic(plant_id: int) -> str:
+    return f"plant:{plant_id}"
+
+
+def line_topic(line_id: int) -> str:
+    return f"line:{line_id}"
+
+
+class Subscription:
+    """
+    A subscriber's bounded queue. When it is full the oldest event is
+    dropped, so a slow client only loses history, never blocks publishers.
+    """
+
+    def __init__(self, topics: Iterable[str], max_size: int, loop: asyncio.AbstractEventLoop):
+        self.topics = frozenset(topics)
+        self.dropped = 0
+        self._events = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        self._loop = loop
+        self._ready = asyncio.Event()
+
+    def push(self, event: Dict[str, Any]) -> None:
+        """Queue an event; safe to call from any thread."""
+        with self._lock:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # The subscriber's loop has closed; it is about to unsubscribe
+            pass
+
+    async def next_batch(self, timeout: float) -> List[Dict[str, Any]]:
+        """Wait up to timeout seconds for events and return all queued ones."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return []
+
+        with self._lock:
+            self._ready.clear()
+            events = list(self._events)
+            self._events.clear()
+        return events
+
+    def take_dropped(self) -> int:
+        """Number of events dropped since the last call."""
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        return dropped
+
+
+class EventBus:
+    """In-process pub/sub fanning events out to subscribers by topic."""
+
+    def __init__(self, max_queue_size: int = EVENT_QUEUE_MAX_SIZE):
+        self._max_queue_size = max_queue_size
+        self._subscriptions: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, topics: Iterable[str], max_queue_size: Optional[int] = None) -> Subscription:
+        """Subscribe from a coroutine; events are delivered on its event loop."""
+        subscription = Subscription(
+            topics, max_queue_size or self._max_queue_size, asyncio.get_running_loop())
+        with self._lock:
+            for topic in subscription.topics:
+                self._subscriptions.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            for topic in subscription.topics:
+                subscribers = self._subscriptions.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscriptions[topic]
+
+    def publish(self, topics: Iterable[str], event: Dict[str, Any]) -> int:
+        """
+        Deliver an event once to every subscriber of any of the topics.
+        Never blocks; returns the number of subscribers reached.
+        """
+        with self._lock:
+            subscribers = set()
+            for topic in topics:
+                subscribers.update(self._subscriptions.get(topic, ()))
+
+        for subscription in subscribers:
+            subscription.push(event)
+        return len(subscribers)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len({subscription for subscribers in self._subscriptions.values()
+                        for subscription in subscribers})
+
+
+event_bus = EventBus()
+
+
+def publish_line_event(plant_id: Optional[int], line_id: int, event: Dict[str, Any]) -> int:
+    """Publish a change on a line to its line and plant subscribers."""
+    topics = [line_topic(line_id)]
+    if plant_id is not None:
+        topics.append(plant_topic(plant_id))
+    return event_bus.publish(topics, dict(event, line_id=line_id, plant_id=plant_id))
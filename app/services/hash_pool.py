@@ -0,0 +1,120 @@
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List
+
+# Configuration
+# bcrypt releases the GIL, so one thread per core keeps every core busy
+# without oversubscribing them
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(os.cpu_count() or 1)))
+# Calls allowed to wait for a worker; beyond that callers are turned away
+# rather than queueing for longer than a client would wait (~4s at 250ms)
+HASH_POOL_MAX_QUEUE = int(os.getenv("HASH_POOL_MAX_QUEUE", str(HASH_POOL_WORKERS * 16)))
+
+
+class HashPoolBusy(Exception):
+    """The password hashing queue is full."""
+
+
+class HashPool:
+    """
+    Dedicated, bounded pool for bcrypt hashing and verification, so a burst
+    of logins queues here instead of occupying the event loop or the shared
+    request threadpool. Keeps queue-depth and latency metrics.
+    """
+
+    def __init__(self, workers: int = HASH_POOL_WORKERS, max_queue: int = HASH_POOL_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="hash-pool")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._max_queued = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def submit(self, function: Callable[..., Any], *args: Any) -> Future:
+        """Queue a call; raises HashPoolBusy when the queue is full."""
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise HashPoolBusy()
+            self._pending += 1
+            self._submitted += 1
+            self._max_queued = max(self._max_queued, self._pending - self._running)
+
+        return self._executor.submit(self._timed, time.perf_counter(), function, *args)
+
+    def _timed(self, queued_at: float, function: Callable[..., Any], *args: Any) -> Any:
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            waited = started - queued_at
+            self._wait_seconds += waited
+            self._max_wait_seconds = max(self._max_wait_seconds, waited)
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._pending -= 1
+                self._completed += 1
+                self._run_seconds += time.perf_counter() - started
+
+    async def run(self, function: Callable[..., Any], *args: Any) -> Any:
+        """Await a call from a coroutine without holding a thread while queued."""
+        return await asyncio.wrap_future(self.submit(function, *args))
+
+    def call(self, function: Callable[..., Any], *args: Any) -> Any:
+        """Run a call from synchronous code and wait for its result."""
+        return self.submit(function, *args).result()
+
+    def map(self, function: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """
+        Run function over items from synchronous code, results in order.
+        A bulk job keeps at most one call per worker queued at a time, so it
+        shares the pool with logins and other jobs instead of flooding it;
+        raises HashPoolBusy if the queue fills up before it is done.
+        """
+        futures = deque()
+        results = []
+        try:
+            for item in items:
+                if len(futures) >= self.workers:
+                    results.append(futures.popleft().result())
+                futures.append(self.submit(function, item))
+            while futures:
+                results.append(futures.popleft().result())
+        finally:
+            # Calls already queued still run; let them finish before leaving
+            wait(futures)
+        return results
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "max_queued": self._max_queued,
+                "submitted": self._submitted,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "mean_wait_ms": round(self._wait_seconds / completed * 1000, 2),
+                "max_wait_ms": round(self._max_wait_seconds * 1000, 2),
+                "mean_run_ms": round(self._run_seconds / completed * 1000, 2),
+            }
+
+
+hash_pool = HashPool()
@@ -0,0 +1,311 @@
+import csv
+import io
+from itertools import islice
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+from zipfile import BadZipFile
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models import Cell, Line, Loop, Member, Plant, Planner, TeamLeader, User, UserRole, Zone
+from app.services.auth_service import hash_passwords
+from app.services.dashboard_service import invalidate_dashboard_stats
+from app.services.principal_cache import principal_cache
+from app.services.role_context import invalidate_role_context
+
+# Configuration
+IMPORT_BATCH_SIZE = 1000
+
+# Hierarchy levels top down, with their model
+IMPORT_LEVELS = (
+    ("plant", Plant),
+    ("zone", Zone),
+    ("loop", Loop),
+    ("line", Line),
+    ("cell", Cell),
+)
+HIERARCHY_COLUMNS = tuple(level for level, _ in IMPORT_LEVELS)
+USER_COLUMNS = ("sap_id", "name", "role")
+IMPORT_COLUMNS = HIERARCHY_COLUMNS + USER_COLUMNS
+
+# Importable user role -> (role record, the level it is assigned to)
+IMPORT_ROLES = {
+    UserRole.MEMBER: (Member, "cell"),
+    UserRole.TEAM_LEADER: (TeamLeader, "line"),
+    UserRole.PLANNER: (Planner, "plant"),
+}
+
+
+class ImportFileError(ValueError):
+    """The upload can't be read as an import file at all."""
+
+
+# Reading
+
+def read_import_rows(filename: str, file: BinaryIO) -> Iterator[Tuple[int, Dict[str, str]]]:
+    """
+    (row number, values by column) for each non-blank row of a CSV or XLSX
+    file, streamed from the file. Row 1 is the header naming the columns.
+    """
+    if filename.lower().endswith(".xlsx"):
+        rows = _xlsx_rows(file)
+    elif filename.lower().endswith(".csv"):
+        rows = csv.reader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    else:
+        raise ImportFileError("Import files must be .csv or .xlsx")
+    rows = _readable(rows)
+
+    header = next(rows, None)
+    if header is None:
+        raise ImportFileError("The file is empty")
+
+    columns = [_cell_text(value).lower() for value in header]
+    unknown = [column for column in columns if column and column not in IMPORT_COLUMNS]
+    if unknown:
+        raise ImportFileError(
+            f"Unknown columns: {', '.join(unknown)}; expected {', '.join(IMPORT_COLUMNS)}")
+    if "plant" not in columns:
+        raise ImportFileError("The plant column is required")
+
+    for row_number, values in enumerate(rows, start=2):
+        row = {column: _cell_text(value)
+               for column, value in zip(columns, values) if column}
+        if any(row.values()):
+            yield row_number, row
+
+
+def _readable(rows: Iterator) -> Iterator:
+    # Decoding and parsing happen as the rows are read
+    try:
+        yield from rows
+    except UnicodeDecodeError:
+        raise ImportFileError("CSV files must be UTF-8 encoded")
+    except csv.Error as e:
+        raise ImportFileError(f"The CSV file can't be parsed: {e}")
+    except (BadZipFile, InvalidFileException):
+        raise ImportFileError("The XLSX file can't be opened")
+
+
+def _xlsx_rows(file: BinaryIO) -> Iterator[tuple]:
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def _cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    # Spreadsheets turn numeric SAP IDs into floats
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+# Validation
+
+class _ImportPlan:
+    """What a file adds: new hierarchy paths per level and new users."""
+
+    def __init__(self):
+        self.paths = {level: {} for level in HIERARCHY_COLUMNS}
+        self.users: List[Dict[str, Any]] = []
+        self.errors: List[Dict[str, Any]] = []
+
+
+def _existing_hierarchy(db: Session, plant_names) -> Dict[tuple, int]:
+    """Live entity ids by name path, e.g. ("Plant", "Zone") -> zone id."""
+    ids: Dict[tuple, int] = {}
+    paths_by_id: Dict[int, tuple] = {}
+
+    for index, (_, model) in enumerate(IMPORT_LEVELS):
+        if index == 0:
+            rows = db.query(model.id, model.name).filter(
+                model.name.in_(plant_names), model.is_deleted == False)
+            level_paths = {entity_id: (name,) for entity_id, name in rows}
+        else:
+            parent_key = getattr(model, f"{HIERARCHY_COLUMNS[index - 1]}_id")
+            rows = db.query(model.id, parent_key, model.name).filter(
+                parent_key.in_(list(paths_by_id)), model.is_deleted == False)
+            level_paths = {entity_id: paths_by_id[parent] + (name,)
+                           for entity_id, parent, name in rows}
+
+        ids.update((path, entity_id) for entity_id, path in level_paths.items())
+        paths_by_id = level_paths
+
+    return ids
+
+
+def _validate_row(row: Dict[str, str], existing_users, seen_users) -> Tuple[Optional[str], tuple, Optional[Dict[str, Any]]]:
+    """The row's error, hierarchy path and user, if any."""
+    names = [row.get(level, "") for level in HIERARCHY_COLUMNS]
+    depth = next((index for index, name in enumerate(names) if not name), len(names))
+    if depth == 0:
+        return "plant is required", (), None
+    for index in range(depth, len(names)):
+        if names[index]:
+            return f"{HIERARCHY_COLUMNS[index]} given without {HIERARCHY_COLUMNS[depth]}", (), None
+    path = tuple(names[:depth])
+
+    sap_id, name, role = (row.get(column, "") for column in USER_COLUMNS)
+    if not sap_id:
+        if name or role:
+            return "sap_id is required for a user", path, None
+        return None, path, None
+
+    try:
+        role = UserRole(role.upper() or UserRole.MEMBER)
+    except ValueError:
+        role = None
+    if role not in IMPORT_ROLES:
+        allowed = ", ".join(allowed_role.value for allowed_role in IMPORT_ROLES)
+        return f"role must be one of {allowed}", path, None
+
+    level = IMPORT_ROLES[role][1]
+    if depth <= HIERARCHY_COLUMNS.index(level):
+        return f"A {role.value} needs a {level}", path, None
+    if not name:
+        return "name is required for a user", path, None
+    if sap_id in existing_users:
+        return "A user with this SAP ID already exists", path, None
+    if sap_id in seen_users:
+        return f"SAP ID {sap_id} already appears in row {seen_users[sap_id]}", path, None
+
+    user = {
+        "sap_id": sap_id,
+        "name": name,
+        "role": role,
+        "path": path[:HIERARCHY_COLUMNS.index(level) + 1]
+    }
+    return None, path, user
+
+
+def _batches(rows: Iterator, size: int) -> Iterator[list]:
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+def _plan_import(db: Session, rows: Iterator[Tuple[int, Dict[str, str]]]) -> Tuple[_ImportPlan, Dict[tuple, int]]:
+    """
+    Validate the rows against the live hierarchy and users, reading
+    IMPORT_BATCH_SIZE rows at a time; only what they add is kept.
+    """
+    plan = _ImportPlan()
+    ids: Dict[tuple, int] = {}
+    loaded_plants = set()
+    seen_users: Dict[str, int] = {}
+
+    for batch in _batches(rows, IMPORT_BATCH_SIZE):
+        # Soft-deleted users keep their SAP ID as primary key
+        sap_ids = list({row["sap_id"] for _, row in batch if row.get("sap_id")})
+        existing_users = {sap_id for sap_id, in db.query(User.sap_id).filter(
+            User.sap_id.in_(sap_ids))}
+
+        plant_names = {row.get("plant", "") for _, row in batch} - loaded_plants
+        if plant_names:
+            ids.update(_existing_hierarchy(db, list(plant_names)))
+            loaded_plants |= plant_names
+
+        for row_number, row in batch:
+            error, path, user = _validate_row(row, existing_users, seen_users)
+            if error:
+                plan.errors.append({"row": row_number, "error": error})
+                continue
+
+            for depth in range(1, len(path) + 1):
+                if path[:depth] not in ids:
+                    plan.paths[HIERARCHY_COLUMNS[depth - 1]].setdefault(path[:depth], row_number)
+            if user:
+                seen_users[user["sap_id"]] = row_number
+                plan.users.append(user)
+
+    return plan, ids
+
+
+# Writing
+
+def _insert_hierarchy(db: Session, plan: _ImportPlan, ids: Dict[tuple, int]) -> None:
+    """
+    Insert the new entities level by level, filling in the denormalized
+    ancestor ids the ORM listeners would otherwise set.
+    """
+    for index, (level, model) in enumerate(IMPORT_LEVELS):
+        paths = list(plan.paths[level])
+        for start in range(0, len(paths), IMPORT_BATCH_SIZE):
+            batch = paths[start:start + IMPORT_BATCH_SIZE]
+            rows = [dict(
+                {f"{ancestor}_id": ids[path[:depth + 1]]
+                 for depth, ancestor in enumerate(HIERARCHY_COLUMNS[:index])},
+                name=path[-1]
+            ) for path in batch]
+
+            new_ids = db.execute(
+                insert(model).returning(model.id, sort_by_parameter_order=True), rows
+            ).scalars().all()
+            ids.update(zip(batch, new_ids))
+
+
+def _insert_users(db: Session, users: List[Dict[str, Any]], passwords: List[str],
+                  ids: Dict[tuple, int]) -> None:
+    db.execute(insert(User), [{
+        "sap_id": user["sap_id"],
+        "name": user["name"],
+        "role": user["role"],
+        "password": password
+    } for user, password in zip(users, passwords)])
+
+    for role, (model, level) in IMPORT_ROLES.items():
+        records = [{
+            "user_id": user["sap_id"],
+            f"{level}_id": ids[user["path"]]
+        } for user in users if user["role"] == role]
+        if records:
+            db.execute(insert(model), records)
+
+
+def import_master_data(
+    db: Session,
+    rows: Iterator[Tuple[int, Dict[str, str]]],
+    dry_run: bool = False,
+    password_hasher: Callable[[List[str]], List[str]] = hash_passwords
+) -> Dict[str, Any]:
+    """
+    Import plants, zones, loops, lines, cells and their users from rows of
+    read_import_rows(). Rows naming an existing entity reuse it. Invalid
+    rows are skipped and reported; everything else is written in one
+    transaction, so a failure imports nothing. Passwords are hashed before
+    it starts to keep the transaction short.
+    """
+    plan, ids = _plan_import(db, rows)
+
+    created = {f"{level}s": len(plan.paths[level]) for level in HIERARCHY_COLUMNS}
+    created.update({f"{role.value.lower()}s": sum(
+        user["role"] == role for user in plan.users) for role in IMPORT_ROLES})
+    result = {"created": created, "errors": plan.errors, "dry_run": dry_run}
+    if dry_run:
+        return result
+
+    # Passwords start out as the SAP ID, like users created one at a time
+    passwords = password_hasher([user["sap_id"] for user in plan.users])
+
+    try:
+        _insert_hierarchy(db, plan, ids)
+        for start in range(0, len(plan.users), IMPORT_BATCH_SIZE):
+            end = start + IMPORT_BATCH_SIZE
+            _insert_users(db, plan.users[start:end], passwords[start:end], ids)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Drop cached lookups, including cached misses, for the new SAP IDs
+    for user in plan.users:
+        principal_cache.invalidate(user["sap_id"])
+        invalidate_role_context(user["sap_id"])
+    invalidate_dashboard_stats()
+
+    return result
@@ -0,0 +1,106 @@
+import base64
+import binascii
+import json
+import os
+from typing import Any, Hashable, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, String, tuple_, type_coerce
+from sqlalchemy.orm import Query
+from app.services.cache import TTLCache
+
+# Configuration
+PAGINATION_COUNT_CACHE_MAX_SIZE = 1024
+PAGINATION_COUNT_CACHE_TTL_SECONDS = float(
+    os.getenv("PAGINATION_COUNT_CACHE_TTL_SECONDS", "30"))
+
+# exact: COUNT(*) on every call; cached: COUNT(*) at most once per TTL per
+# list; none: no total at all
+COUNT_MODES = ("exact", "cached", "none")
+COUNT_MODE_PATTERN = "^(" + "|".join(COUNT_MODES) + ")$"
+
+# Totals keyed by list name and scope, e.g. ("shifts", plant_id)
+count_cache = TTLCache(
+    max_size=PAGINATION_COUNT_CACHE_MAX_SIZE,
+    ttl=PAGINATION_COUNT_CACHE_TTL_SECONDS
+)
+
+
+def encode_cursor(values: List[Any]) -> str:
+    """Opaque continuation token for the sort key values of a page's last row."""
+    return base64.urlsafe_b64encode(
+        json.dumps(values, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """Sort key values from a token made by encode_cursor()."""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        values = None
+
+    # Only values _cursor_value() produces; anything else can't be bound
+    if not isinstance(values, list) or len(values) != size or not all(
+            value is None or type(value) in (int, str) for value in values):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return values
+
+
+def _cursor_key(column):
+    # Compare timestamps as the text the database stores: SQLite keeps
+    # CURRENT_TIMESTAMP defaults without microseconds, and a re-bound
+    # datetime would never equal them
+    if isinstance(column.type, DateTime):
+        return type_coerce(column, String)
+    return column
+
+
+def _cursor_value(value: Any) -> Any:
+    # Drivers with a native timestamp type return datetimes
+    return value if isinstance(value, (int, str)) or value is None else str(value)
+
+
+def keyset_page(
+    query: Query,
+    keys: list,
+    limit: int,
+    cursor: Optional[str] = None,
+    descending: bool = False,
+    offset: int = 0
+) -> Tuple[list, Optional[str]]:
+    """
+    One page of query ordered by keys, which must be unique together,
+    starting after the row the cursor points at. Seeks on the keys instead
+    of skipping rows, so deep pages cost as much as the first one; offset
+    is only for callers still paging by number.
+    Returns the page and the cursor of the next one, None on the last page.
+    """
+    keys = [_cursor_key(key) for key in keys]
+    query = query.add_columns(*keys).order_by(
+        None).order_by(*[key.desc() if descending else key for key in keys])
+
+    if cursor is not None:
+        position = tuple_(*keys)
+        values = tuple_(*decode_cursor(cursor, len(keys)))
+        query = query.filter(position < values if descending else position > values)
+
+    # One extra row tells whether there is a next page
+    rows = query.offset(offset).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(
+            [_cursor_value(value) for value in rows[-1][1:]])
+
+    return [row[0] for row in rows], next_cursor
+
+
+def count_rows(query: Query, mode: str, key: Hashable) -> Optional[int]:
+    """Total rows of query in the given count mode; key identifies it in the cache."""
+    if mode == "none":
+        return None
+    if mode == "cached":
+        return count_cache.get_or_load(key, lambda _: query.order_by(None).count())
+    return query.order_by(None).count()
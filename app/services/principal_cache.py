@@ -0,0 +1,82 @@
+from typing import Any, Dict, Optional
+from app.database import SessionLocal
+from app.models import User, UserRole
+from app.services.cache import TTLCache
+
+# Configuration
+PRINCIPAL_CACHE_MAX_SIZE = 1024
+PRINCIPAL_CACHE_TTL_SECONDS = 60
+
+
+class Principal:
+    """
+    Lightweight, session-independent snapshot of an authenticated user.
+    Exposes the same attributes the routers read from request.state.user.
+    """
+
+    __slots__ = ("sap_id", "name", "role", "is_deleted")
+
+    def __init__(self, sap_id: str, name: str, role: UserRole, is_deleted: bool):
+        self.sap_id = sap_id
+        self.name = name
+        self.role = role
+        self.is_deleted = is_deleted
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            sap_id=user.sap_id,
+            name=user.name,
+            role=user.role,
+            is_deleted=bool(user.is_deleted)
+        )
+
+
+class ClaimsPrincipal:
+    """
+    Authenticated user taken from verified token claims. sap_id and role
+    come from the token, so authorization needs no database access; the
+    user row is only loaded (through the principal cache) when the name
+    is read.
+    """
+
+    __slots__ = ("sap_id", "role", "is_deleted", "_name")
+
+    def __init__(self, sap_id: str, role: UserRole):
+        self.sap_id = sap_id
+        self.role = role
+        self.is_deleted = False
+        self._name: Optional[str] = None
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> Optional["ClaimsPrincipal"]:
+        """None when the token has no usable role claim."""
+        try:
+            return cls(sap_id=claims["sub"], role=UserRole(claims["role"]))
+        except (KeyError, ValueError):
+            return None
+
+    @property
+    def name(self) -> str:
+        if self._name is None:
+            principal = principal_cache.get_or_load(self.sap_id, load_principal)
+            self._name = principal.name if principal else ""
+        return self._name
+
+
+def load_principal(sap_id: str) -> Optional[Principal]:
+    """Load a user snapshot from the database (principal cache miss)."""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.sap_id == sap_id).first()
+        return Principal.from_user(user) if user else None
+    finally:
+        db.close()
+
+
+# Principals keyed by the JWT subject (SAP ID); invalidate() an entry
+# whenever the user is created or deleted
+principal_cache = TTLCache(
+    max_size=PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=PRINCIPAL_CACHE_TTL_SECONDS
+)
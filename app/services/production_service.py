@@ -0,0 +1,107 @@
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import and_, case
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+from app.models import Hour, Line, Loop, Production, Zone
+from app.services.rollup_service import (
+    live_production_measures,
+    lock_rollup_writes,
+    production_deltas,
+    record_rollup_deltas
+)
+from app.services.upsert import UPSERT_INSERTS
+
+
+def upsert_productions(
+    db: Session,
+    rows: List[Dict[str, Any]],
+    update_columns: Iterable[str]
+) -> List[Production]:
+    """
+    Insert production rows, or update the live row that already exists for the
+    same shift, line and hour, in a single INSERT ... ON CONFLICT DO UPDATE.
+    Only update_columns (plus updated_at) are overwritten on conflict.
+    Returns the resulting Production objects in the same statement, and
+    applies the change to the rollups in the same transaction, which holds
+    the rollup lock of the shifts until the caller commits or rolls back.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise NotImplementedError(
+            f"Production upsert is not supported on {dialect}")
+
+    # Values before the write, so the rollups get only the difference; the
+    # lock keeps another save from changing them before this one commits
+    lock_rollup_writes(db, {row["shift_id"] for row in rows})
+    before = live_production_measures(db, rows)
+
+    statement = UPSERT_INSERTS[dialect](Production).values(rows)
+
+    updates = {column: statement.excluded[column] for column in update_columns}
+    updates["updated_at"] = func.now()
+
+    statement = statement.on_conflict_do_update(
+        index_elements=[Production.shift_id,
+                        Production.line_id, Production.hour],
+        index_where=Production.is_deleted == False,
+        set_=updates
+    ).returning(Production)
+
+    productions = db.scalars(
+        statement,
+        execution_options={"populate_existing": True}
+    ).all()
+
+    record_rollup_deltas(
+        db, production_deltas(before, productions, update_columns))
+
+    return productions
+
+
+# Measures in the shift production matrix, one lines x hours grid each
+MATRIX_MEASURES = ("plan", "achievement")
+
+
+def production_matrix(db: Session, shift_id: int, plant_id: int) -> Dict[str, Any]:
+    """
+    Plan and achievement of every live line in a plant for one shift, as a
+    dense lines x hours grid per measure (None where nothing is recorded),
+    ordered like the planner's line list. One grouped query pivots the
+    hours into columns, so the plant comes back as one row per line.
+    """
+    hours = list(Hour)
+    columns = [
+        # At most one live production per shift, line and hour, so max()
+        # just picks that row's value out of the group
+        func.max(case((Production.hour == hour, getattr(Production, measure))))
+        for measure in MATRIX_MEASURES
+        for hour in hours
+    ]
+
+    rows = db.query(Line.id, Line.name, *columns).join(
+        Loop, Line.loop_id == Loop.id
+    ).join(
+        Zone, Loop.zone_id == Zone.id
+    ).outerjoin(
+        Production, and_(
+            Production.line_id == Line.id,
+            Production.shift_id == shift_id,
+            Production.is_deleted == False
+        )
+    ).filter(
+        Line.plant_id == plant_id,
+        Line.is_deleted == False,
+        Loop.is_deleted == False,
+        Zone.is_deleted == False
+    ).group_by(Line.id, Line.name).order_by(Line.name, Line.id).all()
+
+    matrix = {
+        "shift_id": shift_id,
+        "hours": hours,
+        "line_ids": [row[0] for row in rows],
+        "line_names": [row[1] for row in rows],
+    }
+    for index, measure in enumerate(MATRIX_MEASURES):
+        start = 2 + index * len(hours)
+        matrix[measure] = [list(row[start:start + len(hours)]) for row in rows]
+    return matrix
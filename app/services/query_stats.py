@@ -0,0 +1,106 @@
+import os
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Configuration
+QUERY_STATS_ENABLED = os.getenv("QUERY_STATS", "0") == "1"
+# The same statement this many times in one request is reported as an N+1
+N_PLUS_ONE_THRESHOLD = int(os.getenv("QUERY_STATS_REPEAT_THRESHOLD", "3"))
+
+
+class QueryStats:
+    """SQL statements executed while tracking was active, by statement text."""
+
+    __slots__ = ("count", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.statements = Counter()
+
+    def record(self, statement: str) -> None:
+        self.count += 1
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> List[Tuple[str, int]]:
+        """Statements executed at least threshold times, most frequent first."""
+        return [(statement, count)
+                for statement, count in self.statements.most_common()
+                if count >= threshold]
+
+
+# Stats for the current request. The object is shared with the threadpool
+# and tasks the request spawns, since they run in a copy of this context.
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None)
+
+# Callbacks receiving (method, path, stats) after each tracked request
+_observers: List[Callable[[str, str, QueryStats], None]] = []
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Count the statements executed on any engine within the block."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+def tracking_requests() -> bool:
+    """Whether the middleware should track the current request."""
+    return QUERY_STATS_ENABLED or bool(_observers)
+
+
+def notify_observers(method: str, path: str, stats: QueryStats) -> None:
+    for observer in list(_observers):
+        observer(method, path, stats)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None) -> Iterator[list]:
+    """
+    Fail if any request handled within the block runs more than max_queries
+    statements, or repeats one statement more than max_repeats times.
+    Yields the list of (method, path, stats) seen so far.
+    """
+    requests = []
+
+    def observe(method, path, stats):
+        requests.append((method, path, stats))
+
+    _observers.append(observe)
+    try:
+        yield requests
+    finally:
+        _observers.remove(observe)
+
+    failures = []
+    for method, path, stats in requests:
+        if stats.count > max_queries:
+            failures.append(
+                f"{method} {path}: {stats.count} queries (budget {max_queries})")
+
+        if max_repeats is not None:
+            for statement, count in stats.repeated(max_repeats + 1):
+                failures.append(
+                    f"{method} {path}: {count}x (budget {max_repeats}) {statement}")
+
+    if failures:
+        raise QueryBudgetExceeded("\n".join(failures))
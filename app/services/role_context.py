@@ -0,0 +1,176 @@
+from typing import Callable, Optional
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.models import Line, Loop, Planner, Plant, TeamLeader, UserRole, Zone
+from app.services.cache import TTLCache
+
+# Configuration
+ROLE_CONTEXT_CACHE_MAX_SIZE = 1024
+ROLE_CONTEXT_CACHE_TTL_SECONDS = 300
+
+# Levels whose moves and deletes change the hierarchy in cached contexts
+CONTEXT_HIERARCHY_MODELS = (Plant, Zone, Loop, Line)
+_HIERARCHY_CHANGED_KEY = "role_context_hierarchy_changed"
+
+
+class TeamLeaderContext:
+    """A team leader with the ids of their whole line hierarchy."""
+
+    __slots__ = ("user_id", "line_id", "line_name",
+                 "loop_id", "zone_id", "plant_id")
+
+    def __init__(self, user_id: str, line_id: int, line_name: str,
+                 loop_id: Optional[int], zone_id: Optional[int], plant_id: Optional[int]):
+        self.user_id = user_id
+        self.line_id = line_id
+        self.line_name = line_name
+        self.loop_id = loop_id
+        self.zone_id = zone_id
+        self.plant_id = plant_id
+
+
+class PlannerContext:
+    """A planner with the id of their plant."""
+
+    __slots__ = ("user_id", "plant_id")
+
+    def __init__(self, user_id: str, plant_id: int):
+        self.user_id = user_id
+        self.plant_id = plant_id
+
+
+# Contexts keyed by SAP ID. FastAPI already caches a dependency within a
+# request; these caches carry contexts across requests and must be
+# invalidated when a role record or the hierarchy above it changes.
+team_leader_contexts = TTLCache(
+    max_size=ROLE_CONTEXT_CACHE_MAX_SIZE,
+    ttl=ROLE_CONTEXT_CACHE_TTL_SECONDS
+)
+planner_contexts = TTLCache(
+    max_size=ROLE_CONTEXT_CACHE_MAX_SIZE,
+    ttl=ROLE_CONTEXT_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_role_context(sap_id: str) -> None:
+    """Drop cached contexts for one user, e.g. after their role record changes."""
+    team_leader_contexts.invalidate(sap_id)
+    planner_contexts.invalidate(sap_id)
+
+
+def invalidate_all_role_contexts() -> None:
+    """Drop every cached context, e.g. after a plant/zone/loop/line is moved or deleted."""
+    team_leader_contexts.clear()
+    planner_contexts.clear()
+
+
+@event.listens_for(Session, "after_flush")
+def _note_hierarchy_changes(session: Session, flush_context) -> None:
+    # The session still lists what this flush wrote; the contexts are only
+    # dropped once it commits, so a reload can't see the old hierarchy
+    if any(isinstance(instance, CONTEXT_HIERARCHY_MODELS)
+           for instance in (*session.dirty, *session.deleted)):
+        session.info[_HIERARCHY_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    if session.info.pop(_HIERARCHY_CHANGED_KEY, False):
+        invalidate_all_role_contexts()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction) -> None:
+    # Rolled back or closed without committing
+    if transaction.parent is None:
+        session.info.pop(_HIERARCHY_CHANGED_KEY, None)
+
+
+def _require_user(request: Request):
+    user = request.state.user
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required"
+        )
+    return user
+
+
+def require_role(role: UserRole) -> Callable[[Request], object]:
+    """
+    Dependency factory admitting only callers whose token carries role, so
+    other roles are turned away before any database access.
+    """
+
+    def dependency(request: Request):
+        user = _require_user(request)
+        if user.role != role:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"{role.value.replace('_', ' ').title()} privileges required"
+            )
+        return user
+
+    return dependency
+
+
+def _load_team_leader_context(db: Session, sap_id: str) -> Optional[TeamLeaderContext]:
+    """Resolve a team leader and their line, loop, zone and plant in one query."""
+    row = db.query(
+        TeamLeader.user_id,
+        Line.id,
+        Line.name,
+        Line.loop_id,
+        Line.zone_id,
+        Line.plant_id
+    ).join(
+        Line, TeamLeader.line_id == Line.id
+    ).filter(
+        TeamLeader.user_id == sap_id,
+        TeamLeader.is_deleted == False
+    ).first()
+
+    return TeamLeaderContext(*row) if row else None
+
+
+def _load_planner_context(db: Session, sap_id: str) -> Optional[PlannerContext]:
+    row = db.query(
+        Planner.user_id,
+        Planner.plant_id
+    ).filter(
+        Planner.user_id == sap_id,
+        Planner.is_deleted == False
+    ).first()
+
+    return PlannerContext(*row) if row else None
+
+
+def get_team_leader_context(request: Request, db: Session = Depends(get_db)) -> TeamLeaderContext:
+    """Dependency resolving the calling team leader and their hierarchy."""
+    user = _require_user(request)
+
+    context = team_leader_contexts.get_or_load(
+        user.sap_id, lambda sap_id: _load_team_leader_context(db, sap_id))
+
+    if not context:
+        raise HTTPException(status_code=404, detail="Team leader not found")
+
+    return context
+
+
+def get_planner_context(request: Request, db: Session = Depends(get_db)) -> PlannerContext:
+    """Dependency resolving the calling planner and their plant."""
+    user = _require_user(request)
+
+    context = planner_contexts.get_or_load(
+        user.sap_id, lambda sap_id: _load_planner_context(db, sap_id))
+
+    if not context:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Planner profile not found"
+        )
+
+    return context
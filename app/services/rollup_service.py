@@ -0,0 +1,281 @@
+from typing import Any, Dict, Iterable, List
+from sqlalchemy import delete, func, insert, literal, null, select
+from sqlalchemy.orm import Session
+from app.models import DayRollup, Line, Loss, Production, Shift, ShiftRollup
+from app.services.upsert import UPSERT_INSERTS
+
+# Rolled up per entity at every level, top down
+ROLLUP_LEVELS = ("plant", "zone", "loop", "line")
+
+# Ancestor columns on rollup rows, in level order
+ANCESTRY_COLUMNS = ("plant_id", "zone_id", "loop_id", "line_id")
+
+# Each level's id on the denormalized line ancestry
+LINE_ANCESTRY = {
+    "plant": Line.plant_id,
+    "zone": Line.zone_id,
+    "loop": Line.loop_id,
+    "line": Line.id,
+}
+
+PRODUCTION_MEASURES = ("plan", "achievement", "scraps", "defects", "flash")
+MEASURES = PRODUCTION_MEASURES + ("loss",)
+
+# Rollup model -> (period columns; the first identifies a row together
+# with level and entity_id)
+ROLLUP_PERIODS = {
+    ShiftRollup: ("shift_id", "day"),
+    DayRollup: ("day",),
+}
+
+
+def live_loss_totals():
+    """Live loss amount per production, as a subquery to join productions on."""
+    return select(
+        Loss.production_id,
+        func.sum(Loss.amount).label("amount")
+    ).where(
+        Loss.is_deleted == False
+    ).group_by(Loss.production_id).subquery()
+
+
+# Incremental maintenance
+
+def lock_rollup_writes(db: Session, shift_ids: Iterable[int]) -> None:
+    """
+    Serialize rollup-maintaining writes to the given shifts until the
+    caller's transaction ends, so reading the current measures and adding
+    the difference can't interleave with another save. PostgreSQL locks
+    the shift rows; SQLite takes its write lock up front with BEGIN
+    IMMEDIATE, unless the transaction already wrote and so holds it.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        db.execute(select(Shift.id).where(
+            Shift.id.in_(set(shift_ids))
+        ).order_by(Shift.id).with_for_update())
+    elif dialect == "sqlite":
+        connection = db.connection()
+        # pysqlite only opens a transaction before its first write
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def live_production_measures(db: Session, rows: List[Dict[str, Any]]) -> Dict[tuple, Dict[str, int]]:
+    """Current measures of the live productions the rows are about to upsert."""
+    if not rows:
+        return {}
+
+    existing = db.query(
+        Production.shift_id,
+        Production.line_id,
+        Production.hour,
+        *[getattr(Production, measure) for measure in PRODUCTION_MEASURES]
+    ).filter(
+        Production.shift_id.in_({row["shift_id"] for row in rows}),
+        Production.line_id.in_({row["line_id"] for row in rows}),
+        Production.hour.in_({row["hour"] for row in rows}),
+        Production.is_deleted == False
+    ).all()
+
+    return {
+        tuple(row[:3]): dict(zip(PRODUCTION_MEASURES, row[3:]))
+        for row in existing
+    }
+
+
+def production_deltas(
+    before: Dict[tuple, Dict[str, int]],
+    productions: Iterable[Production],
+    update_columns: Iterable[str]
+) -> List[Dict[str, Any]]:
+    """
+    Per-production change between the measures before a write and after it.
+    Existing productions only change in update_columns; new ones count in full.
+    """
+    update_columns = set(update_columns)
+    updated = [measure for measure in PRODUCTION_MEASURES
+               if measure in update_columns]
+    deltas = []
+    for production in productions:
+        key = (production.shift_id, production.line_id, production.hour)
+        old = before.get(key, {})
+        delta = {"shift_id": production.shift_id, "line_id": production.line_id}
+        for measure in updated if key in before else PRODUCTION_MEASURES:
+            delta[measure] = (getattr(production, measure) or 0) - \
+                (old.get(measure) or 0)
+        deltas.append(delta)
+    return deltas
+
+
+def record_rollup_deltas(db: Session, deltas: Iterable[Dict[str, Any]]) -> None:
+    """
+    Add changes for (shift_id, line_id) to the shift and day rollups of the
+    line and every ancestor, e.g. {"shift_id": 1, "line_id": 2, "loss": -5}.
+    Runs in the caller's transaction; commit together with the write.
+    """
+    # Sum the deltas per shift and line, dropping the ones that change nothing
+    totals = {}
+    for delta in deltas:
+        entry = totals.setdefault(
+            (delta["shift_id"], delta["line_id"]), dict.fromkeys(MEASURES, 0))
+        for measure in MEASURES:
+            entry[measure] += delta.get(measure) or 0
+
+    totals = {key: measures for key, measures in totals.items()
+              if any(measures.values())}
+    if not totals:
+        return
+
+    shift_dates = dict(db.query(Shift.id, Shift.date).filter(
+        Shift.id.in_({shift_id for shift_id, _ in totals})
+    ).all())
+    lines = {line.id: line for line in db.query(
+        Line.id, Line.loop_id, Line.zone_id, Line.plant_id
+    ).filter(
+        Line.id.in_({line_id for _, line_id in totals})
+    ).all()}
+
+    shift_rows, day_rows = {}, {}
+    for (shift_id, line_id), measures in totals.items():
+        line, shift_date = lines.get(line_id), shift_dates.get(shift_id)
+        if line is None or shift_date is None:
+            continue
+
+        ancestry = (line.plant_id, line.zone_id, line.loop_id, line.id)
+        day = shift_date.date()
+        for index, level in enumerate(ROLLUP_LEVELS):
+            if ancestry[index] is None:
+                continue
+
+            row = {"level": level, "entity_id": ancestry[index], "day": day}
+            row.update(zip(ANCESTRY_COLUMNS,
+                           ancestry[:index + 1] + (None,) * (3 - index)))
+
+            _accumulate(shift_rows, (level, ancestry[index], shift_id),
+                        dict(row, shift_id=shift_id), measures)
+            _accumulate(day_rows, (level, ancestry[index], day), row, measures)
+
+    _upsert_deltas(db, ShiftRollup, list(shift_rows.values()))
+    _upsert_deltas(db, DayRollup, list(day_rows.values()))
+
+
+def _accumulate(rows, key, row, measures):
+    entry = rows.get(key)
+    if entry is None:
+        rows[key] = dict(row, **measures)
+    else:
+        for measure in MEASURES:
+            entry[measure] += measures[measure]
+
+
+def _upsert_deltas(db: Session, model, rows: List[Dict[str, Any]]) -> None:
+    """Insert rollup rows, or add their measures to the existing ones."""
+    if not rows:
+        return
+
+    dialect = db.get_bind().dialect.name
+    if dialect not in UPSERT_INSERTS:
+        raise NotImplementedError(
+            f"Rollup upsert is not supported on {dialect}")
+
+    statement = UPSERT_INSERTS[dialect](model).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[model.level, model.entity_id,
+                        getattr(model, ROLLUP_PERIODS[model][0])],
+        set_={measure: getattr(model, measure) + statement.excluded[measure]
+              for measure in MEASURES}
+    )
+    db.execute(statement)
+
+
+# Rebuild and consistency check
+
+def _raw_rollup_select(model, level: str):
+    """Rollup rows for one level aggregated from the raw productions and losses."""
+    level_index = ROLLUP_LEVELS.index(level)
+    ancestry = [
+        LINE_ANCESTRY[ROLLUP_LEVELS[index]] if index <= level_index else null()
+        for index in range(len(ROLLUP_LEVELS))
+    ]
+    day = func.date(Shift.date)
+    period = [Shift.id, day] if model is ShiftRollup else [day]
+
+    loss_totals = live_loss_totals()
+    return select(
+        literal(level),
+        LINE_ANCESTRY[level],
+        *ancestry,
+        *period,
+        *[func.coalesce(func.sum(getattr(Production, measure)), 0)
+          for measure in PRODUCTION_MEASURES],
+        func.coalesce(func.sum(loss_totals.c.amount), 0)
+    ).select_from(Production).join(
+        Shift, Production.shift_id == Shift.id
+    ).join(
+        Line, Production.line_id == Line.id
+    ).outerjoin(
+        loss_totals, loss_totals.c.production_id == Production.id
+    ).where(
+        Production.is_deleted == False,
+        LINE_ANCESTRY[level].isnot(None)
+    ).group_by(*ancestry[:level_index + 1], *period)
+
+
+def _rollup_columns(model) -> List[str]:
+    return ["level", "entity_id", *ANCESTRY_COLUMNS,
+            *ROLLUP_PERIODS[model], *MEASURES]
+
+
+def rebuild_rollups(db: Session) -> Dict[str, int]:
+    """Recompute every rollup from the raw data. Returns row counts per table."""
+    counts = {}
+    for model in ROLLUP_PERIODS:
+        db.execute(delete(model))
+        for level in ROLLUP_LEVELS:
+            db.execute(insert(model).from_select(
+                _rollup_columns(model), _raw_rollup_select(model, level)))
+        counts[model.__tablename__] = db.query(func.count(model.id)).scalar()
+
+    db.commit()
+    return counts
+
+
+def check_rollups(db: Session) -> List[str]:
+    """
+    Compare every rollup row with the same aggregation over the raw data.
+    Returns one message per mismatching row; empty when consistent.
+    """
+    mismatches = []
+    for model, period in ROLLUP_PERIODS.items():
+        stored = {}
+        for row in db.query(
+            model.level,
+            model.entity_id,
+            getattr(model, period[0]),
+            *[getattr(model, measure) for measure in MEASURES]
+        ):
+            stored[_key(row[:3])] = tuple(row[3:])
+
+        # Raw rows are laid out like _rollup_columns()
+        measures_start = 2 + len(ANCESTRY_COLUMNS) + len(period)
+        expected = {}
+        for level in ROLLUP_LEVELS:
+            for row in db.execute(_raw_rollup_select(model, level)):
+                key = row[:2] + (row[2 + len(ANCESTRY_COLUMNS)],)
+                expected[_key(key)] = tuple(row[measures_start:])
+
+        zeros = (0,) * len(MEASURES)
+        for key in sorted(set(stored) | set(expected)):
+            actual, wanted = stored.get(key, zeros), expected.get(key, zeros)
+            if actual != wanted:
+                mismatches.append(
+                    f"{model.__tablename__} {key}: stored {dict(zip(MEASURES, actual))}, "
+                    f"raw {dict(zip(MEASURES, wanted))}")
+
+    return mismatches
+
+
+def _key(values) -> tuple:
+    # Dates come back as date objects from rollups and as strings from SQLite
+    return tuple(str(value) for value in values)
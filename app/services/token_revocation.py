@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.models import TokenRevocation
+from app.services.auth_service import REFRESH_TOKEN_EXPIRE_SECONDS
+
+# Configuration
+# How often a process picks up revocations written by other processes;
+# the process that revokes applies them as soon as they commit
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "5"))
+# Each sync re-reads rows revoked this long before the newest one seen, so
+# a transaction that commits after a later one still gets picked up; it
+# also has to cover clock differences between the processes
+REVOCATION_SYNC_WINDOW_SECONDS = float(os.getenv("REVOCATION_SYNC_WINDOW_SECONDS", "60"))
+
+# Revocations added to a session, applied in memory once it commits
+_PENDING_KEY = "pending_revocations"
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    """Naive UTC, as stored in the database."""
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _to_timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationSet:
+    """
+    In-memory mirror of the token_revocation table, so authenticating a
+    request takes two dict lookups instead of a database query: revoked
+    token ids (access token jti or refresh token family) with their expiry,
+    and per-user watermarks invalidating every token issued up to them.
+
+    Rows are append-only, so other processes' revocations are picked up by
+    loading rows revoked since the newest one seen, less a trailing window.
+    Ids and revoked_at are assigned before commit, so rows can become
+    visible out of order; reading only above the highest id seen would skip
+    a row that commits late for good.
+    """
+
+    def __init__(self, sync_seconds: float = REVOCATION_SYNC_SECONDS,
+                 sync_window_seconds: float = REVOCATION_SYNC_WINDOW_SECONDS):
+        self.sync_seconds = sync_seconds
+        self.sync_window_seconds = sync_window_seconds
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._token_ids: Dict[str, float] = {}
+        self._watermarks: Dict[str, float] = {}
+        self._latest_revoked_at = float("-inf")
+        self._synced_at = float("-inf")
+
+    def is_revoked(self, claims: Dict[str, Any]) -> bool:
+        """Whether verified token claims have been revoked."""
+        return claims["jti"] in self._token_ids or self.is_login_revoked(claims)
+
+    def is_login_revoked(self, claims: Dict[str, Any]) -> bool:
+        """Whether the token's refresh family or its user's tokens were revoked."""
+        family = claims.get("fam")
+        if family is not None and family in self._token_ids:
+            return True
+        watermark = self._watermarks.get(claims["sub"])
+        return watermark is not None and claims["iat"] <= watermark
+
+    def has_token_id(self, token_id: str) -> bool:
+        return token_id in self._token_ids
+
+    def is_latest_rotation(self, db: Session, claims: Dict[str, Any], within_seconds: float) -> bool:
+        """
+        Whether a used refresh token is the last one its family rotated, no
+        more than within_seconds ago.
+        """
+        latest = db.query(
+            TokenRevocation.jti,
+            TokenRevocation.revoked_at
+        ).filter(
+            TokenRevocation.family == claims["fam"]
+        ).order_by(
+            TokenRevocation.revoked_at.desc(),
+            TokenRevocation.id.desc()
+        ).first()
+
+        return latest is not None and latest.jti == claims["jti"] and \
+            time.time() - _to_timestamp(latest.revoked_at) <= within_seconds
+
+    def needs_sync(self) -> bool:
+        return time.monotonic() - self._synced_at >= self.sync_seconds
+
+    def sync(self, db: Session) -> None:
+        """Load rows added around and since the last sync and drop expired entries."""
+        # One caller syncs at a time; the others carry on with what's loaded
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        try:
+            query = db.query(
+                TokenRevocation.jti,
+                TokenRevocation.sap_id,
+                TokenRevocation.revoked_at,
+                TokenRevocation.expires_at
+            ).filter(
+                TokenRevocation.expires_at > _to_datetime(time.time())
+            )
+            # Everything on the first sync; applying a row twice is harmless
+            if self._latest_revoked_at != float("-inf"):
+                query = query.filter(TokenRevocation.revoked_at > _to_datetime(
+                    self._latest_revoked_at - self.sync_window_seconds))
+
+            for row in query.all():
+                revoked_at = _to_timestamp(row.revoked_at)
+                self._apply(row.jti, row.sap_id, revoked_at, _to_timestamp(row.expires_at))
+                self._latest_revoked_at = max(self._latest_revoked_at, revoked_at)
+            self._purge_expired()
+            self._synced_at = time.monotonic()
+        finally:
+            self._sync_lock.release()
+
+    # The revoke_* methods add their row to db's transaction for the caller
+    # to commit, and take effect in this process once that commit succeeds
+
+    def revoke_token(self, db: Session, jti: str, expires_at: float, family: Optional[str] = None) -> None:
+        """
+        Revoke one token id until the token it belongs to expires. Pass the
+        family when retiring a rotated refresh token.
+        """
+        self._record(db, jti=jti, sap_id=None, expires_at=expires_at, family=family)
+
+    def revoke_user(self, db: Session, sap_id: str) -> None:
+        """Revoke every token issued to a user so far, e.g. when they are deleted."""
+        self._record(db, jti=None, sap_id=sap_id, expires_at=time.time() + REFRESH_TOKEN_EXPIRE_SECONDS)
+
+    def purge(self, db: Session) -> int:
+        """Delete expired rows; returns how many were removed."""
+        removed = db.query(TokenRevocation).filter(
+            TokenRevocation.expires_at <= _to_datetime(time.time())
+        ).delete(synchronize_session=False)
+        db.commit()
+        return removed
+
+    def _record(self, db: Session, jti: Optional[str], sap_id: Optional[str], expires_at: float,
+                family: Optional[str] = None) -> None:
+        revoked_at = time.time()
+        db.add(TokenRevocation(
+            jti=jti,
+            family=family,
+            sap_id=sap_id,
+            revoked_at=_to_datetime(revoked_at),
+            expires_at=_to_datetime(expires_at)
+        ))
+        db.info.setdefault(_PENDING_KEY, []).append(
+            (self, jti, sap_id, revoked_at, expires_at))
+
+    def _apply(self, jti: Optional[str], sap_id: Optional[str], revoked_at: float, expires_at: float) -> None:
+        with self._lock:
+            if jti is not None:
+                self._token_ids[jti] = expires_at
+            if sap_id is not None:
+                self._watermarks[sap_id] = max(self._watermarks.get(sap_id, revoked_at), revoked_at)
+
+    def _purge_expired(self) -> None:
+        # Watermarks older than the longest token lifetime no longer match
+        # any valid token either
+        now = time.time()
+        with self._lock:
+            self._token_ids = {
+                jti: expires_at for jti, expires_at in self._token_ids.items() if expires_at > now}
+            self._watermarks = {
+                sap_id: watermark for sap_id, watermark in self._watermarks.items()
+                if watermark + REFRESH_TOKEN_EXPIRE_SECONDS > now}
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_committed(session: Session) -> None:
+    for revocation_set, *revocation in session.info.pop(_PENDING_KEY, ()):
+        revocation_set._apply(*revocation)
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted(session: Session, transaction) -> None:
+    # Rolled back or closed without committing
+    if transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
+
+
+revocations = RevocationSet()
@@ -0,0 +1,7 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+# Dialect-native INSERT constructs that support ON CONFLICT DO UPDATE
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
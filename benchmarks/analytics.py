@@ -0,0 +1,135 @@
+"""
+Production analytics benchmark.
+
+Seeds a year of hourly production and losses for one plant, builds the
+rollups and times every level/bucket combination of the production summary
+(from the rollups where they apply, and from the raw rows for comparison)
+plus the loss Pareto over the full year:
+
+    python benchmarks/analytics.py --lines 20 --days 365
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import create_db_engine  # noqa: E402
+from app.models import (  # noqa: E402
+    Base, Cell, DayNight, Hour, Line, Loop, Loss, LossReason, Plant,
+    Production, Shift, ShiftType, Zone
+)
+from app.services.analytics_service import (  # noqa: E402
+    BUCKETS, LEVELS, LOSS_GROUPS, _raw_summary_select, loss_pareto, production_summary
+)
+from app.services.rollup_service import rebuild_rollups  # noqa: E402
+
+START = date(2025, 1, 1)
+
+
+def seed(engine, line_count, days):
+    random.seed(42)
+    with Session(engine) as db:
+        # Hierarchy through the ORM so the ancestor ids are filled in
+        plant = Plant(name="Plant")
+        zones = [Zone(name=f"Zone {i}", plant=plant) for i in range(2)]
+        loops = [Loop(name=f"Loop {i}", zone=zones[i % 2]) for i in range(4)]
+        db.add_all([plant, *zones, *loops])
+        db.flush()
+        lines = [Line(name=f"Line {i}", loop_id=loops[i % 4].id) for i in range(line_count)]
+        db.add_all(lines)
+        db.flush()
+        db.add_all([Cell(name=f"Cell {line.id}", line_id=line.id) for line in lines])
+        db.execute(insert(LossReason), [
+            {"id": i, "title": f"Reason {i}", "department": f"Dept {i % 4}"} for i in range(1, 21)])
+
+        db.execute(insert(Shift), [{
+            "date": datetime.combine(START + timedelta(days=day), datetime.min.time()),
+            "day_night": DayNight.DAY,
+            "shift": shift_type,
+            "plant_id": plant.id,
+        } for day in range(days) for shift_type in ShiftType])
+        shift_ids = [shift.id for shift in db.query(Shift.id)]
+
+        productions = []
+        for shift_id in shift_ids:
+            for line in lines:
+                for hour in Hour:
+                    achievement = random.randint(60, 100)
+                    productions.append({
+                        "shift_id": shift_id, "line_id": line.id, "hour": hour,
+                        "plan": 100, "achievement": achievement,
+                        "scraps": random.randint(0, 3), "defects": random.randint(0, 3),
+                        "flash": random.randint(0, 3),
+                    })
+        db.execute(insert(Production), productions)
+
+        production_ids = [row.id for row in db.query(Production.id)]
+        db.execute(insert(Loss), [{
+            "production_id": production_id,
+            "loss_reason_id": random.randint(1, 20),
+            "amount": random.randint(1, 20),
+        } for production_id in random.sample(production_ids, len(production_ids) // 3)])
+        db.commit()
+        return len(productions)
+
+
+def timed(function, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        latencies.append(time.perf_counter() - started)
+    return result, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=20)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    engine = create_db_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    production_count = seed(engine, args.lines, args.days)
+    print(f"{production_count} productions across {args.lines} lines, {args.days} days")
+
+    with Session(engine) as db:
+        counts, latencies = timed(lambda: rebuild_rollups(db), 1)
+        print(f"rollup rebuild {counts} in {latencies[0] * 1000:.1f}ms")
+
+    end = START + timedelta(days=args.days - 1)
+    with Session(engine) as db:
+        for level in LEVELS:
+            for bucket in BUCKETS:
+                rows, latencies = timed(
+                    lambda: production_summary(db, level, bucket, START, end), args.repeat)
+                statement, _ = _raw_summary_select("sqlite", level, bucket, START, end, {})
+                raw_rows, raw_latencies = timed(lambda: db.execute(statement).all(), args.repeat)
+                assert len(raw_rows) == len(rows)
+                print(f"production {level:<5} by {bucket:<5} rows={len(rows):<6} "
+                      f"mean={statistics.mean(latencies) * 1000:8.1f}ms "
+                      f"max={max(latencies) * 1000:8.1f}ms "
+                      f"raw mean={statistics.mean(raw_latencies) * 1000:8.1f}ms")
+
+        for group in LOSS_GROUPS:
+            rows, latencies = timed(
+                lambda: loss_pareto(db, group, START, end), args.repeat)
+            print(f"losses by {group:<16} rows={len(rows):<6} "
+                  f"mean={statistics.mean(latencies) * 1000:8.1f}ms "
+                  f"max={max(latencies) * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
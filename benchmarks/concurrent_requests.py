@@ -0,0 +1,103 @@
+"""
+Concurrent request throughput benchmark.
+
+Starts the app with uvicorn against a throwaway database, then fires a mix
+of admin dashboard reads and plant writes from many client threads and
+reports throughput and latency percentiles. Run it on two revisions to
+compare, e.g. before and after moving handlers off the event loop:
+
+    python benchmarks/concurrent_requests.py --clients 32 --requests 2000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def request(base_url, method, path, token=None, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    with urllib.request.urlopen(req) as response:
+        return json.loads(response.read() or b"null")
+
+
+def wait_for_server(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + "/login")
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run(base_url, clients, total_requests, write_ratio):
+    token = request(base_url, "POST", "/api/auth/login",
+                    body={"sap_id": "0000", "password": "123456"})["access_token"]
+
+    def one(i):
+        started = time.perf_counter()
+        if i % int(1 / write_ratio) == 0:
+            request(base_url, "POST", "/api/admin/plants",
+                    token, {"name": f"Bench plant {i}"})
+        else:
+            request(base_url, "GET", "/api/admin/dashboard/stats", token)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        latencies = list(pool.map(one, range(total_requests)))
+    elapsed = time.perf_counter() - started
+
+    print(f"clients={clients} requests={total_requests} elapsed={elapsed:.2f}s")
+    print(f"throughput={total_requests / elapsed:.1f} req/s")
+    print(f"p50={percentile(latencies, 50) * 1000:.1f}ms "
+          f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+          f"mean={statistics.mean(latencies) * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--port", str(args.port), "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_for_server(base_url)
+        run(base_url, args.clients, args.requests, args.write_ratio)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
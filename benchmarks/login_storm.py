@@ -0,0 +1,145 @@
+"""
+Login storm benchmark.
+
+Starts the app with uvicorn against a throwaway database and has many
+clients log in back to back, like team leaders at shift change. Meanwhile
+a probe requests an async page (event-loop lag) and a sync API endpoint
+(request threadpool availability) at a fixed interval. Reports sustained
+logins/sec, login latency, rejected logins, the probes' latency and the
+server's hash pool metrics:
+
+    python benchmarks/login_storm.py --clients 64 --seconds 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ADMIN = {"sap_id": "0000", "password": "123456"}
+
+
+def request(base_url, method, path, token=None, body=None):
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method)
+    req.add_header("Content-Type", "application/json")
+    if token:
+        req.add_header("Authorization", f"Bearer {token}")
+    with urllib.request.urlopen(req, timeout=120) as response:
+        return response.read()
+
+
+def wait_for_server(base_url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(base_url + "/login")
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summary(name, latencies):
+    if not latencies:
+        return f"{name}: no samples"
+    return (f"{name}: p50={percentile(latencies, 50) * 1000:.1f}ms "
+            f"p99={percentile(latencies, 99) * 1000:.1f}ms "
+            f"max={max(latencies) * 1000:.1f}ms "
+            f"mean={statistics.mean(latencies) * 1000:.1f}ms")
+
+
+def run(base_url, clients, seconds, probe_interval):
+    token = json.loads(request(base_url, "POST", "/api/auth/login", body=ADMIN))["access_token"]
+    deadline = time.perf_counter() + seconds
+    probes = {"/login": [], "/api/auth/me": []}
+    rejected, failed = [], []
+
+    def probe():
+        while time.perf_counter() < deadline:
+            for path, latencies in probes.items():
+                started = time.perf_counter()
+                request(base_url, "GET", path, token)
+                latencies.append(time.perf_counter() - started)
+            time.sleep(probe_interval)
+
+    def storm(_):
+        latencies = []
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                request(base_url, "POST", "/api/auth/login", body=ADMIN)
+                latencies.append(time.perf_counter() - started)
+            except urllib.error.HTTPError as error:
+                if error.code != 503:
+                    failed.append(error.code)
+                    continue
+                rejected.append(1)
+                time.sleep(float(error.headers.get("Retry-After", "1")))
+        return latencies
+
+    started = time.perf_counter()
+    prober = threading.Thread(target=probe)
+    prober.start()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        logins = [latency for latencies in pool.map(storm, range(clients))
+                  for latency in latencies]
+    prober.join()
+    elapsed = time.perf_counter() - started
+
+    print(f"clients={clients} elapsed={elapsed:.1f}s logins={len(logins)} "
+          f"rejected={len(rejected)} failed={len(failed)} sustained={len(logins) / elapsed:.1f} logins/s")
+    print(summary("login", logins))
+    print(summary("event loop probe (GET /login)", probes["/login"]))
+    print(summary("threadpool probe (GET /api/auth/me)", probes["/api/auth/me"]))
+
+    try:
+        metrics = json.loads(request(base_url, "GET", "/api/admin/metrics/hash-pool", token))
+        print("hash pool " + " ".join(f"{key}={value}" for key, value in metrics.items()))
+    except urllib.error.HTTPError:
+        # Revisions without the hash pool
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--probe-interval", type=float, default=0.1)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app",
+         "--port", str(args.port), "--log-level", "warning"],
+        cwd=workdir, env=env
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_for_server(base_url)
+        run(base_url, args.clients, args.seconds, args.probe_interval)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Bulk master-data import benchmark.
+
+Generates a roster CSV for one plant (zones, loops, lines and cells with
+members spread over them) and times reading, validating and importing it,
+with the passwords hashed at the bulk bcrypt cost. The time the same
+import would spend hashing at the default cost is projected from a sample:
+
+    python benchmarks/master_data_import.py --members 10000
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import create_db_engine  # noqa: E402
+from app.models import Base, Cell, Member  # noqa: E402
+from app.services.auth_service import (  # noqa: E402
+    BULK_BCRYPT_ROUNDS, get_password_hash, hash_passwords
+)
+from app.services.import_service import (  # noqa: E402
+    IMPORT_COLUMNS, import_master_data, read_import_rows
+)
+
+
+def roster_csv(member_count, cells_per_line=4, lines_per_loop=5):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(IMPORT_COLUMNS)
+    for index in range(member_count):
+        cell = index % (member_count // 25 or 1)
+        line, loop = cell // cells_per_line, cell // (cells_per_line * lines_per_loop)
+        writer.writerow([
+            "Plant", f"Zone {loop % 4}", f"Loop {loop}", f"Line {line}",
+            f"Cell {cell}", f"M{index:06d}", f"Member {index}", ""
+        ])
+    return buffer.getvalue().encode()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=5,
+                        help="hashes timed at the default cost")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    engine = create_db_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    data = roster_csv(args.members)
+
+    hashing = []
+
+    def timed_hash_passwords(passwords):
+        started = time.perf_counter()
+        hashes = hash_passwords(passwords)
+        hashing.append(time.perf_counter() - started)
+        return hashes
+
+    with Session(engine) as db:
+        started = time.perf_counter()
+        result = import_master_data(
+            db, read_import_rows("roster.csv", io.BytesIO(data)), password_hasher=timed_hash_passwords)
+        elapsed = time.perf_counter() - started
+
+        assert not result["errors"], result["errors"][:5]
+        members = db.query(func.count(Member.user_id)).scalar()
+        cells = db.query(func.count(Cell.id)).scalar()
+        print(f"imported {members} members into {cells} cells in {elapsed:.2f}s, "
+              f"{sum(hashing):.2f}s of it hashing at bcrypt cost {BULK_BCRYPT_ROUNDS}: {result['created']}")
+
+    started = time.perf_counter()
+    for index in range(args.sample):
+        get_password_hash(f"M{index:06d}")
+    per_hash = (time.perf_counter() - started) / args.sample
+    cores = os.cpu_count() or 1
+    print(f"default cost: {per_hash * 1000:.0f}ms per hash, about "
+          f"{per_hash * args.members / cores:.0f}s for {args.members} members on {cores} cores")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Shift list pagination benchmark.
+
+Seeds one plant with a long shift history and times fetching pages at
+increasing depths by page number (OFFSET) and by cursor (keyset seek),
+plus the exact and cached counts:
+
+    python benchmarks/pagination.py --shifts 120000 --limit 50
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import create_db_engine  # noqa: E402
+from app.models import Base, DayNight, Plant, Shift, ShiftType  # noqa: E402
+from app.services.pagination import count_rows, keyset_page  # noqa: E402
+
+START = datetime(2000, 1, 1)
+
+
+def seed(engine, shift_count):
+    with Session(engine) as db:
+        plant = Plant(name="Plant")
+        other = Plant(name="Other plant")
+        db.add_all([plant, other])
+        db.flush()
+
+        # Three shifts a day, created in bursts that share a timestamp
+        shift_types = list(ShiftType)
+        rows = [{
+            "date": START + timedelta(days=index // 3),
+            "day_night": DayNight.DAY,
+            "shift": shift_types[index % 3],
+            "plant_id": plant.id if index % 10 else other.id,
+            "created_at": START + timedelta(hours=index // 3),
+        } for index in range(shift_count)]
+        for start in range(0, len(rows), 10000):
+            db.execute(insert(Shift), rows[start:start + 10000])
+        db.commit()
+        return plant.id
+
+
+def shifts_query(db, plant_id):
+    return db.query(Shift).filter(
+        Shift.plant_id == plant_id,
+        Shift.is_deleted == False
+    )
+
+
+def timed(function, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        latencies.append(time.perf_counter() - started)
+    return result, statistics.mean(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shifts", type=int, default=120000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    engine = create_db_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    plant_id = seed(engine, args.shifts)
+
+    with Session(engine) as db:
+        query = shifts_query(db, plant_id)
+        total, exact_ms = timed(lambda: count_rows(query, "exact", None), args.repeat)
+        _, cached_ms = timed(lambda: count_rows(query, "cached", ("shifts", plant_id)), args.repeat)
+        print(f"{total} shifts in the plant; count exact={exact_ms:.2f}ms cached={cached_ms:.3f}ms")
+
+        # Walk every page by cursor, remembering the cursor of sampled depths
+        pages = total // args.limit
+        depths = sorted({1, 10, 100, pages // 2, pages - 1} - {0})
+        cursors, cursor = {1: None}, None
+        for page in range(1, pages):
+            _, cursor = keyset_page(query, [Shift.created_at, Shift.id], args.limit,
+                                    cursor=cursor, descending=True)
+            cursors[page + 1] = cursor
+
+        for page in depths:
+            by_offset, offset_ms = timed(lambda: keyset_page(
+                query, [Shift.created_at, Shift.id], args.limit,
+                descending=True, offset=(page - 1) * args.limit)[0], args.repeat)
+            by_cursor, cursor_ms = timed(lambda: keyset_page(
+                query, [Shift.created_at, Shift.id], args.limit,
+                cursor=cursors[page], descending=True)[0], args.repeat)
+            assert [shift.id for shift in by_offset] == [shift.id for shift in by_cursor]
+            print(f"page {page:>6}: offset={offset_ms:8.2f}ms cursor={cursor_ms:8.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Shift production matrix benchmark.
+
+Seeds one plant with many lines and a shift planned and partly achieved on
+every line, then times loading the whole plant the way the planner UI used
+to (the line list, then the productions of each line) against the single
+grouped matrix query, and compares the JSON payload sizes:
+
+    python benchmarks/production_matrix.py --lines 250
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import create_db_engine  # noqa: E402
+from app.models import (  # noqa: E402
+    Base, DayNight, Hour, Line, Loop, Plant, Planner, Production, Shift, ShiftType, User, UserRole, Zone
+)
+from app.routes.api.planner_api import ProductionMatrixResponse, ProductionResponse  # noqa: E402
+from app.services.production_service import production_matrix  # noqa: E402
+
+
+def seed(engine, line_count):
+    with Session(engine) as db:
+        plant = Plant(name="Plant")
+        db.add(plant)
+        db.flush()
+        zone = Zone(name="Zone", plant_id=plant.id)
+        db.add(zone)
+        db.flush()
+        loop = Loop(name="Loop", zone_id=zone.id, plant_id=plant.id)
+        db.add(loop)
+        db.flush()
+        db.add(User(sap_id="P1", name="Planner", role=UserRole.PLANNER, password=""))
+        db.add(Planner(user_id="P1", plant_id=plant.id))
+        shift = Shift(date=datetime(2025, 1, 2), day_night=DayNight.DAY,
+                      shift=ShiftType.SHIFT_A, plant_id=plant.id, planner_id="P1")
+        db.add(shift)
+        db.flush()
+
+        line_ids = db.scalars(insert(Line).returning(Line.id), [{
+            "name": f"Line {index:03d}", "loop_id": loop.id,
+            "zone_id": zone.id, "plant_id": plant.id
+        } for index in range(line_count)]).all()
+
+        # Every hour planned, the first half of the shift achieved
+        db.execute(insert(Production), [{
+            "shift_id": shift.id, "line_id": line_id, "hour": hour,
+            "plan": 100, "achievement": 90 if number < 6 else None, "planner_id": "P1"
+        } for line_id in line_ids for number, hour in enumerate(Hour)])
+        db.commit()
+        return plant.id, shift.id
+
+
+def per_line(db, plant_id, shift_id):
+    """The line list, then one productions request per line card."""
+    lines = db.query(Line).filter(
+        Line.plant_id == plant_id,
+        Line.is_deleted == False
+    ).order_by(Line.name).all()
+
+    payloads = []
+    for line in lines:
+        productions = db.query(Production).filter(
+            Production.shift_id == shift_id,
+            Production.line_id == line.id,
+            Production.is_deleted == False
+        ).all()
+        payloads.append(json.dumps({
+            "items": [ProductionResponse.model_validate(production).model_dump(mode="json")
+                      for production in productions],
+            "total": len(productions)
+        }))
+    return len(lines) + 1, sum(len(payload) for payload in payloads)
+
+
+def matrix(db, plant_id, shift_id):
+    payload = ProductionMatrixResponse.model_validate(
+        production_matrix(db, shift_id, plant_id)).model_dump_json()
+    return 1, len(payload)
+
+
+def timed(function, repeat):
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        latencies.append(time.perf_counter() - started)
+    return result, statistics.mean(latencies) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=250)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    engine = create_db_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    plant_id, shift_id = seed(engine, args.lines)
+
+    with Session(engine) as db:
+        for name, function in (("per line", per_line), ("matrix", matrix)):
+            (requests, size), elapsed_ms = timed(
+                lambda: function(db, plant_id, shift_id), args.repeat)
+            print(f"{name:>8}: {elapsed_ms:8.2f}ms {requests:>4} requests {size / 1024:8.1f}KiB")
+
+
+if __name__ == "__main__":
+    main()
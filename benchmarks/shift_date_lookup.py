@@ -0,0 +1,101 @@
+"""
+Shift-by-date lookup benchmark.
+
+Seeds several years of synthetic shifts across multiple plants and times
+the team leader shift lookup with DATE(shift.date) = :day against the
+half-open range shift.date >= :day AND shift.date < :day + 1:
+
+    python benchmarks/shift_date_lookup.py --plants 10 --years 5
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func, insert  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+
+from app.database import create_db_engine  # noqa: E402
+from app.models import Base, DayNight, Plant, Shift, ShiftType  # noqa: E402
+
+START = datetime(2020, 1, 1)
+
+
+def seed(engine, plant_count, years):
+    with Session(engine) as db:
+        db.execute(insert(Plant), [{"name": f"Plant {i}"} for i in range(plant_count)])
+        plant_ids = [plant.id for plant in db.query(Plant).all()]
+        rows = []
+        for day in range(years * 365):
+            shift_date = START + timedelta(days=day)
+            for plant_id in plant_ids:
+                for shift_type in ShiftType:
+                    rows.append({
+                        "date": shift_date,
+                        "day_night": DayNight.DAY,
+                        "shift": shift_type,
+                        "plant_id": plant_id,
+                    })
+        db.execute(insert(Shift), rows)
+        db.commit()
+        return plant_ids, len(rows)
+
+
+def by_function(db, plant_id, day):
+    return db.query(Shift).filter(
+        func.date(Shift.date) == day.date(),
+        Shift.plant_id == plant_id,
+        Shift.is_deleted == False
+    ).all()
+
+
+def by_range(db, plant_id, day):
+    return db.query(Shift).filter(
+        Shift.date >= day,
+        Shift.date < day + timedelta(days=1),
+        Shift.plant_id == plant_id,
+        Shift.is_deleted == False
+    ).all()
+
+
+def measure(engine, lookup, plant_ids, years, iterations):
+    random.seed(42)
+    latencies = []
+    with Session(engine) as db:
+        for _ in range(iterations):
+            day = START + timedelta(days=random.randrange(years * 365))
+            started = time.perf_counter()
+            shifts = lookup(db, random.choice(plant_ids), day)
+            latencies.append(time.perf_counter() - started)
+            assert len(shifts) == len(ShiftType)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--plants", type=int, default=10)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--iterations", type=int, default=500)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    engine = create_db_engine(f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+    Base.metadata.create_all(bind=engine)
+    plant_ids, shift_count = seed(engine, args.plants, args.years)
+    print(f"{shift_count} shifts across {args.plants} plants, {args.years} years")
+
+    for name, lookup in (("DATE(shift.date) =", by_function), ("half-open range", by_range)):
+        latencies = measure(engine, lookup, plant_ids, args.years, args.iterations)
+        print(f"{name:<20} mean={statistics.mean(latencies) * 1000:7.3f}ms "
+              f"max={max(latencies) * 1000:7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
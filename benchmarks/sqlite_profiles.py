@@ -0,0 +1,144 @@
+"""
+SQLite profile benchmark.
+
+Replays a shift's worth of hourly production writes (one writer per line,
+12 hours each) while dashboard readers poll counts and line productions,
+then reports p50/p99 write and read latency for every SQLite profile and
+pool strategy:
+
+    python benchmarks/sqlite_profiles.py --lines 40 --readers 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import func  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+
+from app.database import SQLITE_PROFILES, create_db_engine  # noqa: E402
+from app.models import (Base, Cell, Hour, Line, Loop, Plant, Production,  # noqa: E402
+                        Shift, Zone, DayNight, ShiftType)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index] * 1000
+
+
+def seed(Session, line_count):
+    db = Session()
+    plant = Plant(name="Bench plant")
+    zone = Zone(name="Zone", plant=plant)
+    loop = Loop(name="Loop", zone=zone)
+    lines = [Line(name=f"Line {i:03d}", loop=loop) for i in range(line_count)]
+    for line in lines:
+        db.add(Cell(name="Cell", line=line))
+    shift = Shift(date=datetime(2025, 1, 1), day_night=DayNight.DAY,
+                  shift=ShiftType.SHIFT_A, plant=plant)
+    db.add_all([plant, zone, loop, shift, *lines])
+    db.commit()
+    ids = [line.id for line in lines], shift.id
+    db.close()
+    return ids
+
+
+def write_hours(Session, shift_id, line_id, latencies):
+    for hour in Hour:
+        started = time.perf_counter()
+        db = Session()
+        try:
+            production = db.query(Production).filter(
+                Production.shift_id == shift_id,
+                Production.line_id == line_id,
+                Production.hour == hour,
+                Production.is_deleted == False
+            ).first()
+            if not production:
+                production = Production(
+                    shift_id=shift_id, line_id=line_id, hour=hour, plan=100)
+                db.add(production)
+            production.achievement = 90
+            production.scraps = 1
+            production.defects = 2
+            production.flash = 3
+            db.commit()
+        finally:
+            db.close()
+        latencies.append(time.perf_counter() - started)
+
+
+def read_dashboard(Session, shift_id, line_ids, stop, latencies):
+    i = 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        db = Session()
+        try:
+            for model in (Plant, Zone, Loop, Line, Cell):
+                db.query(func.count(model.id)).filter(
+                    model.is_deleted == False).scalar()
+            db.query(Production).filter(
+                Production.shift_id == shift_id,
+                Production.line_id == line_ids[i % len(line_ids)],
+                Production.is_deleted == False
+            ).all()
+        finally:
+            db.close()
+        latencies.append(time.perf_counter() - started)
+        i += 1
+
+
+def run_profile(profile, pool, line_count, reader_count):
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    engine = create_db_engine(
+        f"sqlite:///{os.path.join(workdir, 'bench.db')}", profile, pool)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    line_ids, shift_id = seed(Session, line_count)
+
+    write_latencies, read_latencies = [], []
+    stop = threading.Event()
+    readers = [threading.Thread(target=read_dashboard, args=(
+        Session, shift_id, line_ids, stop, read_latencies)) for _ in range(reader_count)]
+    writers = [threading.Thread(target=write_hours, args=(
+        Session, shift_id, line_id, write_latencies)) for line_id in line_ids]
+
+    started = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    stop.set()
+    for thread in readers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    print(f"{profile:<11} {pool:<6} {elapsed:7.2f}s "
+          f"write p50={percentile(write_latencies, 50):7.1f}ms p99={percentile(write_latencies, 99):7.1f}ms  "
+          f"read p50={percentile(read_latencies, 50):7.1f}ms p99={percentile(read_latencies, 99):7.1f}ms "
+          f"({len(read_latencies)} reads)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lines", type=int, default=40)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--profiles", nargs="*", default=list(SQLITE_PROFILES))
+    parser.add_argument("--pools", nargs="*", default=["queue", "null"])
+    args = parser.parse_args()
+
+    for profile in args.profiles:
+        for pool in args.pools:
+            run_profile(profile, pool, args.lines, args.readers)
+
+
+if __name__ == "__main__":
+    main()
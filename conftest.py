@@ -0,0 +1,49 @@
+import os
+import tempfile
+
+# The app binds its engine when imported, so point it at a throwaway
+# database first; bcrypt at its minimum cost keeps the logins quick
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(
+    tempfile.mkdtemp(prefix="production-tracking-tests-"), "tests.db")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("BULK_BCRYPT_ROUNDS", "4")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.query_stats import query_budget as _query_budget  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    """The app on the throwaway database, started once for the whole run."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def login(client):
+    """Log in and return the Authorization headers, e.g. login("0000", "123456")."""
+    def _login(sap_id, password):
+        response = client.post(
+            "/api/auth/login", json={"sap_id": sap_id, "password": password})
+        assert response.status_code == 200, response.text
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    return _login
+
+
+@pytest.fixture(scope="session")
+def admin_headers(login):
+    return login("0000", "123456")
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test when an endpoint exceeds its SQL budget:
+
+        with query_budget(5, max_repeats=1):
+            client.get("/api/planner/shifts", headers=headers)
+    """
+    return _query_budget
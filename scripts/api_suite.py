@@ -0,0 +1,291 @@
+"""
+End-to-end API suite against a throwaway database.
+
+Runs the app with uvicorn on a fresh database and walks every role through
+its main flows (admin master data, planner shift planning, team leader
+production and losses, and the live event stream), then checks that list endpoints run a constant
+number of SQL statements however many rows they return and that the
+rollups match the raw data. Use --backend to pick the database:
+
+    python scripts/api_suite.py --backend sqlite
+    python scripts/api_suite.py --backend postgres   # needs initdb/pg_ctl and psycopg2
+    python scripts/api_suite.py --backend all
+
+The postgres backend starts a temporary cluster with initdb/pg_ctl on a
+free port and removes it afterwards.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def sqlite_database(workdir):
+    yield f"sqlite:///{os.path.join(workdir, 'suite.db')}"
+
+
+@contextmanager
+def postgres_database(workdir):
+    for binary in ("initdb", "pg_ctl"):
+        if not shutil.which(binary):
+            raise RuntimeError(f"{binary} not found on PATH")
+
+    data_dir = os.path.join(workdir, "pgdata")
+    port = free_port()
+    subprocess.run(["initdb", "-D", data_dir, "-U", "postgres", "-A", "trust"],
+                   check=True, stdout=subprocess.DEVNULL)
+    subprocess.run(["pg_ctl", "-D", data_dir, "-w", "-l", os.path.join(workdir, "pg.log"),
+                    "-o", f"-p {port} -k {workdir} -c listen_addresses=127.0.0.1", "start"],
+                   check=True, stdout=subprocess.DEVNULL)
+    try:
+        yield f"postgresql+psycopg2://postgres@127.0.0.1:{port}/postgres"
+    finally:
+        subprocess.run(["pg_ctl", "-D", data_dir, "-m", "fast", "stop"],
+                       check=True, stdout=subprocess.DEVNULL)
+
+
+BACKENDS = {
+    "sqlite": sqlite_database,
+    "postgres": postgres_database,
+}
+
+
+class Client:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.token = None
+        self.query_count = None
+
+    def call(self, method, path, body=None, expect=200):
+        data = json.dumps(body).encode() if body is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data, method=method)
+        req.add_header("Content-Type", "application/json")
+        if self.token:
+            req.add_header("Authorization", f"Bearer {self.token}")
+        try:
+            with urllib.request.urlopen(req) as response:
+                status, payload = response.status, response.read()
+                headers = response.headers
+        except urllib.error.HTTPError as error:
+            status, payload, headers = error.code, error.read(), error.headers
+        self.query_count = headers.get("X-Query-Count")
+        if status != expect:
+            raise AssertionError(f"{method} {path}: expected {expect}, got {status}: {payload[:500]!r}")
+        return json.loads(payload) if payload else None
+
+    def open_stream(self, path):
+        """Open a Server-Sent Events stream, returned once the server has subscribed."""
+        req = urllib.request.Request(self.base_url + path)
+        req.add_header("Authorization", f"Bearer {self.token}")
+        stream = urllib.request.urlopen(req, timeout=10)
+        # The retry preamble is written after subscribing
+        assert stream.readline().startswith(b"retry:")
+        return stream
+
+    def login(self, sap_id, password):
+        self.token = None
+        self.token = self.call("POST", "/api/auth/login", {
+            "sap_id": sap_id, "password": password})["access_token"]
+
+
+def run_suite(client):
+    # Admin: master data
+    client.login("0000", "123456")
+    assert client.call("GET", "/api/auth/me")["role"] == "ADMIN"
+    plant = client.call("POST", "/api/admin/plants", {"name": "Plant"}, expect=201)
+    zone = client.call("POST", "/api/admin/zones", {"name": "Zone", "plant_id": plant["id"]}, expect=201)
+    loop = client.call("POST", "/api/admin/loops", {"name": "Loop", "zone_id": zone["id"]}, expect=201)
+    line = client.call("POST", "/api/admin/lines", {"name": "Line", "loop_id": loop["id"]}, expect=201)
+    cell = client.call("POST", "/api/admin/cells", {"name": "Cell", "line_id": line["id"]}, expect=201)
+    client.call("POST", "/api/admin/members", {"sap_id": "M1", "name": "Member", "cell_id": cell["id"]}, expect=201)
+    client.call("POST", "/api/admin/planners", {"sap_id": "P1", "name": "Planner", "plant_id": plant["id"]}, expect=201)
+    client.call("POST", "/api/admin/team-leaders", {"sap_id": "T1", "name": "Leader", "line_id": line["id"]}, expect=201)
+    client.call("POST", "/api/admin/loss-reasons", {"id": 1, "title": "Breakdown", "department": "ENG"}, expect=201)
+    client.call("POST", "/api/admin/attendance-types", {"title": "Present", "color": "#00ff00"}, expect=201)
+    stats = client.call("GET", "/api/admin/dashboard/stats")
+    assert stats["lines"] == 1 and stats["members"] == 1, stats
+    assert len(client.call("GET", f"/api/admin/plants/{plant['id']}/planners")) == 1
+    assert len(client.call("GET", f"/api/admin/lines/{line['id']}/team-leaders")) == 1
+    assert len(client.call("GET", f"/api/admin/cells/{cell['id']}/members")) == 1
+    assert client.call("GET", "/api/admin/loss-reasons")["total"] == 1
+
+    # Planner: shift and hourly plans
+    client.login("P1", "P1")
+    shift = client.call("POST", "/api/planner/shifts", {
+        "date": "2025-01-02", "day_night": "DAY", "shift": "SHIFT-A"}, expect=201)
+    assert client.call("GET", "/api/planner/shifts")["total"] == 1
+    assert client.call("GET", f"/api/planner/shifts/{shift['id']}/lines")["total"] == 1
+    plans = [{"hour": f"HOUR-{hour:02d}", "plan": 100, "line_id": line["id"], "shift_id": shift["id"]}
+             for hour in range(1, 13)]
+    client.call("POST", "/api/planner/productions", {"productions": plans}, expect=201)
+    client.call("POST", "/api/planner/productions", {"productions": plans[:3]}, expect=201)
+    productions = client.call("GET", f"/api/planner/productions?shift={shift['id']}&line={line['id']}")
+    assert productions["total"] == 12, productions
+    saved = client.call("POST", f"/api/planner/shifts/{shift['id']}/productions", {"lines": [
+        {"line_id": line["id"], "plans": [{"hour": "HOUR-12", "plan": 120}]}]}, expect=201)
+    assert saved[0]["plan"] == 120, saved
+    matrix = client.call("GET", f"/api/planner/shifts/{shift['id']}/matrix")
+    row = matrix["line_ids"].index(line["id"])
+    assert matrix["plan"][row] == [100] * 11 + [120], matrix
+
+    # Team leader: production and losses
+    client.login("T1", "T1")
+    assert client.call("GET", "/api/team-leader/me")["line"]["id"] == line["id"]
+    assert len(client.call("GET", "/api/team-leader/shifts?date=2025-01-02")) == 1
+    entry = {"shift_id": shift["id"], "hour": "HOUR-01", "plan": 100,
+             "achievement": 80, "scraps": 1, "defects": 2, "flash": 3}
+    production = client.call("POST", "/api/team-leader/production", entry, expect=201)
+    client.call("POST", "/api/team-leader/production", entry, expect=201)
+    saved = client.call("GET", f"/api/team-leader/production?shift_id={shift['id']}&hour=HOUR-01")
+    assert saved["achievement"] == 80, saved
+    stream = client.open_stream("/api/events")
+    loss = client.call("POST", "/api/team-leader/losses", {
+        "amount": 5, "loss_reason_id": 1, "production_id": production["id"]}, expect=201)
+    event = read_event(stream, "loss")
+    assert (event["loss_id"], event["line_id"]) == (loss["id"], line["id"]), event
+    stream.close()
+    assert len(client.call("GET", f"/api/team-leader/production/{production['id']}/losses")) == 1
+    client.call("DELETE", f"/api/team-leader/losses/{loss['id']}", expect=204)
+    attendance_type = client.call("GET", "/api/team-leader/attendance-types")[0]
+    roll_call = {"shift_id": shift["id"], "entries": [
+        {"member_id": "M1", "attendance_type_id": attendance_type["id"]}]}
+    client.call("POST", "/api/team-leader/attendance", roll_call, expect=201)
+    client.call("POST", "/api/team-leader/attendance", roll_call, expect=201)
+    roster = client.call("GET", f"/api/team-leader/attendance?shift_id={shift['id']}")
+    assert [member["working_cell_id"] for member in roster["members"]] == [cell["id"]], roster
+
+    run_query_budgets(client, plant, line, cell, production)
+
+
+def read_event(stream, event_type):
+    """Next event of the given type from an open stream."""
+    current = None
+    for raw in stream:
+        line = raw.decode().rstrip("\n")
+        if line.startswith("event: "):
+            current = line[len("event: "):]
+        elif line.startswith("data: ") and current == event_type:
+            return json.loads(line[len("data: "):])
+    raise AssertionError(f"stream ended before a {event_type} event")
+
+
+def assert_constant_queries(client, path, small, large):
+    """Fetch path with a small and a large result set; the SQL count must match."""
+    client.call("GET", path.format(small))
+    small_count = client.query_count
+    client.call("GET", path.format(large))
+    assert client.query_count == small_count, (
+        f"{path}: {small_count} queries for {small} rows, {client.query_count} for {large}")
+
+
+def run_query_budgets(client, plant, line, cell, production):
+    # More rows behind every list, with distinct related objects per row
+    client.login("0000", "123456")
+    for index in range(2, 6):
+        client.call("POST", "/api/admin/members", {
+            "sap_id": f"M{index}", "name": f"Member {index}", "cell_id": cell["id"]}, expect=201)
+        client.call("POST", "/api/admin/planners", {
+            "sap_id": f"P{index}", "name": f"Planner {index}", "plant_id": plant["id"]}, expect=201)
+        client.call("POST", "/api/admin/team-leaders", {
+            "sap_id": f"T{index}", "name": f"Leader {index}", "line_id": line["id"]}, expect=201)
+        client.call("POST", "/api/admin/loss-reasons", {
+            "id": index, "title": f"Reason {index}", "department": "ENG"}, expect=201)
+
+    # Dashboard counts: one statement after the creates invalidated them, then cached
+    stats = client.call("GET", "/api/admin/dashboard/stats")
+    assert (stats["members"], stats["planners"], stats["teamLeaders"]) == (5, 5, 5), stats
+    first_count = client.query_count
+    client.call("GET", "/api/admin/dashboard/stats")
+    assert (first_count, client.query_count) == ("1", "0"), (first_count, client.query_count)
+
+    admin_lists = [
+        f"/api/admin/plants/{plant['id']}/planners",
+        f"/api/admin/lines/{line['id']}/team-leaders",
+        f"/api/admin/cells/{cell['id']}/members",
+    ]
+    counts = set()
+    for path in admin_lists:
+        client.call("GET", path)
+        counts.add(client.query_count)
+    assert counts == {"2"}, f"admin list endpoints: {counts} queries"
+
+    for index in range(2, 6):
+        client.login(f"P{index}", f"P{index}")
+        client.call("POST", "/api/planner/shifts", {
+            "date": f"2025-02-0{index}", "day_night": "NIGHT", "shift": "SHIFT-B"}, expect=201)
+    assert_constant_queries(client, "/api/planner/shifts?limit={}", 1, 50)
+
+    client.login("T1", "T1")
+    for index in range(1, 6):
+        client.call("POST", "/api/team-leader/losses", {
+            "amount": index, "loss_reason_id": index, "production_id": production["id"]}, expect=201)
+    client.call("GET", f"/api/team-leader/production/{production['id']}/losses")
+    losses_count = client.query_count
+    client.call("GET", "/api/team-leader/shifts?date=2025-01-02")
+    assert (losses_count, client.query_count) == ("2", "1"), (losses_count, client.query_count)
+
+
+def run_backend(name):
+    workdir = tempfile.mkdtemp(prefix=f"suite-{name}-")
+    with BACKENDS[name](workdir) as database_url:
+        port = free_port()
+        env = dict(os.environ, PYTHONPATH=str(ROOT), DATABASE_URL=database_url,
+                   QUERY_STATS="1")
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app",
+             "--port", str(port), "--log-level", "warning"],
+            cwd=workdir, env=env
+        )
+        try:
+            client = Client(f"http://127.0.0.1:{port}")
+            deadline = time.time() + 30
+            while True:
+                try:
+                    urllib.request.urlopen(client.base_url + "/login")
+                    break
+                except OSError:
+                    if time.time() > deadline or server.poll() is not None:
+                        raise RuntimeError("Server did not start")
+                    time.sleep(0.2)
+            run_suite(client)
+
+            # The rollups maintained on write must match the raw data
+            subprocess.run([sys.executable, str(ROOT / "scripts" / "rollups.py"), "check"],
+                           cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+        finally:
+            server.terminate()
+            server.wait()
+    shutil.rmtree(workdir, ignore_errors=True)
+    print(f"{name}: OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=[*BACKENDS, "all"], default="sqlite")
+    args = parser.parse_args()
+
+    backends = list(BACKENDS) if args.backend == "all" else [args.backend]
+    for name in backends:
+        run_backend(name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Bulk master-data import.
+
+Imports plants, zones, loops, lines, cells and their users from a CSV or
+XLSX file with the columns plant, zone, loop, line, cell, sap_id, name and
+role (MEMBER, TEAM_LEADER or PLANNER; MEMBER when blank). Entities that
+already exist by name under the same parent are reused. Invalid rows are
+skipped and listed (exit code 1 if there are any). Uses DATABASE_URL like
+the app:
+
+    python scripts/import_master_data.py roster.csv --dry-run
+    python scripts/import_master_data.py roster.xlsx
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models import Base  # noqa: E402
+from app.services.import_service import (  # noqa: E402
+    ImportFileError, import_master_data, read_import_rows
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("file", type=Path)
+    parser.add_argument("--dry-run", action="store_true",
+                        help="validate the file without importing it")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        with args.file.open("rb") as file:
+            result = import_master_data(
+                db, read_import_rows(args.file.name, file), dry_run=args.dry_run)
+    except ImportFileError as e:
+        sys.exit(f"{args.file}: {e}")
+    finally:
+        db.close()
+
+    for error in result["errors"]:
+        print(f"row {error['row']}: {error['error']}")
+    verb = "would create" if args.dry_run else "created"
+    print(f"{verb} " + ", ".join(f"{count} {name}" for name, count in result["created"].items()))
+    sys.exit(1 if result["errors"] else 0)
+
+
+if __name__ == "__main__":
+    main()
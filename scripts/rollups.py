@@ -0,0 +1,46 @@
+"""
+Rollup maintenance.
+
+Rebuilds the shift/day production rollups from the raw productions and
+losses, or checks them against the raw aggregation (exit code 1 on any
+mismatch). Uses DATABASE_URL like the app:
+
+    python scripts/rollups.py rebuild
+    python scripts/rollups.py check
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import SessionLocal, engine  # noqa: E402
+from app.models import Base  # noqa: E402
+from app.services.rollup_service import check_rollups, rebuild_rollups  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["rebuild", "check"])
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        if args.command == "rebuild":
+            for table, count in rebuild_rollups(db).items():
+                print(f"{table}: {count} rows")
+            return
+
+        mismatches = check_rollups(db)
+        for mismatch in mismatches:
+            print(mismatch)
+        print(f"{len(mismatches)} mismatching rollup rows")
+        sys.exit(1 if mismatches else 0)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
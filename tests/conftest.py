@@ -0,0 +1,39 @@
+import pytest
+
+
+@pytest.fixture(scope="session")
+def post(client, admin_headers):
+    """POST as the admin (or with headers), assert 201 and return the body."""
+    def _post(path, body, headers=None):
+        response = client.post(path, json=body, headers=headers or admin_headers)
+        assert response.status_code == 201, response.text
+        return response.json()
+
+    return _post
+
+
+@pytest.fixture(scope="session")
+def seed_plant(post):
+    """
+    Create a plant with one zone and loop, the given number of lines and
+    one cell per line, all named after name:
+
+        floor = seed_plant("Rollup", lines=2)
+        floor["lines"][1]["id"], floor["cells"][1]["id"]
+    """
+    def _seed_plant(name, lines=1):
+        plant = post("/api/admin/plants", {"name": f"{name} Plant"})
+        zone = post("/api/admin/zones", {"name": f"{name} Zone", "plant_id": plant["id"]})
+        loop = post("/api/admin/loops", {"name": f"{name} Loop", "zone_id": zone["id"]})
+        created_lines = [
+            post("/api/admin/lines", {"name": f"{name} Line {index}", "loop_id": loop["id"]})
+            for index in range(lines)
+        ]
+        cells = [
+            post("/api/admin/cells", {"name": f"{name} Cell {index}", "line_id": line["id"]})
+            for index, line in enumerate(created_lines)
+        ]
+        return {"plant": plant, "zone": zone, "loop": loop,
+                "lines": created_lines, "cells": cells}
+
+    return _seed_plant
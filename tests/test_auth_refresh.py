@@ -0,0 +1,58 @@
+from app.routes.api import auth_api
+
+
+def login_tokens(client):
+    response = client.post("/api/auth/login", json={"sap_id": "0000", "password": "123456"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def refresh(client, refresh_token):
+    return client.post("/api/auth/refresh", json={"refresh_token": refresh_token})
+
+
+def test_refresh_rotates_the_refresh_token(client):
+    tokens = login_tokens(client)
+
+    response = refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 200
+    assert response.json()["refresh_token"] != tokens["refresh_token"]
+
+
+def test_tabs_renewing_at_once_all_get_tokens(client):
+    refresh_token = login_tokens(client)["refresh_token"]
+
+    first, second = refresh(client, refresh_token), refresh(client, refresh_token)
+
+    assert (first.status_code, second.status_code) == (200, 200)
+    assert refresh(client, first.json()["refresh_token"]).status_code == 200
+    assert refresh(client, second.json()["refresh_token"]).status_code == 200
+
+
+def test_a_used_refresh_token_is_reused_at_most_once(client):
+    refresh_token = login_tokens(client)["refresh_token"]
+    first, second = refresh(client, refresh_token), refresh(client, refresh_token)
+    assert (first.status_code, second.status_code) == (200, 200)
+
+    assert refresh(client, refresh_token).status_code == 401
+    assert refresh(client, first.json()["refresh_token"]).status_code == 401
+    assert refresh(client, second.json()["refresh_token"]).status_code == 401
+
+
+def test_replaying_an_older_refresh_token_revokes_the_login(client):
+    older = login_tokens(client)["refresh_token"]
+    previous = refresh(client, older).json()["refresh_token"]
+    current = refresh(client, previous).json()["refresh_token"]
+
+    assert refresh(client, older).status_code == 401
+    assert refresh(client, current).status_code == 401
+
+
+def test_reuse_after_the_grace_period_revokes_the_login(client, monkeypatch):
+    monkeypatch.setattr(auth_api, "REFRESH_TOKEN_REUSE_GRACE_SECONDS", -1)
+    refresh_token = login_tokens(client)["refresh_token"]
+    current = refresh(client, refresh_token).json()["refresh_token"]
+
+    assert refresh(client, refresh_token).status_code == 401
+    assert refresh(client, current).status_code == 401
@@ -0,0 +1,13 @@
+from app.services.auth_service import create_access_token, decode_token, token_claims_cache
+
+
+def test_invalid_tokens_do_not_evict_valid_ones(monkeypatch):
+    monkeypatch.setattr(token_claims_cache, "max_size", 2)
+    token_claims_cache.clear()
+    token = create_access_token({"sub": "0000"})
+    assert decode_token(token)["sub"] == "0000"
+
+    for index in range(5):
+        assert decode_token(f"not.a.token{index}") is None
+
+    assert list(token_claims_cache._entries) == [token]
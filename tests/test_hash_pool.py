@@ -0,0 +1,33 @@
+import threading
+import pytest
+from app.services.hash_pool import HashPool, HashPoolBusy
+
+
+def test_map_returns_results_in_order():
+    pool = HashPool(workers=3, max_queue=10)
+
+    assert pool.map(lambda value: value * 2, range(20)) == [value * 2 for value in range(20)]
+
+
+def test_map_queues_at_most_one_call_per_worker():
+    pool = HashPool(workers=2, max_queue=100)
+
+    pool.map(lambda value: value, range(50))
+
+    metrics = pool.metrics()
+    assert metrics["completed"] == 50
+    assert metrics["max_queued"] <= 2
+
+
+def test_map_raises_busy_when_the_queue_is_full():
+    pool = HashPool(workers=1, max_queue=0)
+    release = threading.Event()
+    blocked = pool.submit(release.wait)
+    try:
+        with pytest.raises(HashPoolBusy):
+            pool.map(lambda value: value, range(3))
+    finally:
+        release.set()
+        blocked.result()
+
+    assert pool.metrics()["rejected"] == 1
@@ -0,0 +1,67 @@
+import pytest
+from app.services import import_service
+
+
+def upload(client, admin_headers, filename, content, dry_run=True):
+    return client.post(f"/api/admin/import?dry_run={str(dry_run).lower()}",
+                       files={"file": (filename, content)}, headers=admin_headers)
+
+
+@pytest.mark.parametrize("filename, content, detail", [
+    ("roster.csv", "plant,line\nUsine Ü,Line\n".encode("latin-1"),
+     "CSV files must be UTF-8 encoded"),
+    ("roster.csv", b"plant,line\nImport Plant," + b"x" * 200_000 + b"\n",
+     "The CSV file can't be parsed: field larger than field limit (131072)"),
+    ("roster.xlsx", b"plant,line\n", "The XLSX file can't be opened"),
+])
+def test_unreadable_file_is_a_bad_request(client, admin_headers, filename, content, detail):
+    response = upload(client, admin_headers, filename, content)
+
+    assert (response.status_code, response.json()["detail"]) == (400, detail)
+
+
+ROSTER = (
+    "plant,zone,loop,line,cell,sap_id,name,role\n"
+    "Import Plant,Zone,Loop,Line,,IT1,Leader,TEAM_LEADER\n"
+    "Import Plant,Zone,Loop,Line,Cell 1,IM1,Member 1,\n"
+    "Import Plant,Zone,Loop,Line,Cell 2,IM2,Member 2,\n"
+    "Import Plant,Zone,Loop,Line,Cell 2,IM1,Member 3,\n"
+)
+
+
+def test_import_validates_across_batches(client, admin_headers, login, monkeypatch):
+    monkeypatch.setattr(import_service, "IMPORT_BATCH_SIZE", 2)
+
+    response = upload(client, admin_headers, "roster.csv", ROSTER.encode(), dry_run=False)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["created"] == {
+        "plants": 1, "zones": 1, "loops": 1, "lines": 1, "cells": 2,
+        "members": 2, "team_leaders": 1, "planners": 0}
+    assert response.json()["errors"] == [
+        {"row": 5, "error": "SAP ID IM1 already appears in row 3"}]
+    assert client.get("/api/team-leader/me", headers=login("IT1", "IT1")).json()["line"]["name"] == "Line"
+
+
+def test_failed_import_writes_nothing(client, admin_headers, login, monkeypatch):
+    monkeypatch.setattr(import_service, "IMPORT_BATCH_SIZE", 1)
+    insert_users = import_service._insert_users
+    calls = []
+
+    def fail_second_batch(*args):
+        calls.append(args)
+        if len(calls) == 2:
+            raise RuntimeError("disk full")
+        insert_users(*args)
+
+    monkeypatch.setattr(import_service, "_insert_users", fail_second_batch)
+    roster = ROSTER.replace("Import Plant", "Failed Plant").replace(",I", ",F")
+
+    response = upload(client, admin_headers, "roster.csv", roster.encode(), dry_run=False)
+
+    assert response.status_code == 500
+    assert len(calls) == 2
+    response = client.post("/api/auth/login", json={"sap_id": "FT1", "password": "FT1"})
+    assert response.status_code == 401
+    plants = client.get("/api/admin/plants", headers=admin_headers).json()
+    assert "Failed Plant" not in [plant["name"] for plant in plants]
@@ -0,0 +1,136 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def floor(login, post, seed_plant):
+    """
+    A plant where every list has one short and one longer variant: a line
+    and cell with one team leader and member, and a line and cell with five.
+    """
+    seeded = seed_plant("List", lines=2)
+    plant, lines, cells = seeded["plant"], seeded["lines"], seeded["cells"]
+
+    for index in range(1, 7):
+        # One of each on the first line and cell, five on the second
+        line, cell = (lines[0], cells[0]) if index == 1 else (lines[1], cells[1])
+        post("/api/admin/members", {
+            "sap_id": f"LM{index}", "name": f"Member {index}", "cell_id": cell["id"]})
+        post("/api/admin/team-leaders", {
+            "sap_id": f"LT{index}", "name": f"Leader {index}", "line_id": line["id"]})
+        post("/api/admin/planners", {
+            "sap_id": f"LP{index}", "name": f"Planner {index}", "plant_id": plant["id"]})
+        post("/api/admin/loss-reasons", {
+            "id": 100 + index, "title": f"List Reason {index}", "department": "ENG"})
+        post("/api/admin/attendance-types", {
+            "title": f"List Type {index}", "color": "#00ff00"})
+
+    # Shifts by different planners, each line planned for a few hours
+    shifts = []
+    for index in range(1, 7):
+        shifts.append(post("/api/planner/shifts", {
+            "date": f"2025-03-0{index}", "day_night": "DAY", "shift": "SHIFT-A"},
+            headers=login(f"LP{index}", f"LP{index}")))
+    planner_headers = login("LP1", "LP1")
+    post(f"/api/planner/shifts/{shifts[0]['id']}/productions", {"lines": [
+        {"line_id": lines[0]["id"], "plans": [{"hour": "HOUR-01", "plan": 100}]},
+        {"line_id": lines[1]["id"], "plans": [
+            {"hour": f"HOUR-0{hour}", "plan": 100} for hour in range(1, 6)]},
+    ]}, headers=planner_headers)
+
+    # One loss on the first leader's production, five on the second's
+    productions = []
+    for index, (sap_id, count) in enumerate((("LT1", 1), ("LT2", 5))):
+        headers = login(sap_id, sap_id)
+        production = post("/api/team-leader/production", {
+            "shift_id": shifts[0]["id"], "hour": "HOUR-01", "plan": 100,
+            "achievement": 50, "scraps": 0, "defects": 0, "flash": 0}, headers=headers)
+        for loss in range(count):
+            post("/api/team-leader/losses", {
+                "amount": 1, "loss_reason_id": 101 + loss,
+                "production_id": production["id"]}, headers=headers)
+        productions.append((headers, production["id"]))
+
+    return {
+        "plant": plant,
+        "loop": seeded["loop"],
+        "lines": lines,
+        "cells": cells,
+        "shift": shifts[0],
+        "planner_headers": planner_headers,
+        "productions": productions,
+    }
+
+
+@pytest.fixture
+def count_queries(client, query_budget):
+    """The number of SQL statements a GET runs, failing on any N+1 repeat."""
+    def _count_queries(path, headers):
+        with query_budget(50, max_repeats=1) as requests:
+            response = client.get(path, headers=headers)
+        assert response.status_code == 200, response.text
+        return requests[0][2].count
+
+    return _count_queries
+
+
+@pytest.mark.parametrize("path", [
+    "/api/admin/loss-reasons?limit={}",
+    "/api/admin/attendance-types?limit={}",
+])
+def test_admin_pages_run_constant_queries(floor, admin_headers, count_queries, path):
+    assert count_queries(path.format(1), admin_headers) == \
+        count_queries(path.format(50), admin_headers)
+
+
+def test_list_shifts_runs_constant_queries(floor, count_queries):
+    headers = floor["planner_headers"]
+    assert count_queries("/api/planner/shifts?limit=1", headers) == \
+        count_queries("/api/planner/shifts?limit=50", headers)
+
+
+@pytest.mark.parametrize("path", [
+    "/api/admin/lines/{line[id]}/team-leaders",
+    "/api/admin/cells/{cell[id]}/members",
+])
+def test_admin_lists_run_constant_queries(floor, admin_headers, count_queries, path):
+    short, long = [path.format(line=line, cell=cell)
+                   for line, cell in zip(floor["lines"], floor["cells"])]
+    assert count_queries(short, admin_headers) == count_queries(long, admin_headers)
+
+
+def test_plant_planners_run_constant_queries(floor, admin_headers, post, count_queries):
+    path = f"/api/admin/plants/{floor['plant']['id']}/planners"
+    before = count_queries(path, admin_headers)
+
+    post("/api/admin/planners", {
+        "sap_id": "LP7", "name": "Planner 7", "plant_id": floor["plant"]["id"]})
+
+    assert count_queries(path, admin_headers) == before
+
+
+def test_planner_productions_run_constant_queries(floor, count_queries):
+    headers, shift = floor["planner_headers"], floor["shift"]
+    short, long = [f"/api/planner/productions?shift={shift['id']}&line={line['id']}"
+                   for line in floor["lines"]]
+    assert count_queries(short, headers) == count_queries(long, headers)
+
+
+def test_planner_shift_lines_run_constant_queries(client, floor, post, count_queries):
+    headers, shift = floor["planner_headers"], floor["shift"]
+    path = f"/api/planner/shifts/{shift['id']}/lines"
+    before = count_queries(path, headers)
+
+    post("/api/admin/lines", {"name": "List Line 2", "loop_id": floor["loop"]["id"]})
+
+    assert count_queries(path, headers) == before
+    response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    assert [line["name"] for line in response.json()["items"]] == [
+        "List Line 0", "List Line 1", "List Line 2"]
+    assert response.json()["total"] == 3
+
+
+def test_production_losses_run_constant_queries(floor, count_queries):
+    (short_headers, short_id), (long_headers, long_id) = floor["productions"]
+    assert count_queries(f"/api/team-leader/production/{short_id}/losses", short_headers) == \
+        count_queries(f"/api/team-leader/production/{long_id}/losses", long_headers)
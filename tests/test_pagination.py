@@ -0,0 +1,92 @@
+import base64
+import json
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from app.database import SessionLocal
+from app.models import LossReason, Shift
+from app.services.pagination import decode_cursor, encode_cursor
+
+
+def raw_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def test_decode_cursor_round_trips_encode_cursor():
+    assert decode_cursor(encode_cursor(["2025-01-02 03:04:05", 7]), 2) == [
+        "2025-01-02 03:04:05", 7]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor({"id": 1}),
+    raw_cursor([1]),
+    raw_cursor([{}, 1]),
+    raw_cursor([[1], 1]),
+    raw_cursor([1.5, 1]),
+    raw_cursor([True, 1]),
+])
+def test_decode_cursor_rejects_malformed_cursors(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, 2)
+
+    assert (error.value.status_code, error.value.detail) == (400, "Invalid cursor")
+
+
+def page_through(client, path, headers):
+    """Ids of every item, following next_cursor from the first page."""
+    ids, cursor = [], None
+    while True:
+        response = client.get(path + (f"&cursor={cursor}" if cursor else ""), headers=headers)
+        assert response.status_code == 200, response.text
+        ids += [item["id"] for item in response.json()["items"]]
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return ids
+
+
+@pytest.fixture(scope="module")
+def planner_headers(client, login, post, seed_plant):
+    """A planner whose plant has five shifts created at the same instant."""
+    plant = seed_plant("Page")["plant"]
+    post("/api/admin/planners", {"sap_id": "PP1", "name": "Planner", "plant_id": plant["id"]})
+    headers = login("PP1", "PP1")
+    for day in range(1, 6):
+        post("/api/planner/shifts", {
+            "date": f"2025-07-0{day}", "day_night": "DAY", "shift": "SHIFT-A"}, headers=headers)
+
+    with SessionLocal() as db:
+        db.execute(update(Shift).where(Shift.plant_id == plant["id"]).values(
+            created_at=datetime(2025, 7, 1, 6, 0, 0)))
+        db.commit()
+    return headers
+
+
+def test_shift_pages_tied_on_created_at_skip_and_repeat_nothing(client, planner_headers):
+    ids = page_through(client, "/api/planner/shifts?limit=2", planner_headers)
+
+    assert len(ids) == 5
+    # Ties on created_at fall back to the id, newest first
+    assert ids == sorted(ids, reverse=True)
+
+
+def test_loss_reason_pages_skip_and_repeat_nothing(client, admin_headers, post):
+    for index in range(1, 6):
+        post("/api/admin/loss-reasons", {
+            "id": 400 + index, "title": f"Page Reason {index}", "department": "ENG"})
+
+    ids = page_through(client, "/api/admin/loss-reasons?limit=2", admin_headers)
+
+    with SessionLocal() as db:
+        live = db.query(LossReason.id).filter(LossReason.is_deleted == False).all()
+    assert ids == sorted(loss_reason_id for loss_reason_id, in live)
+    assert {401, 402, 403, 404, 405} <= set(ids)
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", raw_cursor([1, 2, 3])])
+def test_bad_cursor_is_a_bad_request(client, admin_headers, planner_headers, cursor):
+    for path, headers in (("/api/planner/shifts", planner_headers),
+                          ("/api/admin/loss-reasons", admin_headers)):
+        response = client.get(f"{path}?cursor={cursor}", headers=headers)
+        assert (response.status_code, response.json()["detail"]) == (400, "Invalid cursor")
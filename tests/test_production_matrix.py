@@ -0,0 +1,71 @@
+import pytest
+
+
+@pytest.fixture(scope="module")
+def floor(login, post, seed_plant):
+    """A shift planned on two lines, each with a team leader and an achievement."""
+    seeded = seed_plant("Matrix", lines=2)
+    plant, lines = seeded["plant"], seeded["lines"]
+    post("/api/admin/planners", {"sap_id": "MP1", "name": "Planner", "plant_id": plant["id"]})
+    for index, line in enumerate(lines):
+        post("/api/admin/team-leaders", {
+            "sap_id": f"MT{index}", "name": f"Leader {index}", "line_id": line["id"]})
+    headers = login("MP1", "MP1")
+
+    shift = post("/api/planner/shifts", {
+        "date": "2025-08-01", "day_night": "DAY", "shift": "SHIFT-A"}, headers=headers)
+    post(f"/api/planner/shifts/{shift['id']}/productions", {"lines": [
+        {"line_id": lines[0]["id"], "plans": [{"hour": "HOUR-01", "plan": 100}]},
+        {"line_id": lines[1]["id"], "plans": [
+            {"hour": "HOUR-02", "plan": 80}, {"hour": "HOUR-03", "plan": 90}]},
+    ]}, headers=headers)
+    leader_headers = {}
+    for index, (line, hour, plan) in enumerate(((lines[0], "HOUR-01", 100), (lines[1], "HOUR-03", 90))):
+        leader_headers[line["id"]] = login(f"MT{index}", f"MT{index}")
+        post("/api/team-leader/production", {
+            "shift_id": shift["id"], "hour": hour, "plan": plan, "achievement": 60 + index,
+            "scraps": 0, "defects": 0, "flash": 0}, headers=leader_headers[line["id"]])
+
+    return {"loop": seeded["loop"], "shift": shift, "headers": headers,
+            "leader_headers": leader_headers}
+
+
+def get_matrix(client, floor, query_budget):
+    """The shift's matrix and the number of SQL statements it took."""
+    with query_budget(20, max_repeats=1) as requests:
+        response = client.get(f"/api/planner/shifts/{floor['shift']['id']}/matrix",
+                              headers=floor["headers"])
+    assert response.status_code == 200, response.text
+    return response.json(), requests[0][2].count
+
+
+def test_matrix_matches_each_lines_snapshot(client, floor, query_budget):
+    matrix, _ = get_matrix(client, floor, query_budget)
+
+    assert matrix["line_names"] == ["Matrix Line 0", "Matrix Line 1"]
+    for row, line_id in enumerate(matrix["line_ids"]):
+        response = client.get(f"/api/team-leader/production/snapshot?shift_id={floor['shift']['id']}",
+                              headers=floor["leader_headers"][line_id])
+        assert response.status_code == 200, response.text
+        hours = response.json()["hours"]
+
+        assert [hour["hour"] for hour in hours] == matrix["hours"]
+        for measure in ("plan", "achievement"):
+            assert matrix[measure][row] == [hour[measure] for hour in hours]
+
+    assert matrix["plan"][1][1:3] == [80, 90]
+    assert matrix["achievement"][1][2] == 61
+
+
+def test_matrix_runs_constant_queries(client, floor, post, query_budget):
+    _, before = get_matrix(client, floor, query_budget)
+
+    line = post("/api/admin/lines", {"name": "Matrix Line 2", "loop_id": floor["loop"]["id"]})
+    post(f"/api/planner/shifts/{floor['shift']['id']}/productions", {"lines": [
+        {"line_id": line["id"], "plans": [{"hour": "HOUR-01", "plan": 50}]},
+    ]}, headers=floor["headers"])
+
+    matrix, after = get_matrix(client, floor, query_budget)
+    assert after == before
+    assert matrix["line_names"][-1] == "Matrix Line 2"
+    assert matrix["plan"][-1][0] == 50
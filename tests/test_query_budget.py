@@ -0,0 +1,26 @@
+import pytest
+from app.services.query_stats import QueryBudgetExceeded
+
+
+def test_query_budget_passes_within_budget(client, admin_headers, query_budget):
+    with query_budget(5, max_repeats=1) as requests:
+        response = client.get("/api/admin/plants", headers=admin_headers)
+
+    assert response.status_code == 200
+    assert [(method, path) for method, path, _ in requests] == [
+        ("GET", "/api/admin/plants")]
+    assert 0 < requests[0][2].count <= 5
+
+
+def test_query_budget_raises_over_budget(client, admin_headers, query_budget):
+    with pytest.raises(QueryBudgetExceeded, match=r"GET /api/admin/plants: \d+ queries \(budget 0\)"):
+        with query_budget(0):
+            client.get("/api/admin/plants", headers=admin_headers)
+
+
+def test_query_budget_ignores_requests_outside_the_block(client, admin_headers, query_budget):
+    with query_budget(0) as requests:
+        pass
+    client.get("/api/admin/plants", headers=admin_headers)
+
+    assert requests == []
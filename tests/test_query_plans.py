@@ -0,0 +1,115 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app.database import engine
+
+
+@contextmanager
+def captured_selects():
+    """The SELECT statements and parameters run on the app's engine within the block."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
+def query_plan(statement, parameters):
+    with engine.connect() as connection:
+        return [row[-1] for row in connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {statement}", parameters)]
+
+
+@pytest.fixture(scope="module")
+def floor(client, login, post, seed_plant):
+    """A shift with a production, an attendance roster and a second page of shifts."""
+    seeded = seed_plant("Plan")
+    plant, line, cell = seeded["plant"], seeded["lines"][0], seeded["cells"][0]
+    post("/api/admin/planners", {"sap_id": "QP1", "name": "Planner", "plant_id": plant["id"]})
+    post("/api/admin/team-leaders", {"sap_id": "QT1", "name": "Leader", "line_id": line["id"]})
+    post("/api/admin/members", {"sap_id": "QM1", "name": "Member", "cell_id": cell["id"]})
+    attendance_type = post("/api/admin/attendance-types", {"title": "Plan Present", "color": "#00ff00"})
+
+    planner_headers, team_leader_headers = login("QP1", "QP1"), login("QT1", "QT1")
+    shifts = [post("/api/planner/shifts", {
+        "date": f"2025-05-0{day}", "day_night": "DAY", "shift": "SHIFT-A"}, headers=planner_headers)
+        for day in (1, 2)]
+    production = post("/api/team-leader/production", {
+        "shift_id": shifts[0]["id"], "hour": "HOUR-01", "plan": 100, "achievement": 50,
+        "scraps": 0, "defects": 0, "flash": 0}, headers=team_leader_headers)
+    first_page = client.get("/api/planner/shifts?limit=1", headers=planner_headers).json()
+
+    return {
+        "planner": planner_headers,
+        "team_leader": team_leader_headers,
+        "shift_id": shifts[0]["id"],
+        "line_id": line["id"],
+        "cell_id": cell["id"],
+        "production_id": production["id"],
+        "attendance_type_id": attendance_type["id"],
+        "next_cursor": first_page["next_cursor"],
+    }
+
+
+# (role, method, path, body) of a hot endpoint, the indexes its queries must
+# use, and whether its ORDER BY must come straight from an index
+HOT_ENDPOINTS = {
+    "team leader production for hour": (
+        lambda f: ("team_leader", "GET", f"/api/team-leader/production?shift_id={f['shift_id']}&hour=HOUR-01", None),
+        ["uq_production_shift_line_hour_live"], False),
+    "planner productions for shift and line": (
+        lambda f: ("planner", "GET", f"/api/planner/productions?shift={f['shift_id']}&line={f['line_id']}", None),
+        ["uq_production_shift_line_hour_live"], False),
+    "losses for production": (
+        lambda f: ("team_leader", "GET", f"/api/team-leader/production/{f['production_id']}/losses", None),
+        ["ix_loss_production_live"], False),
+    "planner shift list": (
+        lambda f: ("planner", "GET", "/api/planner/shifts?limit=10", None),
+        ["ix_shift_plant_created_live"], True),
+    "planner shift list after cursor": (
+        lambda f: ("planner", "GET", f"/api/planner/shifts?limit=10&cursor={f['next_cursor']}", None),
+        ["ix_shift_plant_created_live"], True),
+    "team leader shifts for date": (
+        lambda f: ("team_leader", "GET", "/api/team-leader/shifts?date=2025-05-01", None),
+        ["ix_shift_plant_date_live"], False),
+    "team leader roster": (
+        lambda f: ("team_leader", "GET", f"/api/team-leader/attendance?shift_id={f['shift_id']}", None),
+        ["ix_cell_line_live", "ix_member_cell_live", "uq_attendance_shift_member_live"], False),
+    "team leader roll call": (
+        lambda f: ("team_leader", "POST", "/api/team-leader/attendance", {
+            "shift_id": f["shift_id"], "entries": [{
+                "member_id": "QM1", "attendance_type_id": f["attendance_type_id"],
+                "working_cell_id": f["cell_id"]}]}),
+        [], False),
+    "planner shift plan save": (
+        lambda f: ("planner", "POST", f"/api/planner/shifts/{f['shift_id']}/productions", {
+            "lines": [{"line_id": f["line_id"], "plans": [{"hour": "HOUR-02", "plan": 100}]}]}),
+        ["uq_production_shift_line_hour_live"], False),
+}
+
+
+@pytest.mark.parametrize("name", HOT_ENDPOINTS)
+def test_hot_endpoint_queries_use_indexes(client, floor, name):
+    request, indexes, ordered_by_index = HOT_ENDPOINTS[name]
+    role, method, path, body = request(floor)
+
+    with captured_selects() as statements:
+        response = client.request(method, path, headers=floor[role], json=body)
+    assert response.status_code in (200, 201), response.text
+    assert statements
+
+    plans = [query_plan(statement, parameters) for statement, parameters in statements]
+    steps = [step for plan in plans for step in plan]
+    # "SCAN <table>" without an index is a full table scan
+    assert not [step for step in steps if step.startswith("SCAN") and "INDEX" not in step], plans
+    for index in indexes:
+        assert any(f"INDEX {index} " in step for step in steps), plans
+    if ordered_by_index:
+        # Sorting outside the index shows up as a temp b-tree
+        assert not [step for step in steps if "TEMP B-TREE" in step], plans
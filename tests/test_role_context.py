@@ -0,0 +1,53 @@
+import pytest
+from app.database import SessionLocal
+from app.models import Line
+from app.services.role_context import team_leader_contexts
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture(scope="module")
+def plants(login, post, seed_plant):
+    """Two plants, a team leader on the first and a shift only on the second."""
+    first, second = seed_plant("Context A"), seed_plant("Context B")
+    post("/api/admin/team-leaders", {
+        "sap_id": "CT1", "name": "Leader", "line_id": first["lines"][0]["id"]})
+    post("/api/admin/planners", {
+        "sap_id": "CP1", "name": "Planner", "plant_id": second["plant"]["id"]})
+    shift = post("/api/planner/shifts", {
+        "date": "2025-06-01", "day_night": "DAY", "shift": "SHIFT-A"}, headers=login("CP1", "CP1"))
+    return {"first": first, "second": second, "shift": shift, "headers": login("CT1", "CT1")}
+
+
+def test_moving_a_line_updates_its_team_leaders_context(client, db, plants):
+    headers, line_id = plants["headers"], plants["first"]["lines"][0]["id"]
+    assert client.get("/api/team-leader/shifts?date=2025-06-01", headers=headers).json() == []
+
+    db.get(Line, line_id).loop_id = plants["second"]["loop"]["id"]
+    db.flush()
+    # Not dropped until the move commits
+    assert "CT1" in team_leader_contexts._entries
+    db.commit()
+
+    response = client.get("/api/team-leader/shifts?date=2025-06-01", headers=headers)
+    assert response.status_code == 200
+    assert [shift["id"] for shift in response.json()] == [plants["shift"]["id"]]
+
+
+def test_rolled_back_hierarchy_change_keeps_contexts(client, db, plants):
+    headers, line_id = plants["headers"], plants["first"]["lines"][0]["id"]
+    client.get("/api/team-leader/me", headers=headers)
+
+    db.get(Line, line_id).name = "Context Renamed"
+    db.flush()
+    db.rollback()
+
+    assert "CT1" in team_leader_contexts._entries
+    assert client.get("/api/team-leader/me", headers=headers).json()["line"]["name"] == "Context A Line 0"
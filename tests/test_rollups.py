@@ -0,0 +1,76 @@
+import pytest
+from app.database import SessionLocal
+from app.models import Production
+from app.services.rollup_service import check_rollups, production_deltas
+
+
+@pytest.fixture(scope="module")
+def line_shift(login, post, seed_plant):
+    """A shift on a line, with its planner's and team leader's headers."""
+    seeded = seed_plant("Rollup")
+    plant, line = seeded["plant"], seeded["lines"][0]
+    post("/api/admin/planners", {"sap_id": "RP1", "name": "Planner", "plant_id": plant["id"]})
+    post("/api/admin/team-leaders", {"sap_id": "RT1", "name": "Leader", "line_id": line["id"]})
+    post("/api/admin/loss-reasons", {"id": 201, "title": "Rollup Reason", "department": "ENG"})
+
+    planner_headers = login("RP1", "RP1")
+    shift = post("/api/planner/shifts", {
+        "date": "2025-04-01", "day_night": "DAY", "shift": "SHIFT-A"}, headers=planner_headers)
+    return {
+        "line": line,
+        "shift": shift,
+        "planner_headers": planner_headers,
+        "team_leader_headers": login("RT1", "RT1"),
+    }
+
+
+def assert_rollups_consistent():
+    db = SessionLocal()
+    try:
+        assert check_rollups(db) == []
+    finally:
+        db.close()
+
+
+def test_production_deltas_only_count_updated_columns_of_existing_rows():
+    existing = Production(shift_id=1, line_id=2, hour="HOUR-01", plan=120, achievement=90)
+    new = Production(shift_id=1, line_id=2, hour="HOUR-02", plan=100, achievement=None)
+    before = {(1, 2, "HOUR-01"): {"plan": 100, "achievement": 80}}
+
+    deltas = production_deltas(before, [existing, new], ["plan"])
+
+    assert deltas == [
+        {"shift_id": 1, "line_id": 2, "plan": 20},
+        {"shift_id": 1, "line_id": 2, "plan": 100, "achievement": 0,
+         "scraps": 0, "defects": 0, "flash": 0},
+    ]
+
+
+def test_plan_and_achievement_saves_keep_rollups_consistent(post, line_shift):
+    shift, line = line_shift["shift"], line_shift["line"]
+    plan = {"lines": [{"line_id": line["id"], "plans": [{"hour": "HOUR-01", "plan": 100}]}]}
+    entry = {"shift_id": shift["id"], "hour": "HOUR-01", "plan": 100,
+             "achievement": 80, "scraps": 1, "defects": 2, "flash": 3}
+
+    post(f"/api/planner/shifts/{shift['id']}/productions", plan,
+         headers=line_shift["planner_headers"])
+    post("/api/team-leader/production", entry, headers=line_shift["team_leader_headers"])
+    plan["lines"][0]["plans"][0]["plan"] = 120
+    post(f"/api/planner/shifts/{shift['id']}/productions", plan,
+         headers=line_shift["planner_headers"])
+
+    assert_rollups_consistent()
+
+
+def test_deleting_a_loss_twice_takes_it_out_of_the_rollups_once(client, post, line_shift):
+    headers = line_shift["team_leader_headers"]
+    production = post("/api/team-leader/production", {
+        "shift_id": line_shift["shift"]["id"], "hour": "HOUR-02", "plan": 100,
+        "achievement": 50, "scraps": 0, "defects": 0, "flash": 0}, headers=headers)
+    loss = post("/api/team-leader/losses", {
+        "amount": 5, "loss_reason_id": 201, "production_id": production["id"]}, headers=headers)
+
+    assert client.delete(f"/api/team-leader/losses/{loss['id']}", headers=headers).status_code == 204
+    assert client.delete(f"/api/team-leader/losses/{loss['id']}", headers=headers).status_code == 404
+
+    assert_rollups_consistent()
@@ -0,0 +1,50 @@
+import time
+import pytest
+from app.database import SessionLocal
+from app.models import TokenRevocation
+from app.services.token_revocation import RevocationSet, _to_datetime, revocations
+
+
+@pytest.fixture
+def db(client):
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+def test_revocation_applies_once_committed(db):
+    revocations.revoke_token(db, "committed-jti", time.time() + 60)
+    assert not revocations.has_token_id("committed-jti")
+
+    db.commit()
+
+    assert revocations.has_token_id("committed-jti")
+
+
+def test_rolled_back_revocation_is_not_applied(db):
+    revocations.revoke_token(db, "rolled-back-jti", time.time() + 60)
+    db.rollback()
+    db.commit()
+
+    assert not revocations.has_token_id("rolled-back-jti")
+
+
+def test_sync_picks_up_rows_that_commit_out_of_order(db):
+    other_process = RevocationSet()
+    now = time.time()
+    # Ids as a sequence hands them out: the earlier revocation got the lower one
+    db.add(TokenRevocation(id=10002, jti="later-jti", revoked_at=_to_datetime(now),
+                           expires_at=_to_datetime(now + 60)))
+    db.commit()
+    other_process.sync(db)
+
+    # Revoked earlier, but its transaction commits after the one above
+    db.add(TokenRevocation(id=10001, jti="earlier-jti", revoked_at=_to_datetime(now - 5),
+                           expires_at=_to_datetime(now + 60)))
+    db.commit()
+    other_process.sync(db)
+
+    assert other_process.has_token_id("later-jti")
+    assert other_process.has_token_id("earlier-jti")